@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+"""
+Benchmarks `apigwsgi.Handler` against synthetic API Gateway proxy events.
+
+Each scenario is timed end-to-end through `Handler.__call__`, and its phases
+are timed separately:
+
+* `environ`:        `Handler.get_wsgi_environ`
+* `start_response`: `WSGIStartResponse.__call__`
+* `body`:           `Handler.get_response`, with an app that does nothing
+                    but call `start_response` and return its chunks
+
+Results are per-call timings in microseconds, best of `--repeat` runs. Save a
+baseline with `--save`, then compare later runs against it with `--compare`:
+
+    $ python benchmarks/bench_handler.py --save baseline.json
+    $ python benchmarks/bench_handler.py --compare baseline.json
+"""
+
+import argparse
+import json
+import os.path
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from apigwsgi import Handler, ResponseCache, WSGIStartResponse, set_request_header, set_response_header
+
+class DummyContext(object):
+    pass
+
+DEFAULT_HEADERS = {
+    "Host": "example.execute-api.us-east-1.amazonaws.com",
+    "X-Forwarded-Proto": "https",
+    "X-Forwarded-Port": "443",
+    "Accept": "*/*",
+    "User-Agent": "bench/1.0"
+}
+
+def make_event(method="GET", path="/", query=None, headers=None, body=None, default_headers=True,
+               multi_value_query=None):
+    event_headers = dict(DEFAULT_HEADERS) if default_headers else {}
+    event_headers.update(headers or {})
+
+    event = {
+        "httpMethod": method,
+        "path": path,
+        "queryStringParameters": query,
+        "headers": event_headers,
+        "body": body
+    }
+
+    if multi_value_query is not None:
+        event["queryStringParameters"] = {
+            key: values[-1] for key, values in multi_value_query.iteritems()
+        }
+        event["multiValueQueryStringParameters"] = multi_value_query
+        event["multiValueHeaders"] = {
+            key: [value] for key, value in event_headers.iteritems()
+        }
+
+    return event
+
+def make_http_api_event(method="GET", path="/", query="", headers=None, body=None):
+    event_headers = {key.lower(): value for key, value in DEFAULT_HEADERS.iteritems()}
+    event_headers.update(headers or {})
+
+    return {
+        "version": "2.0",
+        "routeKey": "$default",
+        "rawPath": path,
+        "rawQueryString": query,
+        "headers": event_headers,
+        "requestContext": {
+            "http": {
+                "method": method,
+                "path": path
+            }
+        },
+        "body": body,
+        "isBase64Encoded": False
+    }
+
+def make_app(chunks, response_headers=None):
+    response_headers = response_headers or [("Content-Type", "text/plain")]
+
+    def app(environ, start_response):
+        start_response("200 OK", list(response_headers))
+        return chunks
+
+    return app
+
+# Scenario name => (event, response chunks, response headers[, function
+# returning Handler options])
+SCENARIOS = {
+    "tiny_get": (
+        make_event(),
+        ["OK"],
+        None
+    ),
+    "bare_get": (
+        make_event(headers={"Host": "localhost"}, default_headers=False),
+        ["OK"],
+        None
+    ),
+    "many_headers": (
+        make_event(headers={
+            "X-Header-{}".format(i): "value-{}".format(i)
+            for i in xrange(60)
+        }),
+        ["OK"],
+        [("X-Response-{}".format(i), "value-{}".format(i)) for i in xrange(20)]
+    ),
+    "large_post": (
+        make_event(
+            method="POST",
+            headers={"Content-Type": "application/octet-stream"},
+            body="x" * (1024 * 1024)
+        ),
+        ["OK"],
+        None
+    ),
+    "many_query_params": (
+        make_event(query={
+            "param{}".format(i): "value {}".format(i)
+            for i in xrange(100)
+        }),
+        ["OK"],
+        None
+    ),
+    "multi_value_params": (
+        make_event(multi_value_query={
+            "filter{}".format(i): ["value {}".format(j) for j in xrange(4)]
+            for i in xrange(25)
+        }),
+        ["OK"],
+        [("Content-Type", "text/plain")] + [("Set-Cookie", "c{}=v".format(i)) for i in xrange(5)]
+    ),
+    "http_api_many_query_params": (
+        make_http_api_event(query="&".join(
+            "param{}=value+{}".format(i, i) for i in xrange(100)
+        )),
+        ["OK"],
+        None
+    ),
+    "cached_get": (
+        make_event(),
+        ["OK"],
+        [("Content-Type", "text/plain"), ("Cache-Control", "max-age=3600")],
+        lambda: {"cache": ResponseCache()}
+    ),
+    "many_chunks": (
+        make_event(),
+        ["chunk {}\n".format(i) for i in xrange(10000)],
+        None
+    )
+}
+
+def add_request_id(event, context):
+    set_request_header(event, "X-Request-Id", "c6af9ac6-7b61-11e6-9a41-93e8deadbeef")
+
+def add_security_headers(event, context, response):
+    set_response_header(event, response, "X-Frame-Options", "DENY")
+
+# A REST API event with `multiValueHeaders`, as API Gateway sends them.
+SCENARIOS["hooks"] = (
+    make_event(multi_value_query={}),
+    ["OK"],
+    None,
+    lambda: {"pre_hooks": [add_request_id], "post_hooks": [add_security_headers]}
+)
+
+# The same response at each `validation` level.
+for level in ["strict", "fast", "off"]:
+    SCENARIOS["validation_" + level] = (
+        make_event(),
+        ["chunk {}\n".format(i) for i in xrange(100)],
+        [("Content-Type", "text/plain")] + [("X-Header-{}".format(i), "value {}".format(i)) for i in xrange(20)],
+        lambda level=level: {"validation": level}
+    )
+
+def best_time(func, repeat, min_total=0.2):
+    """
+    Returns the best per-call time of `func` in microseconds.
+    """
+
+    timer = timeit.Timer(func)
+
+    # Scale the number of calls so each run takes at least `min_total`
+    # seconds.
+    number = 1
+    while timer.timeit(number) < min_total / 10.0:
+        number *= 10
+
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+def bench_scenario(repeat, event, chunks, response_headers, get_options=dict):
+    context = DummyContext()
+    app = make_app(chunks, response_headers)
+    handler = Handler(app, **get_options())
+    validation = handler.validation
+    environ = handler.get_wsgi_environ(event, context)
+    headers = list(response_headers or [("Content-Type", "text/plain")])
+
+    def call():
+        handler(event, context)
+
+    def get_wsgi_environ():
+        handler.get_wsgi_environ(event, context)
+
+    def start_response():
+        WSGIStartResponse(write=None, validation=validation)("200 OK", headers)
+
+    def body():
+        handler.get_response(environ.copy())
+
+    return {
+        "call": best_time(call, repeat),
+        "environ": best_time(get_wsgi_environ, repeat),
+        "start_response": best_time(start_response, repeat),
+        "body": best_time(body, repeat)
+    }
+
+def run(names, repeat):
+    results = {}
+    for name in names:
+        results[name] = bench_scenario(repeat, *SCENARIOS[name])
+    return results
+
+def report(results, baseline=None):
+    phases = ["call", "environ", "start_response", "body"]
+
+    print "{:<28} {:<16} {:>12} {:>12} {:>9}".format(
+        "scenario", "phase", "usec", "baseline", "change"
+    )
+    for name in sorted(results):
+        for phase in phases:
+            usec = results[name].get(phase)
+            if usec is None:
+                continue
+
+            base = (baseline or {}).get(name, {}).get(phase)
+            if base:
+                print "{:<28} {:<16} {:>12.2f} {:>12.2f} {:>+8.1f}%".format(
+                    name, phase, usec, base, (usec - base) / base * 100
+                )
+            else:
+                print "{:<28} {:<16} {:>12.2f} {:>12} {:>9}".format(
+                    name, phase, usec, "-", "-"
+                )
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scenarios", nargs="*",
+                        help="Scenarios to run (default: all of {})".format(", ".join(sorted(SCENARIOS))))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", metavar="FILE", help="Save results as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="Compare against a saved baseline")
+    args = parser.parse_args()
+
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error("unknown scenario {!r}".format(name))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)
+
+    results = run(args.scenarios or sorted(SCENARIOS), args.repeat)
+    report(results, baseline)
+
+    if args.save:
+        with open(args.save, "w") as fp:
+            json.dump(results, fp, indent=4, sort_keys=True)
+
+if __name__ == "__main__":
+    main()
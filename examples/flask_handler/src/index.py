@@ -16,6 +16,8 @@ def index(path):
 import apigwsgi
 lambda_handler = apigwsgi.Handler(app)
 
-# Run a debug server if called on the command-line
+# Run a local server if called on the command-line. Requests go through
+# `lambda_handler`, as they would in Lambda.
 if __name__ == "__main__":
-    app.run(debug=True)
+    from apigwsgi.devserver import serve
+    serve(lambda_handler)
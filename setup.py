@@ -17,6 +17,11 @@ setup(
     packages=["apigwsgi"],
     package_dir={"": os.path.join(ROOT, "src")},
     test_suite="tests",
+    entry_points={
+        "console_scripts": [
+            "apigwsgi-dev = apigwsgi.devserver:main"
+        ]
+    },
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
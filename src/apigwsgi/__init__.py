@@ -1,86 +1,424 @@
 """
-Makes Python WSGI apps compatible with AWS' API Gateway proxy resources.
+Makes Python WSGI apps compatible with AWS' API Gateway proxy resources,
+HTTP APIs and Application Load Balancers.
 """
 
-import cStringIO
-import re
+import base64
+import hashlib
+import multiprocessing.pool
 import sys
+import threading
+import traceback
 import urllib
 
+from apigwsgi.body import Response, ResponseBody, ResponseTooLarge
+from apigwsgi.compression import (
+    DEFAULT_ENCODINGS, DEFAULT_UNCOMPRESSIBLE_CONTENT_TYPES, ResponseCompressor,
+    negotiate_encoding
+)
+from apigwsgi.cache import ResponseCache
+from apigwsgi.conditional import get_not_modified_headers, is_not_modified, make_etag
+from apigwsgi.dispatch import Dispatcher
+from apigwsgi.files import FileWrapper, read_file
+from apigwsgi.formats import (
+    ALBFormat, DEFAULT_EVENT_FORMATS, EventFormat, HTTPAPIFormat, RESTAPIFormat, get_event_format
+)
+from apigwsgi.gcpolicy import GCPolicy
+from apigwsgi.hooks import (
+    compile_hooks, get_request_header, get_response_header, set_request_header, set_response_header
+)
+from apigwsgi.importing import ImportTimer, import_string
+from apigwsgi.profiling import Profiler
+from apigwsgi.ranges import (
+    RangeNotSatisfiable, get_content_range, get_file_size, get_filelike, if_range_matches,
+    parse_range
+)
+from apigwsgi.request import DEFAULT_DECODE_THRESHOLD, RequestBody
+from apigwsgi.static import StaticFiles
+from apigwsgi.timing import Timings
+from apigwsgi.utils import ContentTypes, EnvironHeaders, Memo, add_vary, get_header, remove_header
+from apigwsgi.validation import (
+    VALIDATION_LEVELS, parse_status_cached, parse_status_strict, validate_bytestring,
+    validate_chunks, validate_exc_info, validate_headers
+)
+from apigwsgi.warmup import DEFAULT_WARMUP_EVENTS, WARMUP_RESPONSE, make_warmup_event
+
+# SERVER_NAME for events without a Host header, such as ALB health checks.
+DEFAULT_SERVER_NAME = "localhost"
+
+# Default SERVER_PORT for each URL scheme, if X-Forwarded-Port isn't sent.
+DEFAULT_PORTS = {
+    "https": "443",
+    "http": "80"
+}
+
+# Response content types that are sent base64 encoded. A trailing "/*"
+# matches any subtype.
+DEFAULT_BINARY_CONTENT_TYPES = (
+    "application/octet-stream",
+    "application/pdf",
+    "application/zip",
+    "application/gzip",
+    "application/x-protobuf",
+    "image/*",
+    "audio/*",
+    "video/*",
+    "font/*"
+)
+
+# Request headers `get_cached_response` always needs.
+CACHE_REQUEST_HEADERS = frozenset([
+    "cache-control",
+    "if-modified-since",
+    "if-none-match"
+])
+
+# Request headers that affect static file responses.
+STATIC_REQUEST_HEADERS = frozenset([
+    "accept-encoding",
+    "if-modified-since",
+    "if-none-match",
+    "if-range",
+    "range"
+])
+
+# MD5 digest of an empty body.
+EMPTY_DIGEST = hashlib.md5("").hexdigest()
+
+# Largest response body we'll send. Lambda limits synchronous responses to
+# 6MB (6291456 bytes) including headers and JSON encoding, so this leaves
+# some headroom.
+DEFAULT_MAX_BODY_SIZE = 6000000
+
 class Handler(object):
     """
     AWS Lambda handler. Adapts API Gateway Proxy resources to WSGI
     requests/responses.
     """
 
-    def __init__(self, wsgi_app):
-        self.wsgi_app = wsgi_app
+    def __init__(self, wsgi_app, binary_content_types=DEFAULT_BINARY_CONTENT_TYPES,
+                 compression=False, compression_level=6, compression_min_size=1024,
+                 compression_encodings=DEFAULT_ENCODINGS,
+                 uncompressible_content_types=DEFAULT_UNCOMPRESSIBLE_CONTENT_TYPES,
+                 max_body_size=DEFAULT_MAX_BODY_SIZE, event_formats=DEFAULT_EVENT_FORMATS,
+                 etags=False, cache=None, warmup_events=DEFAULT_WARMUP_EVENTS,
+                 warmup_requests=(), import_timing=False, timing_callback=None,
+                 server_timing=False, emf_namespace=None, emf_dimensions=None, profiler=None,
+                 script_name="", static_files=None, ranges=False,
+                 decode_threshold=DEFAULT_DECODE_THRESHOLD, batch_workers=1, validation="fast",
+                 gc_policy=None, pre_hooks=(), post_hooks=()):
+        # `wsgi_app` may be a "package.module:attribute" string, imported
+        # when it's first needed - see `load_wsgi_app`.
+        if isinstance(wsgi_app, basestring):
+            self.wsgi_app_name = wsgi_app
+            self._wsgi_app = None
+        else:
+            self.wsgi_app_name = None
+            self._wsgi_app = wsgi_app
+        self.import_timing = import_timing
+        self.load_lock = threading.Lock()
+
+        # Thread pool for `batch`, created when first needed.
+        self.batch_pool = None
+
+        if validation not in VALIDATION_LEVELS:
+            raise Exception("validation must be one of {}, not {!r}".format(", ".join(VALIDATION_LEVELS), validation))
+        self.validation = validation
+
+        self.etags = etags
+        self.ranges = ranges
+        self.cache = cache
+        self.static_files = static_files
+        self.event_formats = tuple(event_formats)
+        self.max_body_size = max_body_size
+        self.decode_threshold = decode_threshold
+        self.batch_workers = batch_workers
+        self.script_name = script_name.rstrip("/")
+        self.environ_template = self.get_environ_template()
+
+        self.binary_content_types = ContentTypes(binary_content_types)
+
+        self.compression = compression
+        self.compression_level = compression_level
+        self.compression_min_size = compression_min_size
+        self.compression_encodings = tuple(compression_encodings)
+        self.uncompressible_content_types = ContentTypes(uncompressible_content_types)
+
+        # Accept-Encoding => negotiated encoding.
+        self.negotiated_encodings = Memo(self.choose_encoding, 64)
+
+        self.warmup_events = tuple(warmup_events)
+
+        # Per-phase timings. Requests are only timed if something will use
+        # the results - see `call_timed`.
+        self.timing_callback = timing_callback
+        self.server_timing = server_timing
+        self.emf_namespace = emf_namespace
+        self.emf_dimensions = emf_dimensions
+        self.timed = bool(timing_callback or server_timing or emf_namespace)
+
+        self.profiler = profiler
+
+        # `handle`, with any hooks around it.
+        self.handle_event = compile_hooks(self.handle, pre_hooks, post_hooks)
+
+        # Last, so the handler is fully configured.
+        self.warm_up(warmup_requests)
+
+        # After warming up, so what that loads is treated as long-lived.
+        self.gc_policy = gc_policy
+        if gc_policy is not None:
+            gc_policy.prepare()
 
     def __call__(self, event, context):
-        bytestrings = []
+        # Warmup pings are answered before anything else - see
+        # `is_warmup_event`.
+        if self.is_warmup_event(event):
+            return dict(WARMUP_RESPONSE)
 
-        # "The environ parameter is a dictionary object, containing
-        #  CGI-style environment variables. This object must be a builtin
-        #  Python dictionary (not a subclass, UserDict or other dictionary
-        #  emulation), and the application is allowed to modify the dictionary
-        #  in any way it desires. The dictionary must also include certain
-        #  WSGI-required variables (described in a later section), and may also
-        #  include server-specific extension variables, named according to a
-        #  convention that will be described below."
-        environ = self.get_wsgi_environ(event, context)
+        if self.gc_policy is not None:
+            return self.call_with_gc_policy(event, context)
 
-        # "The start_response callable must return a write(body_data) callable
-        #  that takes one positional parameter: a bytestring to be written as
-        #  part of the HTTP response body. (Note: the write() callable is
-        #  provided only to support certain existing frameworks' imperative
-        #  output APIs; it should not be used by new applications or frameworks
-        #  if it can be avoided."
-        start_response = WSGIStartResponse(write=bytestrings.append)
+        return self.handle_event(event, context)
 
-        # "The application object must accept two positional arguments. [...]
-        #  A server or gateway must invoke the application object using
-        #  positional (not keyword) arguments."
-        # "When called by the server, the application object must return an
-        #  iterable yielding zero or more bytestrings."
-        result = self.wsgi_app(environ, start_response)
+    def handle(self, event, context):
+        """
+        Returns the response to a (non-warmup) event.
+        """
+
+        if self.timed:
+            return self.call_timed(event, context)
+
+        event_format = self.get_event_format(event)
+
+        if self.static_files is not None:
+            response = self.get_static_response(event, event_format)
+            if response is not None:
+                return response
+
+        if self.cache is not None:
+            response = self.get_cached_response(event, event_format)
+            if response is not None:
+                return response
+
+        environ = self.get_wsgi_environ(event, context, event_format)
+
+        return self.get_response(environ, event_format)
+
+    def batch(self, events, context):
+        """
+        Handles a list of events, returning a list of their responses in the
+        same order. With `batch_workers` over 1, events are handled
+        concurrently by a pool of that many threads - only use this if the
+        app is thread-safe.
+
+        An event that raises an exception gets a 500 response, and the
+        traceback is written to `wsgi.errors`. The rest of the batch carries
+        on.
+        """
+
+        def call(event):
+            try:
+                return self(event, context)
+            except Exception:
+                self.environ_template["wsgi.errors"].write(
+                    "apigwsgi: batch event failed:\n{}".format(traceback.format_exc())
+                )
+                return self.get_error_response(event)
+
+        if self.batch_workers > 1 and len(events) > 1:
+            return self.get_batch_pool().map(call, events, chunksize=1)
+
+        return [call(event) for event in events]
+
+    def get_batch_pool(self):
+        with self.load_lock:
+            if self.batch_pool is None:
+                self.batch_pool = multiprocessing.pool.ThreadPool(self.batch_workers)
+            return self.batch_pool
+
+    def get_error_response(self, event):
+        """
+        Returns a 500 Internal Server Error response for `event`.
+        """
+
+        body = "Internal Server Error"
+        try:
+            event_format = self.get_event_format(event)
+        except Exception:
+            return {"statusCode": 500, "body": body}
+
+        return event_format.get_response(
+            event, 500, "500 Internal Server Error", [("Content-Type", "text/plain")], body, False
+        )
+
+    def call_with_gc_policy(self, event, context):
+        """
+        As `handle_event`, with automatic garbage collection disabled until
+        the response is built - see `apigwsgi.gcpolicy.GCPolicy`.
+        """
+
+        gc_policy = self.gc_policy
+        gc_policy.begin()
         try:
-            for bytestring in result:
-                # "Note: the application must invoke the start_response()
-                #  callable before the iterable yields its first body
-                #  bytestring, so that the server can send the headers before
-                #  any body content. However, this invocation may be performed
-                #  by the iterable's first iteration, so servers must not
-                #  assume that start_response() has been called before they
-                #  begin iterating over the iterable."
-                if not start_response.headers_set:
-                    raise Exception("Headers must be sent before body")
-
-                bytestrings.append(bytestring)
-                start_response.body_started = True
+            return self.handle_event(event, context)
         finally:
-            # "If the iterable returned by the application has a close() method,
-            #  the server or gateway must call that method upon completion of
-            #  the current request, whether the request was completed normally,
-            #  or terminated early due to an application error during iteration
-            #  or an early disconnect of the browser."
-            if hasattr(result, "close"):
-                result.close()
+            gc_policy.end()
 
-        if not start_response.headers_set:
-            raise Exception("Application didn't send headers")
+    def call_timed(self, event, context):
+        """
+        As `__call__`, timing each phase - see `apigwsgi.timing.Timings`.
+        """
 
-        return {
-            "statusCode": start_response.status_code,
-            "headers": dict(start_response.response_headers),
-            "body": "".join(bytestrings)
-        }
+        timings = Timings()
+        event_format = self.get_event_format(event)
+
+        cached = None
+        if self.static_files is not None:
+            cached = self.find_static_response(event, event_format)
+        if cached is None and self.cache is not None:
+            cached = self.find_cached_response(event, event_format)
+        if cached is not None:
+            environ, response = cached
+            timings.cached = True
+            timings.mark("parse")
+            return self.send_timed_response(environ, event_format, response, timings)
+
+        environ = self.get_wsgi_environ(event, context, event_format)
+        timings.mark("parse")
+
+        return self.get_response(environ, event_format, timings)
+
+    def send_timed_response(self, environ, event_format, response, timings):
+        """
+        As `send_response`, adding a Server-Timing header and reporting
+        `timings` once the response is built.
+        """
+
+        if self.server_timing:
+            # The serialize phase is still to come, so can't be included.
+            phases = ("parse",) if timings.cached else ("parse", "app", "body")
+            response = Response(
+                response.status_code, response.status,
+                response.headers + [("Server-Timing", timings.server_timing(phases))],
+                response.body, response.base64_encoded
+            )
+
+        result = self.send_response(environ, event_format, response)
+        timings.mark("serialize")
+
+        # Collect now, rather than after reporting, so the timings include
+        # the collection.
+        if self.gc_policy is not None:
+            self.gc_policy.collect(timings)
+
+        self.report_timings(timings, environ["apigwsgi.event"])
 
-    def get_wsgi_environ(self, event, context):
+        return result
+
+    def report_timings(self, timings, event):
+        """
+        Passes a request's `Timings` to `timing_callback`, and writes them to
+        stdout in CloudWatch Embedded Metric Format if `emf_namespace` is
+        set.
+        """
+
+        if self.timing_callback is not None:
+            self.timing_callback(timings, event)
+
+        if self.emf_namespace:
+            sys.stdout.write(timings.emf(self.emf_namespace, self.emf_dimensions) + "\n")
+
+    @property
+    def wsgi_app(self):
+        app = self._wsgi_app
+        if app is None:
+            app = self.load_wsgi_app()
+        return app
+
+    @wsgi_app.setter
+    def wsgi_app(self, app):
+        self._wsgi_app = app
+
+    def load_wsgi_app(self):
+        """
+        Imports the app, if it was given as an import string and hasn't been
+        imported yet, and returns it. Happens on the first request that needs
+        the app; call this at module level to pay the cost during Lambda's
+        init phase instead.
+
+        With `import_timing` set, the slowest imports are written to
+        `wsgi.errors`.
+        """
+
+        with self.load_lock:
+            if self._wsgi_app is None:
+                if self.import_timing:
+                    with ImportTimer() as timer:
+                        app = import_string(self.wsgi_app_name)
+                    timer.report(self.environ_template["wsgi.errors"])
+                else:
+                    app = import_string(self.wsgi_app_name)
+
+                self._wsgi_app = app
+
+        return self._wsgi_app
+
+    def is_warmup_event(self, event):
+        """
+        Returns whether `event` matches any of `warmup_events`.
+        """
+
+        for is_warmup in self.warmup_events:
+            if is_warmup(event):
+                return True
+
+        return False
+
+    def warm_up(self, requests):
+        """
+        Runs `requests` through the app, so that whatever it does lazily
+        happens now rather than on a real request. Each request is a path,
+        requested with GET, or a `(method, path)` tuple. Errors are written
+        to `wsgi.errors`, not raised.
+        """
+
+        errors = self.environ_template["wsgi.errors"]
+        for request in requests:
+            event = make_warmup_event(request)
+            try:
+                environ = self.get_wsgi_environ(event, None)
+                response = self.run_wsgi_app(environ)
+            except Exception:
+                errors.write("apigwsgi: warmup request {!r} failed:\n{}".format(request, traceback.format_exc()))
+            else:
+                if response.status_code >= 500:
+                    errors.write("apigwsgi: warmup request {!r} returned {}\n".format(request, response.status))
+
+    def get_event_format(self, event):
+        """
+        Returns the first of `event_formats` that matches `event`.
+        """
+
+        return get_event_format(event, self.event_formats)
+
+    def get_wsgi_environ(self, event, context, event_format=None):
         # Docs:
         # * Environ variables: <https://www.python.org/dev/peps/pep-3333/#environ-variables>
-        # * Event format: <https://docs.aws.amazon.com/apigateway/latest/developerguide/api-gateway-set-up-simple-proxy.html#api-gateway-simple-proxy-for-lambda-input-format>
+        # * Event formats: see `apigwsgi.formats`
 
-        environ = {}
+        # "The environ parameter is a dictionary object, containing
+        #  CGI-style environment variables. This object must be a builtin
+        #  Python dictionary (not a subclass, UserDict or other dictionary
+        #  emulation), and the application is allowed to modify the dictionary
+        #  in any way it desires. The dictionary must also include certain
+        #  WSGI-required variables (described in a later section), and may also
+        #  include server-specific extension variables, named according to a
+        #  convention that will be described below."
+        #
+        # Variables that don't depend on the event are precomputed in
+        # `environ_template` - see `get_environ_template`.
+        environ = self.environ_template.copy()
 
         # "the environ dictionary may [...] contain server-defined variables.
         #  These variables should be named using only lower-case letters,
@@ -93,40 +431,29 @@ class Handler(object):
 
         # Start by populating the variables from HTTP headers. This has
         # the side effect of normalising header case, which will be useful
-        # further down the function.
+        # further down the function. The event format also sets
+        # REQUEST_METHOD, PATH_INFO and QUERY_STRING - see
+        # `apigwsgi.formats`.
+        if event_format is None:
+            event_format = self.get_event_format(event)
+        event_format.update_environ(environ, event)
+
+        # If the app is mounted under a path (say, an API Gateway base path
+        # mapping), requests may arrive with it still on the front.
+        if self.script_name:
+            environ["PATH_INFO"] = self.strip_script_name(environ["PATH_INFO"])
+
+        # "An input stream (file-like object) from which the HTTP request body
+        #  bytes can be read."
         #
-        # "Variables corresponding to the client-supplied HTTP request headers
-        #  (i.e., variables whose names begin with "HTTP_" ). The presence or
-        #  absence of these variables should correspond with the presence or
-        #  absence of the appropriate HTTP header in the request."
-        environ.update({
-            "HTTP_{}".format(key.upper().replace("-", "_")): value
-            for key, value in (event["headers"] or {}).iteritems()
-        })
+        # The body isn't decoded until the app reads it - see
+        # `apigwsgi.request.RequestBody`.
+        wsgi_input = RequestBody(event.get("body") or "", event.get("isBase64Encoded"), self.decode_threshold)
+        environ["wsgi.input"] = wsgi_input
 
         # Construct a Content-Length header. API Gateway doesn't seem to forward
         # this.
-        environ["HTTP_CONTENT_LENGTH"] = len(event["body"] or "")
-
-        # "The HTTP request method, such as "GET" or "POST" . This cannot ever
-        #  be an empty string, and so is always required."
-        environ["REQUEST_METHOD"] = event["httpMethod"]
-
-        # "The initial portion of the request URL's "path" that corresponds to
-        #  the application object, so that the application knows its virtual
-        #  "location". This may be an empty string, if the application
-        #  corresponds to the "root" of the server."
-        environ["SCRIPT_NAME"] = ""
-
-        # "The remainder of the request URL's "path", designating the virtual
-        #  "location" of the request's target within the application. This may
-        #  be an empty string, if the request URL targets the application root
-        #  and does not have a trailing slash."
-        environ["PATH_INFO"] = event["path"]
-
-        # "The portion of the request URL that follows the "?" , if any. May be
-        #  empty or absent."
-        environ["QUERY_STRING"] = urllib.urlencode(event["queryStringParameters"] or {})
+        environ["HTTP_CONTENT_LENGTH"] = str(wsgi_input.size)
 
         # "The contents of any Content-Type fields in the HTTP request. May be
         #  empty or absent."
@@ -143,35 +470,55 @@ class Handler(object):
         #  reconstructing the request URL. See the URL Reconstruction section
         #  below for more detail. SERVER_NAME and SERVER_PORT can never be empty
         #  strings, and so are always required."
-        environ["SERVER_NAME"] = environ["HTTP_HOST"]
-        environ["SERVER_PORT"] = environ.get("HTTP_X_FORWARDED_PORT") or {
-            "https": "443",
-            "http": "80"
-        }[environ.get("HTTP_X_FORWARDED_PROTO", "https")]
+        environ["SERVER_NAME"] = environ.get("HTTP_HOST") or DEFAULT_SERVER_NAME
 
-        # "The version of the protocol the client used to send the request.
-        #  Typically this will be something like "HTTP/1.0" or "HTTP/1.1" and
-        #  may be used by the application to determine how to treat any HTTP
-        #  request headers."
-        environ["SERVER_PROTOCOL"] = "HTTP/1.1"
+        # "A string representing the "scheme" portion of the URL at which the
+        #  application is being invoked. Normally, this will have the value
+        #  "http" or "https" , as appropriate."
+        url_scheme = environ.get("HTTP_X_FORWARDED_PROTO", "https")
+        environ["wsgi.url_scheme"] = url_scheme
+        environ["SERVER_PORT"] = environ.get("HTTP_X_FORWARDED_PORT") or DEFAULT_PORTS[url_scheme]
 
         # "if SSL is in use, the server or gateway should also provide as many
         #  of the Apache SSL environment variables [5] as are applicable, such
         #  as HTTPS=on and SSL_PROTOCOL"
-        if environ.get("HTTP_X_FORWARDED_PROTO", "https") == "https":
+        if url_scheme == "https":
             environ["HTTPS"] = "on"
 
-        # "The tuple (1, 0) , representing WSGI version 1.0."
-        environ["wsgi.version"] = (1, 0)
+        return environ
 
-        # "A string representing the "scheme" portion of the URL at which the
-        #  application is being invoked. Normally, this will have the value
-        #  "http" or "https" , as appropriate."
-        environ["wsgi.url_scheme"] = environ.get("HTTP_X_FORWARDED_PROTO", "https")
+    def strip_script_name(self, path):
+        """
+        Returns `path` without `script_name` on the front, if it's there.
+        """
 
-        # "An input stream (file-like object) from which the HTTP request body
-        #  bytes can be read."
-        environ["wsgi.input"] = cStringIO.StringIO(event["body"] or "")
+        script_name = self.script_name
+        if path.startswith(script_name) and path[len(script_name):len(script_name) + 1] in ("", "/"):
+            return path[len(script_name):]
+        return path
+
+    def get_environ_template(self):
+        """
+        Returns the environ variables that are the same for every request.
+        Called once, when the handler is created.
+        """
+
+        environ = {}
+
+        # "The initial portion of the request URL's "path" that corresponds to
+        #  the application object, so that the application knows its virtual
+        #  "location". This may be an empty string, if the application
+        #  corresponds to the "root" of the server."
+        environ["SCRIPT_NAME"] = self.script_name
+
+        # "The version of the protocol the client used to send the request.
+        #  Typically this will be something like "HTTP/1.0" or "HTTP/1.1" and
+        #  may be used by the application to determine how to treat any HTTP
+        #  request headers."
+        environ["SERVER_PROTOCOL"] = "HTTP/1.1"
+
+        # "The tuple (1, 0) , representing WSGI version 1.0."
+        environ["wsgi.version"] = (1, 0)
 
         # "An output stream (file-like object) to which error output can be
         #  written, for the purpose of recording program or other errors in a
@@ -183,7 +530,9 @@ class Handler(object):
         # "This value should evaluate true if the application object may be
         #  simultaneously invoked by another thread in the same process, and
         #  should evaluate false otherwise."
-        environ["wsgi.multithread"] = False
+        #
+        # Only `batch` runs requests in threads.
+        environ["wsgi.multithread"] = self.batch_workers > 1
 
         # "This value should evaluate true if an equivalent application object
         #  may be simultaneously invoked by another process, and should evaluate
@@ -197,11 +546,640 @@ class Handler(object):
         #  similar)."
         environ["wsgi.run_once"] = False
 
+        # "To be considered "file-like", the object supplied by the
+        #  application must have a read() method that takes an optional size
+        #  argument. [...] Apart from the handling of close(), the semantics of
+        #  returning a file wrapper from the application should be the same as
+        #  if the application had returned iter(filelike.read, '')."
+        environ["wsgi.file_wrapper"] = FileWrapper
+
         return environ
 
+    def get_response(self, environ, event_format=None, timings=None):
+        """
+        Run the WSGI app against `environ`, returning a Lambda response in
+        `event_format`. By default the format is detected from the event. If
+        `timings` is given, the app, body and serialize phases are timed.
+        """
+
+        event = environ["apigwsgi.event"]
+        if event_format is None:
+            event_format = self.get_event_format(event)
+
+        try:
+            if self.profiler is not None and self.profiler.should_profile(environ):
+                response = self.run_profiled_wsgi_app(environ, timings)
+            else:
+                response = self.run_wsgi_app(environ, timings)
+        except ResponseTooLarge as exc:
+            # Lambda would reject the response anyway, after we'd built the
+            # whole thing. Fail early with something API Gateway can send.
+            environ["wsgi.errors"].write("apigwsgi: {}\n".format(exc))
+            response = Response(502, "502 Bad Gateway", [("Content-Type", "text/plain")], "Response body too large")
+
+        if self.cache is not None and environ["REQUEST_METHOD"] == "GET":
+            _, path, query = event_format.get_cache_key(event)
+            self.cache.put((path, query), EnvironHeaders(environ), response)
+
+        # The profile summary is only for the debug request, so it's added
+        # to a copy of the response, rather than one that may be cached.
+        summary = environ.get("apigwsgi.profile_summary")
+        if summary is not None:
+            response = Response(
+                response.status_code, response.status,
+                response.headers + [(self.profiler.summary_header, summary)],
+                response.body, response.base64_encoded
+            )
+
+        if timings is not None:
+            return self.send_timed_response(environ, event_format, response, timings)
+
+        return self.send_response(environ, event_format, response)
+
+    def get_cached_response(self, event, event_format):
+        """
+        Returns a Lambda response for `event` from `cache`, or None. Doesn't
+        build an environ or call the app.
+        """
+
+        cached = self.find_cached_response(event, event_format)
+        if cached is None:
+            return None
+
+        environ, response = cached
+        return self.send_response(environ, event_format, response)
+
+    def find_cached_response(self, event, event_format):
+        """
+        Returns `(environ, response)` for `event` from `cache`, or None.
+        `environ` has just the variables `send_response` needs.
+        """
+
+        method, path, query = event_format.get_cache_key(event)
+        if method != "GET" and method != "HEAD":
+            return None
+
+        resource_key = (path, query)
+        request_headers = event_format.get_headers(
+            event, CACHE_REQUEST_HEADERS.union(self.cache.get_vary(resource_key))
+        )
+
+        # "no-cache" asks us not to use a stored response.
+        if "no-cache" in request_headers.get("cache-control", ""):
+            return None
+
+        response = self.cache.get(resource_key, request_headers)
+        if response is None:
+            return None
+
+        # Just the parts of the environ `send_response` needs.
+        environ = {
+            "apigwsgi.event": event,
+            "REQUEST_METHOD": method,
+            "HTTP_IF_NONE_MATCH": request_headers.get("if-none-match"),
+            "HTTP_IF_MODIFIED_SINCE": request_headers.get("if-modified-since")
+        }
+
+        return environ, response
+
+    def get_static_response(self, event, event_format):
+        """
+        Returns a Lambda response for `event` from `static_files`, or None.
+        Doesn't build an environ or call the app.
+        """
+
+        found = self.find_static_response(event, event_format)
+        if found is None:
+            return None
+
+        environ, response = found
+        return self.send_response(environ, event_format, response)
+
+    def find_static_response(self, event, event_format):
+        """
+        Returns `(environ, response)` for `event` from `static_files`, or
+        None. `environ` has just the variables `send_response` needs.
+        """
+
+        method, path, _ = event_format.get_cache_key(event)
+        if method != "GET" and method != "HEAD":
+            return None
+
+        if "%" in path:
+            path = urllib.unquote(path)
+        if self.script_name:
+            path = self.strip_script_name(path)
+
+        original = self.static_files.files.get(path)
+        if original is None:
+            return None
+
+        request_headers = event_format.get_headers(event, STATIC_REQUEST_HEADERS)
+        static_file, encoding = self.static_files.find(path, request_headers.get("accept-encoding"))
+
+        base64_encoded = encoding is not None or static_file.content_type in self.binary_content_types
+
+        # Leave files too large to send to the app, unless only part of them
+        # is wanted.
+        size = static_file.size * 4 // 3 if base64_encoded else static_file.size
+        range_header = request_headers.get("range")
+        if self.max_body_size is not None and size > self.max_body_size and not range_header:
+            return None
+
+        environ = {
+            "apigwsgi.event": event,
+            "REQUEST_METHOD": method,
+            "HTTP_IF_NONE_MATCH": request_headers.get("if-none-match"),
+            "HTTP_IF_MODIFIED_SINCE": request_headers.get("if-modified-since")
+        }
+
+        # Check the request's conditions before reading the file.
+        headers = self.static_files.get_headers(static_file, original, encoding)
+        response = self.get_conditional_response(
+            environ, Response(200, "200 OK", headers, "", base64_encoded)
+        )
+        if response.status_code != 200 or method != "GET":
+            return environ, response
+
+        if range_header:
+            environ["HTTP_RANGE"] = range_header
+            environ["HTTP_IF_RANGE"] = request_headers.get("if-range")
+            try:
+                partial = self.get_range_response(
+                    environ, response, static_file.size,
+                    lambda start, stop: self.static_files.read(static_file, start, stop)
+                )
+            except ResponseTooLarge:
+                return None
+            if partial is not None:
+                return environ, partial
+            if self.max_body_size is not None and size > self.max_body_size:
+                return None
+
+        response.body = self.static_files.read(static_file)
+        return environ, response
+
+    def run_wsgi_app(self, environ, timings=None):
+        """
+        Run the WSGI app against `environ`, returning a `Response`. Raises
+        `ResponseTooLarge` if the body exceeds `max_body_size`. Marks the end
+        of the app and body phases in `timings`, if given.
+        """
+
+        body = ResponseBody(max_size=self.max_body_size)
+
+        # "The start_response callable must return a write(body_data) callable
+        #  that takes one positional parameter: a bytestring to be written as
+        #  part of the HTTP response body. (Note: the write() callable is
+        #  provided only to support certain existing frameworks' imperative
+        #  output APIs; it should not be used by new applications or frameworks
+        #  if it can be avoided."
+        validation = self.validation
+
+        def write(bytestring):
+            if validation == "strict":
+                validate_bytestring(bytestring)
+
+            if not start_response.body_started:
+                self.start_body(environ, start_response, body)
+
+            body.write(bytestring)
+
+        start_response = WSGIStartResponse(write=write, validation=validation)
+
+        # "The application object must accept two positional arguments. [...]
+        #  A server or gateway must invoke the application object using
+        #  positional (not keyword) arguments."
+        # "When called by the server, the application object must return an
+        #  iterable yielding zero or more bytestrings."
+        app = self._wsgi_app
+        if app is None:
+            app = self.load_wsgi_app()
+        result = app(environ, start_response)
+        if timings is not None:
+            timings.mark("app")
+
+        try:
+            # A Range request for a file only needs to read the range.
+            if "HTTP_RANGE" in environ and start_response.headers_set:
+                filelike = get_filelike(result)
+                if filelike is not None:
+                    partial = self.get_file_range_response(environ, start_response, filelike)
+                    if partial is not None:
+                        if timings is not None:
+                            timings.mark("body")
+                        return partial
+
+            # Files from `wsgi.file_wrapper` are read in one go, rather than
+            # block by block.
+            chunks = result
+            if type(result) is FileWrapper and start_response.headers_set:
+                self.start_body(environ, start_response, body)
+
+                # Unless it's compressed, a file too large to send is turned
+                # away before it's read. Otherwise, at most a byte more than
+                # `max_body_size` is read.
+                limit = None
+                if body.max_size is not None and body.compressor is None:
+                    remaining = result.get_remaining_size()
+                    if remaining is not None and remaining > body.max_size:
+                        raise ResponseTooLarge("Response body exceeds {} bytes".format(body.max_size))
+                    limit = body.max_size + 1
+
+                body.write_all(result.read(limit))
+                chunks = ()
+            elif validation == "strict":
+                chunks = validate_chunks(result)
+
+            # Plain bodies are appended here rather than through
+            # `body.write`, saving a function call per bytestring.
+            buffer = body.buffer
+            max_size = sys.maxsize if body.max_size is None else body.max_size
+            inline = False
+
+            for bytestring in chunks:
+                if inline:
+                    buffer += bytestring
+                    if len(buffer) > max_size:
+                        raise ResponseTooLarge("Response body exceeds {} bytes".format(max_size))
+                    continue
+
+                if not start_response.body_started:
+                    # "Note: the application must invoke the start_response()
+                    #  callable before the iterable yields its first body
+                    #  bytestring, so that the server can send the headers before
+                    #  any body content. However, this invocation may be performed
+                    #  by the iterable's first iteration, so servers must not
+                    #  assume that start_response() has been called before they
+                    #  begin iterating over the iterable."
+                    if not start_response.headers_set:
+                        raise Exception("Headers must be sent before body")
+
+                    self.start_body(environ, start_response, body)
+
+                body.write(bytestring)
+
+                if body.compressor is None and body.hasher is None:
+                    max_size = sys.maxsize if body.max_size is None else body.max_size
+                    inline = True
+        finally:
+            # "If the iterable returned by the application has a close() method,
+            #  the server or gateway must call that method upon completion of
+            #  the current request, whether the request was completed normally,
+            #  or terminated early due to an application error during iteration
+            #  or an early disconnect of the browser."
+            if hasattr(result, "close"):
+                result.close()
+
+        if not start_response.headers_set:
+            raise Exception("Application didn't send headers")
+
+        response_headers = start_response.response_headers
+        if not start_response.body_started:
+            body.base64_encoded = self.is_binary_response(response_headers)
+
+        compressor = body.compressor
+        hasher = body.hasher
+        response_body = body.getvalue()
+
+        encoding = None
+        if compressor is not None:
+            if compressor.compressed:
+                encoding = compressor.encoding
+                remove_header(response_headers, "content-length")
+                response_headers.append(("Content-Encoding", encoding))
+            else:
+                # The body was too small to be worth compressing.
+                body.base64_encoded = self.is_binary_response(response_headers)
+
+        if self.etags and self.wants_etag(environ, start_response.status_code, response_headers):
+            # Compressed bodies are hashed as they're written, before
+            # compression. Otherwise it's quicker to hash the whole body in
+            # one go.
+            digest = (hasher or hashlib.md5(response_body)).hexdigest()
+
+            # Frameworks such as Werkzeug leave the body out of responses to
+            # HEAD requests, so hashing it wouldn't give the GET response's
+            # ETag.
+            if digest != EMPTY_DIGEST or environ["REQUEST_METHOD"] != "HEAD":
+                response_headers.append(("ETag", make_etag(digest, encoding)))
+
+        if timings is not None:
+            timings.mark("body")
+
+        if "HTTP_RANGE" in environ:
+            partial = self.get_range_response(
+                environ, Response(start_response.status_code, start_response.status, response_headers, None, body.base64_encoded),
+                len(response_body), lambda start, stop: str(response_body[start:stop])
+            )
+            if partial is not None:
+                return partial
+
+            # The body wasn't limited in case only a range was needed - see
+            # `start_body`.
+            max_size = self.get_max_size(body.base64_encoded)
+            if max_size is not None and len(response_body) > max_size:
+                raise ResponseTooLarge("Response body exceeds {} bytes".format(max_size))
+
+        # Binary bodies are base64 encoded straight from the buffer, saving a
+        # copy of the body. Text bodies go into the JSON response as they are,
+        # so must be strings.
+        if not body.base64_encoded:
+            response_body = str(response_body)
+
+        return Response(
+            start_response.status_code, start_response.status, response_headers,
+            response_body, body.base64_encoded
+        )
+
+    def get_file_range_response(self, environ, start_response, filelike):
+        """
+        Returns a `Response` with just the range of `filelike` a Range
+        request asks for, or None if it should get the whole file.
+        """
+
+        response_headers = start_response.response_headers
+
+        content_length = get_header(response_headers, "content-length")
+        if content_length is not None and content_length.isdigit():
+            size = int(content_length)
+        else:
+            size = get_file_size(filelike)
+            if size is None:
+                return None
+
+        def read(start, stop):
+            return read_file(filelike, start, stop)
+
+        return self.get_range_response(
+            environ,
+            Response(
+                start_response.status_code, start_response.status, response_headers,
+                None, self.is_binary_response(response_headers)
+            ),
+            size, read
+        )
+
+    def get_range_response(self, environ, response, size, read):
+        """
+        Returns a 206 Partial Content version of `response` if the request's
+        Range header applies to it, a 416 if the range is past the end of the
+        body, or None to send the whole body. `response.body` is ignored:
+        `size` is the body's length, and `read(start, stop)` returns a slice
+        of it.
+        """
+
+        if not self.wants_range(environ, response.status_code, response.headers):
+            return None
+
+        # "If-Range" asks for the range only if the representation hasn't
+        # changed, otherwise the whole thing.
+        if_range = environ.get("HTTP_IF_RANGE")
+        if if_range and not if_range_matches(
+            if_range, get_header(response.headers, "etag"), get_header(response.headers, "last-modified")
+        ):
+            return None
+
+        try:
+            byte_range = parse_range(environ["HTTP_RANGE"], size)
+        except RangeNotSatisfiable:
+            return Response(416, "416 Range Not Satisfiable", [("Content-Range", "bytes */{}".format(size))], "")
+
+        if byte_range is None:
+            return None
+
+        start, stop = byte_range
+        max_size = self.get_max_size(response.base64_encoded)
+        if max_size is not None and stop - start > max_size:
+            raise ResponseTooLarge("Range exceeds {} bytes".format(max_size))
+
+        headers = [
+            (name, value) for name, value in response.headers
+            if name.lower() != "content-length"
+        ]
+        headers.append(("Content-Length", str(stop - start)))
+        headers.append(("Content-Range", get_content_range(start, stop, size)))
+
+        return Response(206, "206 Partial Content", headers, read(start, stop), response.base64_encoded)
+
+    def wants_range(self, environ, status_code, response_headers):
+        """
+        Returns whether a Range request can get part of a response - a 200
+        to a GET, that advertises `Accept-Ranges: bytes`, or that doesn't say
+        either way if `ranges` is set.
+        """
+
+        if status_code != 200 or environ["REQUEST_METHOD"] != "GET":
+            return False
+
+        accept_ranges = get_header(response_headers, "accept-ranges")
+        if accept_ranges is None:
+            return self.ranges
+        return accept_ranges.strip().lower() == "bytes"
+
+    def get_max_size(self, base64_encoded):
+        """
+        Returns the largest body that fits under `max_body_size`, or None.
+        """
+
+        if self.max_body_size is None:
+            return None
+
+        # Base64 encoding grows bodies by a third.
+        return self.max_body_size * 3 // 4 if base64_encoded else self.max_body_size
+
+    def run_profiled_wsgi_app(self, environ, timings=None):
+        """
+        As `run_wsgi_app`, saving a profile of the request with `profiler`.
+        For debug requests, a summary of the profile is left in the environ's
+        `apigwsgi.profile_summary`, for `get_response` to send.
+        """
+
+        profiler = self.profiler
+        response, profile = profiler.run(self.run_wsgi_app, environ, timings)
+
+        request_id = getattr(environ["apigwsgi.context"], "aws_request_id", None)
+        try:
+            profiler.save(profile, request_id)
+        except (IOError, OSError) as exc:
+            environ["wsgi.errors"].write("apigwsgi: couldn't save profile: {}\n".format(exc))
+
+        if profiler.is_debug_request(environ):
+            environ["apigwsgi.profile_summary"] = profiler.summarize(profile)
+
+        return response
+
+    def send_response(self, environ, event_format, response):
+        """
+        Returns `response` as a Lambda response in `event_format`, handling
+        conditional and HEAD requests.
+        """
+
+        method = environ["REQUEST_METHOD"]
+        if method == "HEAD" or method == "GET":
+            if self.etags and response.status_code == 200:
+                response = self.get_conditional_response(environ, response)
+
+            # HEAD responses have headers, but no body.
+            if method == "HEAD" and response.body:
+                response = Response(response.status_code, response.status, response.headers, "")
+
+        # API Gateway responses are JSON, so binary bodies must be base64
+        # encoded.
+        if response.base64_encoded:
+            body = base64.b64encode(response.body)
+        else:
+            body = response.body
+
+        return event_format.get_response(
+            environ["apigwsgi.event"], response.status_code, response.status,
+            response.headers, body, response.base64_encoded
+        )
+
+    def wants_etag(self, environ, status_code, response_headers):
+        """
+        Returns whether an ETag should be generated for a response.
+        """
+
+        return (
+            status_code == 200 and
+            environ["REQUEST_METHOD"] in ("GET", "HEAD") and
+            get_header(response_headers, "etag") is None
+        )
+
+    def get_conditional_response(self, environ, response):
+        """
+        Returns a 304 Not Modified version of `response` if the request's
+        If-None-Match or If-Modified-Since allow it, otherwise `response`.
+        """
+
+        if_none_match = environ.get("HTTP_IF_NONE_MATCH")
+        if_modified_since = environ.get("HTTP_IF_MODIFIED_SINCE")
+        if not if_none_match and not if_modified_since:
+            return response
+
+        etag = get_header(response.headers, "etag")
+
+        # A client holding the uncompressed representation can revalidate it
+        # against the compressed one - the content is the same.
+        etags = [etag]
+        encoding = get_header(response.headers, "content-encoding")
+        if etag and encoding and etag.endswith('-{}"'.format(encoding)):
+            etags.append(etag[:-len(encoding) - 2] + '"')
+
+        last_modified = get_header(response.headers, "last-modified")
+        if not is_not_modified(if_none_match, if_modified_since, etags, last_modified):
+            return response
+
+        return Response(304, "304 Not Modified", get_not_modified_headers(response.headers), "")
+
+    def is_binary_response(self, response_headers):
+        """
+        Returns whether the response's Content-Type is in
+        `binary_content_types`.
+        """
+
+        content_type = get_header(response_headers, "content-type")
+        return content_type is not None and content_type in self.binary_content_types
+
+    def start_body(self, environ, start_response, body):
+        """
+        Called when the app writes its first body bytestring, once the
+        response headers are final.
+        """
+
+        start_response.body_started = True
+        response_headers = start_response.response_headers
+
+        body.base64_encoded = self.is_binary_response(response_headers)
+
+        # Ranges are taken from the uncompressed body.
+        ranged = "HTTP_RANGE" in environ and self.wants_range(
+            environ, start_response.status_code, response_headers
+        )
+
+        if self.compression and not ranged:
+            compressor = self.get_compressor(environ, response_headers)
+            if compressor is not None:
+                body.compressor = compressor
+
+                # ETags are based on the uncompressed body, so hash it on
+                # the way into the compressor.
+                if self.etags and self.wants_etag(environ, start_response.status_code, response_headers):
+                    body.hasher = hashlib.md5()
+
+                # Assume the body will be compressed, and so base64 encoded.
+                # If it turns out to be too small, `get_response` decides
+                # again.
+                body.base64_encoded = True
+
+        if ranged:
+            # Only the range needs to fit under `max_body_size`. It's checked
+            # once the body's complete - see `get_range_response`.
+            body.max_size = None
+        elif body.base64_encoded:
+            body.max_size = self.get_max_size(True)
+
+    def get_compressor(self, environ, response_headers):
+        """
+        Returns a `ResponseCompressor` for the response body, or None if it
+        shouldn't be compressed. Called once the app has started its response.
+        Adds `Vary: Accept-Encoding` to compressible responses.
+
+        HEAD requests are compressed like GETs, so they get the same
+        Content-Encoding, Vary and ETag. `send_response` drops the body.
+        """
+
+        content_type = None
+        content_length = None
+        for name, value in response_headers:
+            name = name.lower()
+            if name == "content-type":
+                content_type = value
+            elif name == "content-length":
+                content_length = value
+            elif name == "content-encoding":
+                return None
+            elif name == "cache-control" and "no-transform" in value.lower():
+                return None
+
+        if content_type is not None and content_type in self.uncompressible_content_types:
+            return None
+
+        # The response varies by Accept-Encoding, even for clients that don't
+        # get a compressed body.
+        add_vary(response_headers, "Accept-Encoding")
+
+        if content_length is not None and content_length.isdigit() and int(content_length) < self.compression_min_size:
+            return None
+
+        accept_encoding = environ.get("HTTP_ACCEPT_ENCODING")
+        if not accept_encoding:
+            return None
+
+        encoding = self.negotiated_encodings[accept_encoding]
+        if encoding is None:
+            return None
+
+        return ResponseCompressor(encoding, self.compression_level, self.compression_min_size)
+
+    def choose_encoding(self, accept_encoding):
+        """
+        Returns the best of `compression_encodings` for an Accept-Encoding
+        header, or None.
+        """
+
+        return negotiate_encoding(accept_encoding, self.compression_encodings)
+
 class WSGIStartResponse(object):
-    def __init__(self, write):
+    """
+    `start_response` for one request. `validation` is "strict", "fast" or
+    "off" - see `apigwsgi.validation`.
+    """
+
+    def __init__(self, write, validation="fast"):
         self.write = write
+        self.validation = validation
 
         self.headers_set = False
         self.body_started = False
@@ -236,6 +1214,10 @@ class WSGIStartResponse(object):
         # "if exc_info is provided, and the HTTP headers have already been sent,
         #  start_response must raise an error, and should raise the exc_info
         #  tuple."
+        validation = self.validation
+        if validation == "strict":
+            validate_exc_info(exc_info)
+
         if exc_info and self.body_started:
             raise exc_info[0], exc_info[1], exc_info[2]
 
@@ -246,11 +1228,13 @@ class WSGIStartResponse(object):
         #  [...] The string must not contain control characters, and must not
         #  be terminated with a carriage return, linefeed, or combination
         #  thereof."
-        match = re.search(r"^(\d+) .+$", status)
-        if not match:
-            raise Exception("Application sent malformed status line {!r}".format(status))
+        if validation == "fast":
+            self.status_code = parse_status_cached(status)
+        elif validation == "strict":
+            self.status_code = parse_status_strict(status)
         else:
-            self.status_code = int(match.group(1))
+            self.status_code = int(status[:3])
+        self.status = status
 
         # "The response_headers argument is a list of (header_name, header_value)
         #  tuples. It must be a Python list; i.e. type(response_headers) is
@@ -263,6 +1247,8 @@ class WSGIStartResponse(object):
         #  requirements are to minimize the complexity of any parsing that must
         #  be performed by servers, gateways, and intermediate response
         #  processors that need to inspect or modify response headers.)"
+        if validation == "strict":
+            validate_headers(response_headers)
         self.response_headers = response_headers
 
         # "The exc_info argument, if supplied, must be a Python sys.exc_info()
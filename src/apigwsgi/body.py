@@ -0,0 +1,90 @@
+"""
+Response body accumulation.
+"""
+
+class ResponseTooLarge(Exception):
+    """
+    Raised when a response body grows past its maximum size.
+    """
+
+class Response(object):
+    """
+    A complete response. `body` is a string, or for bodies that must be
+    base64 encoded to send (`base64_encoded`), possibly a `bytearray`.
+    """
+
+    __slots__ = ("status_code", "status", "headers", "body", "base64_encoded")
+
+    def __init__(self, status_code, status, headers, body, base64_encoded=False):
+        self.status_code = status_code
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.base64_encoded = base64_encoded
+
+class ResponseBody(object):
+    """
+    Accumulates a WSGI response body in a single growable buffer, optionally
+    passing it through a compressor (see
+    `apigwsgi.compression.ResponseCompressor`).
+
+    If `max_size` is set, writes that take the body past `max_size` bytes
+    raise `ResponseTooLarge`. If `hasher` is set (e.g. to `hashlib.md5()`),
+    it's updated with each write before compression.
+    """
+
+    def __init__(self, max_size=None):
+        # `bytearray` grows in place, and `buffer += data` is about as cheap
+        # as `list.append`. Unlike a list of chunks, the chunks can be freed
+        # as they're appended, and binary bodies are base64 encoded from the
+        # buffer without joining them. Text bodies are still copied into a
+        # string for the JSON response.
+        self.buffer = bytearray()
+        self.max_size = max_size
+        self.compressor = None
+        self.hasher = None
+
+        # Whether the body will be sent base64 encoded. Set by the handler
+        # once the response headers are known.
+        self.base64_encoded = False
+
+    @property
+    def size(self):
+        return len(self.buffer)
+
+    def write(self, data):
+        if self.hasher is not None:
+            self.hasher.update(data)
+
+        if self.compressor is not None:
+            data = self.compressor.compress(data)
+
+        self.buffer += data
+        if self.max_size is not None and len(self.buffer) > self.max_size:
+            raise ResponseTooLarge("Response body exceeds {} bytes".format(self.max_size))
+
+    def write_all(self, data):
+        """
+        Writes `data` as the whole body. Unless it needs compressing or
+        hashing, it's kept as it is rather than copied into the buffer.
+        """
+
+        if self.compressor is not None or self.hasher is not None or self.buffer:
+            self.write(data)
+            return
+
+        self.buffer = data
+        if self.max_size is not None and len(data) > self.max_size:
+            raise ResponseTooLarge("Response body exceeds {} bytes".format(self.max_size))
+
+    def getvalue(self):
+        """
+        Returns the body as a `bytearray` (or a string, after `write_all`),
+        flushing the compressor if there is one.
+        """
+
+        if self.compressor is not None:
+            self.buffer += self.compressor.flush()
+            self.compressor = None
+
+        return self.buffer
@@ -0,0 +1,201 @@
+"""
+In-process response cache, kept across warm invocations.
+"""
+
+import collections
+import re
+import threading
+import time
+
+# Statuses that may be cached (RFC 7231 section 6.1).
+CACHEABLE_STATUSES = frozenset([200, 203, 204, 300, 301, 404, 405, 410, 414, 501])
+
+CACHE_CONTROL_RE = re.compile(r'([a-zA-Z-]+)\s*(?:=\s*"?([^",]*)"?)?')
+
+def parse_cache_control(value):
+    """
+    Parses a Cache-Control header into a dict of lowercase directive =>
+    argument (None if it has no argument).
+    """
+
+    return {
+        name.lower(): argument or None
+        for name, argument in CACHE_CONTROL_RE.findall(value)
+    }
+
+class CacheEntry(object):
+    __slots__ = ("response", "expires", "size")
+
+    def __init__(self, response, expires, size):
+        self.response = response
+        self.expires = expires
+        self.size = size
+
+class ResponseCache(object):
+    """
+    LRU cache of `apigwsgi.body.Response`s, bounded by entry count and total
+    body size.
+
+    Responses are stored under a resource key - the path and query string
+    of a GET request - plus the request headers named in the response's
+    Vary. Only responses with an explicit freshness lifetime
+    (`Cache-Control: max-age` or `s-maxage`) are stored.
+
+    `hits`, `misses` and `evictions` count what the cache has done.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # (resource key, Vary values) => CacheEntry, least recently used
+        # first.
+        self.entries = collections.OrderedDict()
+        self.size = 0
+
+        # Resource key => lowercase header names the resource varies by.
+        self.vary = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.lock = threading.Lock()
+
+    def get(self, resource_key, request_headers):
+        """
+        Returns the cached response for `resource_key`, or None.
+        `request_headers` maps lowercase names to values, and must contain
+        at least the headers in `get_vary(resource_key)`.
+        """
+
+        with self.lock:
+            vary = self.vary.get(resource_key)
+            if vary is None:
+                self.misses += 1
+                return None
+
+            key = (resource_key, tuple(request_headers.get(name) for name in vary))
+            entry = self.entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry.expires <= time.time():
+                self.size -= entry.size
+                self.misses += 1
+                return None
+
+            # Reinsert as most recently used.
+            self.entries[key] = entry
+            self.hits += 1
+            return entry.response
+
+    def get_vary(self, resource_key):
+        """
+        Returns the lowercase request header names the cached responses for
+        `resource_key` vary by, or an empty tuple.
+        """
+
+        return self.vary.get(resource_key, ())
+
+    def get_lifetime(self, response, request_headers):
+        """
+        Returns how many seconds `response` may be cached for, or None if it
+        mustn't be.
+        """
+
+        if response.status_code not in CACHEABLE_STATUSES:
+            return None
+
+        cache_control = None
+        for name, value in response.headers:
+            name = name.lower()
+            if name == "cache-control":
+                cache_control = value
+            elif name == "set-cookie":
+                # Never share one client's cookies with another.
+                return None
+            elif name == "vary" and value.strip() == "*":
+                return None
+
+        if cache_control is None:
+            return None
+
+        directives = parse_cache_control(cache_control)
+        if "no-store" in directives or "private" in directives or "no-cache" in directives:
+            return None
+
+        # RFC 7234 section 3.2: shared caches only store responses to
+        # authorized requests if explicitly allowed.
+        if request_headers.get("authorization") and not (
+            "public" in directives or "s-maxage" in directives or "must-revalidate" in directives
+        ):
+            return None
+
+        max_age = directives.get("s-maxage") or directives.get("max-age")
+        if max_age is None or not max_age.isdigit() or int(max_age) <= 0:
+            return None
+
+        return int(max_age)
+
+    def put(self, resource_key, request_headers, response):
+        """
+        Stores `response` for `resource_key` if it's cacheable.
+        `request_headers` maps lowercase names to values, and must contain
+        the Authorization header and any named in the response's Vary.
+        """
+
+        lifetime = self.get_lifetime(response, request_headers)
+        if lifetime is None:
+            return
+
+        vary = tuple(sorted(get_vary_names(response.headers)))
+        size = len(response.body)
+        if size > self.max_bytes:
+            return
+
+        key = (resource_key, tuple(request_headers.get(name) for name in vary))
+        entry = CacheEntry(response, time.time() + lifetime, size)
+
+        with self.lock:
+            # If the app changed its Vary, entries stored under the old one
+            # can't be found again. They'll age out of the LRU.
+            self.vary[resource_key] = vary
+
+            old_entry = self.entries.pop(key, None)
+            if old_entry is not None:
+                self.size -= old_entry.size
+
+            self.entries[key] = entry
+            self.size += size
+
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, old_entry = self.entries.popitem(last=False)
+                self.size -= old_entry.size
+                self.evictions += 1
+
+            # Forget the Vary of resources with nothing left in the cache,
+            # now and then.
+            if len(self.vary) > 2 * len(self.entries) + 16:
+                live = set(live_key for live_key, _ in self.entries)
+                for vary_key in self.vary.keys():
+                    if vary_key not in live:
+                        del self.vary[vary_key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.vary.clear()
+            self.size = 0
+
+def get_vary_names(response_headers):
+    """
+    Returns the lowercase header names in a response's Vary headers.
+    """
+
+    names = set()
+    for name, value in response_headers:
+        if name.lower() == "vary":
+            names.update(item.strip().lower() for item in value.split(",") if item.strip())
+    return names
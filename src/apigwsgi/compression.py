@@ -0,0 +1,142 @@
+"""
+Response compression, negotiated from the request's Accept-Encoding header.
+"""
+
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Content types that are already compressed, so gain nothing from another
+# pass. A trailing "/*" matches any subtype.
+DEFAULT_UNCOMPRESSIBLE_CONTENT_TYPES = (
+    "image/gif",
+    "image/jpeg",
+    "image/png",
+    "image/webp",
+    "audio/*",
+    "video/*",
+    "font/woff",
+    "font/woff2",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zip",
+    "application/octet-stream",
+    "application/pdf"
+)
+
+class BrotliCompressor(object):
+    """
+    Wraps `brotli.Compressor` in the `zlib.compressobj` interface.
+    """
+
+    def __init__(self, level):
+        self.compressor = brotli.Compressor(quality=min(level, 11))
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.finish()
+
+# Content-Encoding => compressor factory, taking a compression level.
+COMPRESSORS = {
+    "gzip": lambda level: zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS),
+    "deflate": lambda level: zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS)
+}
+if brotli is not None:
+    COMPRESSORS["br"] = BrotliCompressor
+
+# Encodings we offer, most preferred first.
+DEFAULT_ENCODINGS = tuple(
+    encoding for encoding in ("br", "gzip", "deflate")
+    if encoding in COMPRESSORS
+)
+
+def parse_accept_encoding(accept_encoding):
+    """
+    Parses an Accept-Encoding header into a dict of coding => quality.
+    """
+
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        qualities[coding] = quality
+
+    return qualities
+
+def negotiate_encoding(accept_encoding, encodings):
+    """
+    Returns the best of `encodings` (in preference order) acceptable to the
+    client, or None if the response should be sent uncompressed.
+    """
+
+    qualities = parse_accept_encoding(accept_encoding)
+    default = qualities.get("*", 0.0)
+
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, default)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+
+    return best
+
+class ResponseCompressor(object):
+    """
+    Compresses a response body as it's written.
+
+    Nothing is compressed until `min_size` bytes have been written, so small
+    bodies can still be sent as-is. If `flush` is called before then, it
+    returns the body uncompressed, and `compressed` stays False.
+    """
+
+    def __init__(self, encoding, level, min_size):
+        self.encoding = encoding
+        self.level = level
+        self.min_size = min_size
+
+        self.compressor = None
+        self.compressed = False
+
+        self.pending = []
+        self.pending_size = 0
+
+    def compress(self, data):
+        if self.compressor is not None:
+            return self.compressor.compress(data)
+
+        self.pending.append(data)
+        self.pending_size += len(data)
+        if self.pending_size < self.min_size:
+            return ""
+
+        self.compressor = COMPRESSORS[self.encoding](self.level)
+        self.compressed = True
+
+        pending = "".join(self.pending)
+        self.pending = None
+        return self.compressor.compress(pending)
+
+    def flush(self):
+        if self.compressor is not None:
+            return self.compressor.flush()
+
+        pending = "".join(self.pending)
+        self.pending = None
+        return pending
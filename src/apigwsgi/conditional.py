@@ -0,0 +1,89 @@
+"""
+Conditional requests (RFC 7232): ETags, If-None-Match and
+If-Modified-Since.
+"""
+
+import email.utils
+
+# Headers kept in a 304 Not Modified response. RFC 7232 section 4.1 lists
+# all but Last-Modified and Set-Cookie, which are allowed.
+NOT_MODIFIED_HEADERS = frozenset([
+    "cache-control",
+    "content-location",
+    "date",
+    "etag",
+    "expires",
+    "last-modified",
+    "set-cookie",
+    "vary"
+])
+
+def make_etag(digest, encoding=None):
+    """
+    Returns a strong ETag for a body with hex `digest`. Compressed bodies get
+    their own ETag, as they're a different representation.
+    """
+
+    if encoding:
+        return '"{}-{}"'.format(digest, encoding)
+    else:
+        return '"{}"'.format(digest)
+
+def etag_matches(if_none_match, etags):
+    """
+    Returns whether an If-None-Match header matches any of `etags`, using
+    weak comparison.
+    """
+
+    if if_none_match.strip() == "*":
+        return True
+
+    etags = set(strip_weak(etag) for etag in etags if etag)
+    return any(
+        strip_weak(item.strip()) in etags
+        for item in if_none_match.split(",")
+    )
+
+def strip_weak(etag):
+    return etag[2:] if etag.startswith("W/") else etag
+
+def is_not_modified(if_none_match, if_modified_since, etags, last_modified):
+    """
+    Returns whether a GET/HEAD request's conditions mean it should get a 304
+    Not Modified response. `etags` are the ETags the current representation
+    can be matched by.
+    """
+
+    # "A recipient MUST ignore If-Modified-Since if the request contains an
+    #  If-None-Match header field"
+    if if_none_match:
+        return etag_matches(if_none_match, etags)
+
+    if if_modified_since and last_modified:
+        if_modified_since = parse_http_date(if_modified_since)
+        last_modified = parse_http_date(last_modified)
+        if if_modified_since is not None and last_modified is not None:
+            return last_modified <= if_modified_since
+
+    return False
+
+def parse_http_date(value):
+    """
+    Returns an HTTP date as a Unix timestamp, or None if it's invalid.
+    """
+
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        return None
+
+    return email.utils.mktime_tz(parsed)
+
+def get_not_modified_headers(response_headers):
+    """
+    Returns the subset of `response_headers` to send with a 304.
+    """
+
+    return [
+        (name, value) for name, value in response_headers
+        if name.lower() in NOT_MODIFIED_HEADERS
+    ]
@@ -0,0 +1,364 @@
+"""
+Local development tools, run through the same handler code as Lambda:
+
+* `serve`: an HTTP server that turns requests into API Gateway events.
+* `replay`: drives recorded events through a handler, reporting throughput
+  and latency.
+
+From the command line:
+
+    apigwsgi-dev serve myapp:app --port 8000
+    apigwsgi-dev replay myapp:app events.jsonl --concurrency 8 --repeat 10
+
+The app can be a WSGI app or an `apigwsgi.Handler`.
+"""
+
+import argparse
+import base64
+import BaseHTTPServer
+import collections
+import json
+import math
+import multiprocessing
+import sys
+import time
+import urlparse
+import uuid
+
+import apigwsgi
+from apigwsgi.importing import import_string
+
+class DummyContext(object):
+    """
+    Stands in for the Lambda context object.
+    """
+
+    function_name = "apigwsgi-dev"
+    memory_limit_in_mb = 128
+
+    def __init__(self):
+        self.aws_request_id = str(uuid.uuid4())
+
+    def get_remaining_time_in_millis(self):
+        return 30000
+
+def get_handler(app):
+    """
+    Returns an `apigwsgi.Handler` for `app` - a Handler, a WSGI app, or an
+    import string for either.
+    """
+
+    if isinstance(app, basestring):
+        app = import_string(app)
+    if isinstance(app, apigwsgi.Handler):
+        return app
+    return apigwsgi.Handler(app)
+
+def make_rest_event(method, path, query_string, headers, body):
+    """
+    Returns a REST API event. `headers` is a list of `(name, value)` tuples.
+    Bodies that aren't UTF-8 are base64 encoded.
+    """
+
+    multi_value_headers = collections.OrderedDict()
+    for name, value in headers:
+        multi_value_headers.setdefault(name, []).append(value)
+
+    multi_value_query = collections.OrderedDict()
+    for key, value in urlparse.parse_qsl(query_string, keep_blank_values=True):
+        multi_value_query.setdefault(key, []).append(value)
+
+    body, base64_encoded = encode_body(body)
+
+    return {
+        "resource": "/{proxy+}",
+        "path": path,
+        "httpMethod": method,
+        "headers": {name: values[-1] for name, values in multi_value_headers.iteritems()},
+        "multiValueHeaders": multi_value_headers,
+        "queryStringParameters": {key: values[-1] for key, values in multi_value_query.iteritems()} or None,
+        "multiValueQueryStringParameters": multi_value_query or None,
+        "requestContext": {
+            "httpMethod": method,
+            "path": path,
+            "requestId": str(uuid.uuid4()),
+            "stage": "dev"
+        },
+        "body": body,
+        "isBase64Encoded": base64_encoded
+    }
+
+def make_http_api_event(method, path, query_string, headers, body):
+    """
+    As `make_rest_event`, for HTTP APIs using payload format version 2.0.
+    """
+
+    event_headers = {}
+    cookies = []
+    for name, value in headers:
+        name = name.lower()
+        if name == "cookie":
+            cookies.extend(cookie.strip() for cookie in value.split(";"))
+        elif name in event_headers:
+            event_headers[name] += "," + value
+        else:
+            event_headers[name] = value
+
+    body, base64_encoded = encode_body(body)
+
+    event = {
+        "version": "2.0",
+        "routeKey": "$default",
+        "rawPath": path,
+        "rawQueryString": query_string,
+        "headers": event_headers,
+        "requestContext": {
+            "http": {
+                "method": method,
+                "path": path
+            },
+            "requestId": str(uuid.uuid4()),
+            "stage": "$default"
+        },
+        "body": body,
+        "isBase64Encoded": base64_encoded
+    }
+    if cookies:
+        event["cookies"] = cookies
+
+    return event
+
+EVENT_MAKERS = {
+    "rest": make_rest_event,
+    "http": make_http_api_event
+}
+
+def encode_body(body):
+    """
+    Returns `(body, base64_encoded)` as API Gateway would send it.
+    """
+
+    if not body:
+        return None, False
+
+    try:
+        body.decode("utf-8")
+    except UnicodeDecodeError:
+        return base64.b64encode(body), True
+
+    return body, False
+
+def get_response_headers(response):
+    """
+    Returns a Lambda response's headers as a list of `(name, value)` tuples.
+    """
+
+    if "multiValueHeaders" in response:
+        headers = [
+            (name, value)
+            for name, values in response["multiValueHeaders"].iteritems()
+            for value in values
+        ]
+    else:
+        headers = list((response.get("headers") or {}).iteritems())
+
+    headers.extend(("Set-Cookie", cookie) for cookie in response.get("cookies", ()))
+
+    return headers
+
+class RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Turns HTTP requests into events for `server.handler`, and its responses
+    back into HTTP.
+    """
+
+    def do_request(self):
+        path, _, query_string = self.path.partition("?")
+        length = int(self.headers.getheader("content-length") or 0)
+        body = self.rfile.read(length) if length else ""
+
+        headers = []
+        for line in self.headers.headers:
+            name, _, value = line.partition(":")
+            name = name.strip()
+            if name.lower() not in ("x-forwarded-proto", "x-forwarded-port"):
+                headers.append((name, value.strip()))
+
+        # API Gateway sends these, and the handler assumes https on port 443
+        # without them.
+        headers.append(("X-Forwarded-Proto", "http"))
+        headers.append(("X-Forwarded-Port", str(self.server.server_address[1])))
+
+        # Events and responses pass through JSON, as they do in Lambda.
+        event = self.server.make_event(self.command, path, query_string, headers, body)
+        response = self.server.handler(json.loads(json.dumps(event)), DummyContext())
+        response = json.loads(json.dumps(response))
+
+        body = response.get("body") or u""
+        if response.get("isBase64Encoded"):
+            body = base64.b64decode(body)
+        else:
+            body = body.encode("utf-8")
+
+        self.send_response(response["statusCode"], response.get("statusDescription", "").partition(" ")[2] or None)
+        for name, value in get_response_headers(response):
+            if name.lower() != "content-length":
+                self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    do_DELETE = do_GET = do_HEAD = do_OPTIONS = do_PATCH = do_POST = do_PUT = do_request
+
+class DevServer(BaseHTTPServer.HTTPServer):
+    """
+    HTTP server for a handler. Like a Lambda container, it handles one
+    request at a time.
+    """
+
+    def __init__(self, address, handler, event_format="rest"):
+        BaseHTTPServer.HTTPServer.__init__(self, address, RequestHandler)
+        self.handler = handler
+        self.make_event = EVENT_MAKERS[event_format]
+
+def serve(app, host="127.0.0.1", port=8000, event_format="rest"):
+    """
+    Serves `app` over HTTP until interrupted, sending requests through an
+    `apigwsgi.Handler` as `event_format` ("rest" or "http") events.
+    """
+
+    server = DevServer((host, port), get_handler(app), event_format)
+    sys.stderr.write("apigwsgi: serving on http://{}:{}/\n".format(*server.server_address))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def read_events(filename):
+    """
+    Returns the events in a JSON Lines file - one event per line.
+    """
+
+    with open(filename) as fileobj:
+        return [json.loads(line) for line in fileobj if line.strip()]
+
+# The handler each replay worker process calls - see `replay`.
+worker_handler = None
+
+def set_worker_handler(handler):
+    global worker_handler
+    worker_handler = handler
+
+def call_handler(event, handler=None):
+    """
+    Returns `(latency, status)` for a call to `handler` (by default,
+    `worker_handler`) with `event`.
+    """
+
+    if handler is None:
+        handler = worker_handler
+
+    started = time.time()
+    try:
+        status_code = handler(event, DummyContext()).get("statusCode")
+    except Exception:
+        status_code = "error"
+    return time.time() - started, status_code
+
+def replay(app, events, concurrency=1, repeat=1):
+    """
+    Runs `events` through `app`'s handler `repeat` times, `concurrency` at a
+    time. Returns a `ReplayResults`.
+
+    Like Lambda containers, each handler takes one event at a time: with
+    `concurrency` over 1, events are shared between that many processes,
+    each with its own copy of the handler, forked once it's created.
+    """
+
+    handler = get_handler(app)
+    events = list(events) * repeat
+
+    started = time.time()
+    if concurrency > 1:
+        pool = multiprocessing.Pool(concurrency, set_worker_handler, (handler,))
+        try:
+            results = pool.map(call_handler, events, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [call_handler(event, handler) for event in events]
+    elapsed = time.time() - started
+
+    return ReplayResults([latency for latency, _ in results], [status for _, status in results], elapsed)
+
+class ReplayResults(object):
+    """
+    Latencies (in seconds) and statuses of replayed events, and the total
+    time taken.
+    """
+
+    def __init__(self, latencies, statuses, elapsed):
+        self.latencies = sorted(latencies)
+        self.statuses = collections.Counter(statuses)
+        self.elapsed = elapsed
+
+    def percentile(self, percent):
+        """
+        Returns the `percent`th percentile latency, by nearest rank.
+        """
+
+        if not self.latencies:
+            return 0.0
+
+        rank = int(math.ceil(percent / 100.0 * len(self.latencies)))
+        return self.latencies[min(max(rank, 1), len(self.latencies)) - 1]
+
+    def report(self, stream):
+        count = len(self.latencies)
+        stream.write("{} requests in {:.2f}s ({:.1f} requests/s)\n".format(
+            count, self.elapsed, count / self.elapsed if self.elapsed else 0.0
+        ))
+        stream.write("latency (ms): {}\n".format("  ".join(
+            "{}={:.2f}".format(name, self.percentile(percent) * 1000)
+            for name, percent in [("p50", 50), ("p90", 90), ("p99", 99), ("max", 100)]
+        )))
+        stream.write("statuses: {}\n".format("  ".join(
+            "{}={}".format(status, total) for status, total in sorted(self.statuses.items())
+        )))
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog="apigwsgi-dev", description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command")
+
+    serve_parser = subparsers.add_parser("serve", help="serve an app over HTTP")
+    serve_parser.add_argument("app", help="import string, e.g. myapp:app")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--format", choices=sorted(EVENT_MAKERS), default="rest",
+                              help="event format to send (default: rest)")
+
+    replay_parser = subparsers.add_parser("replay", help="replay recorded events")
+    replay_parser.add_argument("app", help="import string, e.g. myapp:app")
+    replay_parser.add_argument("events", help="JSON Lines file of events")
+    replay_parser.add_argument("--concurrency", type=int, default=1)
+    replay_parser.add_argument("--repeat", type=int, default=1, help="times to replay the file")
+
+    args = parser.parse_args(args)
+
+    # Make apps in the current directory importable, as `python -m` would.
+    if "" not in sys.path:
+        sys.path.insert(0, "")
+
+    if args.command == "serve":
+        serve(args.app, args.host, args.port, args.format)
+    else:
+        results = replay(args.app, read_events(args.events), args.concurrency, args.repeat)
+        results.report(sys.stdout)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Serving several WSGI apps from one handler.
+"""
+
+import threading
+
+from apigwsgi.importing import import_string
+
+class Dispatcher(object):
+    """
+    WSGI app that passes each request to the app mounted at the longest
+    matching path prefix:
+
+        Dispatcher({
+            "/": "frontend:app",
+            "/api": "api.wsgi:application",
+            "/api/admin": admin_app
+        })
+
+    Prefixes match whole path segments, so "/api" matches "/api" and
+    "/api/users" but not "/apis". The prefix is moved from PATH_INFO to
+    SCRIPT_NAME, as the mounted app expects.
+
+    Apps may be given as "package.module:attribute" strings, which are
+    imported the first time a request needs them. Requests that match no
+    prefix get `default` if set, otherwise a 404.
+    """
+
+    def __init__(self, mounts, default=None):
+        if hasattr(mounts, "items"):
+            mounts = mounts.items()
+
+        # Path segment => child node, with the node's app, if any, under
+        # None. Built once, so a request's path is matched in one pass over
+        # its segments.
+        self.trie = {}
+        self.apps = []
+        for prefix, app in mounts:
+            node = self.trie
+            for segment in split_path(prefix):
+                node = node.setdefault(segment, {})
+            if None in node:
+                raise Exception("Duplicate mount for {!r}".format(prefix))
+            node[None] = len(self.apps)
+            self.apps.append(app)
+
+        self.default = default
+        self.load_lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        path_info = environ.get("PATH_INFO", "")
+        segments = path_info.split("/")
+
+        # Walk the trie as far as the path goes, remembering the deepest
+        # node with an app. segments[0] is the empty string before the
+        # leading slash.
+        node = self.trie
+        match = node.get(None)
+        depth = 0
+        for index in xrange(1, len(segments)):
+            node = node.get(segments[index])
+            if node is None:
+                break
+            if None in node:
+                match = node[None]
+                depth = index
+
+        if match is None:
+            if self.default is None:
+                return self.not_found(environ, start_response)
+            return self.default(environ, start_response)
+
+        if depth:
+            environ["SCRIPT_NAME"] = environ.get("SCRIPT_NAME", "") + "/".join(segments[:depth + 1])
+            environ["PATH_INFO"] = "/" + "/".join(segments[depth + 1:]) if depth + 1 < len(segments) else ""
+
+        return self.get_app(match)(environ, start_response)
+
+    def get_app(self, index):
+        """
+        Returns the app mounted in slot `index`, importing it if needed.
+        """
+
+        app = self.apps[index]
+        if isinstance(app, basestring):
+            with self.load_lock:
+                app = self.apps[index]
+                if isinstance(app, basestring):
+                    app = self.apps[index] = import_string(app)
+        return app
+
+    def not_found(self, environ, start_response):
+        start_response("404 Not Found", [("Content-Type", "text/plain")])
+        return ["Not Found"]
+
+def split_path(path):
+    """
+    Returns the segments of a mount prefix, ignoring leading and trailing
+    slashes. The root, "/", has none.
+    """
+
+    return [segment for segment in path.strip("/").split("/") if segment]
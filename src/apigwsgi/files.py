@@ -0,0 +1,79 @@
+"""
+File responses: the `wsgi.file_wrapper` the handler provides.
+"""
+
+import os
+
+class FileWrapper(object):
+    """
+    `wsgi.file_wrapper`. The handler recognises it, and reads the file in one
+    go with `read_file` rather than iterating over it. Iterating still works,
+    in blocks of `block_size` bytes, for middleware that wraps the response.
+    """
+
+    def __init__(self, filelike, block_size=8192):
+        self.filelike = filelike
+        self.block_size = block_size
+
+        # "If the object has a close() method, the returned iterable must
+        #  have a close() method that invokes the original object's close()
+        #  method."
+        if hasattr(filelike, "close"):
+            self.close = filelike.close
+
+    def __iter__(self):
+        while True:
+            block = self.filelike.read(self.block_size)
+            if not block:
+                return
+            yield block
+
+    def read(self, limit=None):
+        """
+        Returns the rest of the file, or at most `limit` bytes of it.
+        """
+
+        return read_file(self.filelike, limit=limit)
+
+    def get_remaining_size(self):
+        """
+        Returns the number of bytes left to read, or None if it can't be
+        found without reading them.
+        """
+
+        return get_remaining_size(self.filelike)
+
+def get_remaining_size(filelike):
+    """
+    Returns the number of bytes from `filelike`'s position to its end, or
+    None if it isn't a real file.
+    """
+
+    try:
+        size = os.fstat(filelike.fileno()).st_size
+        position = filelike.tell()
+    except (AttributeError, IOError, OSError, ValueError):
+        return None
+    return max(size - position, 0)
+
+def read_file(filelike, start=None, stop=None, limit=None):
+    """
+    Returns bytes `[start:stop]` of `filelike` - by default, from its current
+    position to the end. No more than `limit` bytes are read, if it's set.
+    """
+
+    if start is not None:
+        filelike.seek(start)
+
+    if stop is None:
+        # Real files are read with a single, exactly sized read. Without a
+        # size, `read` grows its string as it goes, copying it each time.
+        # Seeking first empties stdio's buffer, so the read goes straight
+        # into the string - about three times quicker for large files.
+        remaining = get_remaining_size(filelike)
+        if remaining is None:
+            return filelike.read() if limit is None else filelike.read(limit)
+        filelike.seek(filelike.tell())
+        return filelike.read(remaining if limit is None else min(remaining, limit))
+
+    return filelike.read(max(stop - (filelike.tell() if start is None else start), 0))
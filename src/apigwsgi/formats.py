@@ -0,0 +1,497 @@
+"""
+Lambda event formats. Each translates one kind of HTTP event into WSGI
+environ variables, and WSGI responses back into what that event source
+expects.
+"""
+
+import urllib
+
+from apigwsgi.utils import quote_plus
+
+class EventFormat(object):
+    """
+    Base class for event formats.
+    """
+
+    def matches(self, event):
+        """
+        Returns whether `event` is in this format.
+        """
+
+        raise NotImplementedError()
+
+    def update_environ(self, environ, event):
+        """
+        Sets the `HTTP_*` variables, REQUEST_METHOD, PATH_INFO and
+        QUERY_STRING in `environ` from `event`.
+        """
+
+        raise NotImplementedError()
+
+    def get_cache_key(self, event):
+        """
+        Returns a hashable `(method, path, query)` identifying the resource
+        `event` requests. Equivalent requests must give equal keys.
+        """
+
+        raise NotImplementedError()
+
+    def get_headers(self, event, names):
+        """
+        Returns a dict of lowercase header name => value, for the request
+        headers in `names` (a set of lowercase names). Values are combined as
+        in the environ's `HTTP_*` variables.
+        """
+
+        raise NotImplementedError()
+
+    def set_request_header(self, event, name, value):
+        """
+        Sets request header `name` in `event` to `value`, replacing any
+        values it has, whatever their case. Removes it if `value` is None.
+        """
+
+        raise NotImplementedError()
+
+    def get_response_header(self, event, response, name):
+        """
+        Returns the value of header `name` in `response`, the Lambda response
+        for `event`, or None. Repeated headers are joined with commas.
+        """
+
+        raise NotImplementedError()
+
+    def set_response_header(self, event, response, name, value):
+        """
+        As `set_request_header`, for `response`, the Lambda response for
+        `event`.
+        """
+
+        raise NotImplementedError()
+
+    def get_response(self, event, status_code, status, response_headers, body, base64_encoded):
+        """
+        Returns the Lambda response for `event`. `status` is the WSGI status
+        line, `status_code` its numeric code, and `response_headers` the WSGI
+        list of `(name, value)` tuples. `body` is a string, already base64
+        encoded if `base64_encoded` is set.
+        """
+
+        raise NotImplementedError()
+
+class RESTAPIFormat(EventFormat):
+    """
+    API Gateway REST API proxy integrations, and HTTP APIs using payload
+    format version 1.0.
+
+    <https://docs.aws.amazon.com/apigateway/latest/developerguide/set-up-lambda-proxy-integrations.html#api-gateway-simple-proxy-for-lambda-input-format>
+    """
+
+    def matches(self, event):
+        return "httpMethod" in event
+
+    def update_environ(self, environ, event):
+        # "Variables corresponding to the client-supplied HTTP request headers
+        #  (i.e., variables whose names begin with "HTTP_" ). The presence or
+        #  absence of these variables should correspond with the presence or
+        #  absence of the appropriate HTTP header in the request."
+        #
+        # If the API has multi-value headers, `multiValueHeaders` holds every
+        # value, and `headers` just the last of each.
+        multi_value_headers = event.get("multiValueHeaders")
+        if multi_value_headers:
+            set_multi_value_headers(environ, multi_value_headers)
+        else:
+            set_headers(environ, event["headers"])
+
+        # "The HTTP request method, such as "GET" or "POST" . This cannot ever
+        #  be an empty string, and so is always required."
+        environ["REQUEST_METHOD"] = event["httpMethod"]
+
+        # "The remainder of the request URL's "path", designating the virtual
+        #  "location" of the request's target within the application. This may
+        #  be an empty string, if the request URL targets the application root
+        #  and does not have a trailing slash."
+        environ["PATH_INFO"] = event["path"]
+
+        # "The portion of the request URL that follows the "?" , if any. May be
+        #  empty or absent."
+        #
+        # API Gateway has already decoded the query string, so it needs
+        # encoding again. `multiValueQueryStringParameters` keeps repeated
+        # parameters, which `queryStringParameters` drops.
+        multi_value_query = event.get("multiValueQueryStringParameters")
+        if multi_value_query:
+            environ["QUERY_STRING"] = "&".join([
+                quote_plus(key) + "=" + quote_plus(value)
+                for key, values in multi_value_query.iteritems()
+                for value in values
+            ])
+        else:
+            query = event["queryStringParameters"]
+            environ["QUERY_STRING"] = "&".join([
+                quote_plus(key) + "=" + quote_plus(value)
+                for key, value in query.iteritems()
+            ]) if query else ""
+
+    def get_cache_key(self, event):
+        multi_value_query = event.get("multiValueQueryStringParameters")
+        if multi_value_query:
+            query = tuple(sorted(
+                (key, tuple(values)) for key, values in multi_value_query.iteritems()
+            ))
+        else:
+            query = tuple(sorted((event["queryStringParameters"] or {}).iteritems()))
+
+        return (event["httpMethod"], event["path"], query)
+
+    def get_headers(self, event, names):
+        multi_value_headers = event.get("multiValueHeaders")
+        if multi_value_headers:
+            return find_multi_value_headers(multi_value_headers, names)
+        else:
+            return find_headers(event["headers"], names)
+
+    def set_request_header(self, event, name, value):
+        set_event_header(event, name, value)
+
+    def get_response_header(self, event, response, name):
+        return find_response_header(response, name)
+
+    def set_response_header(self, event, response, name, value):
+        set_response_header(event, response, name, value)
+
+    def get_response(self, event, status_code, status, response_headers, body, base64_encoded):
+        response = {
+            "statusCode": status_code
+        }
+
+        # Multi-value headers can carry repeated headers like Set-Cookie. Use
+        # them if the API sends them to us.
+        if "multiValueHeaders" in event:
+            response["multiValueHeaders"] = get_multi_value_headers(response_headers)
+        else:
+            response["headers"] = dict(response_headers)
+
+        response["body"] = body
+        if base64_encoded:
+            response["isBase64Encoded"] = True
+
+        return response
+
+class HTTPAPIFormat(EventFormat):
+    """
+    API Gateway HTTP APIs using payload format version 2.0.
+
+    <https://docs.aws.amazon.com/apigateway/latest/developerguide/http-api-develop-integrations-lambda.html>
+    """
+
+    def matches(self, event):
+        return event.get("version") == "2.0"
+
+    def update_environ(self, environ, event):
+        # Repeated headers arrive already joined with commas.
+        set_headers(environ, event.get("headers"))
+
+        # Cookies are split out of the headers.
+        cookies = event.get("cookies")
+        if cookies:
+            environ["HTTP_COOKIE"] = "; ".join(cookies)
+
+        environ["REQUEST_METHOD"] = event["requestContext"]["http"]["method"]
+
+        # `rawPath` is as the client sent it, so still percent-encoded.
+        raw_path = event["rawPath"]
+        environ["PATH_INFO"] = urllib.unquote(raw_path) if "%" in raw_path else raw_path
+
+        # `rawQueryString` is as the client sent it, so needs no encoding.
+        environ["QUERY_STRING"] = event.get("rawQueryString", "")
+
+    def get_cache_key(self, event):
+        return (event["requestContext"]["http"]["method"], event["rawPath"], event.get("rawQueryString", ""))
+
+    def get_headers(self, event, names):
+        # Header names are already lowercase.
+        headers = event.get("headers") or {}
+        found = {name: headers[name] for name in names if name in headers}
+
+        cookies = event.get("cookies")
+        if cookies and "cookie" in names:
+            found["cookie"] = "; ".join(cookies)
+
+        return found
+
+    def set_request_header(self, event, name, value):
+        name = name.lower()
+        if name == "cookie":
+            if value is None:
+                event.pop("cookies", None)
+            else:
+                event["cookies"] = [cookie.strip() for cookie in value.split(";")]
+        else:
+            if event.get("headers") is None:
+                event["headers"] = {}
+            replace_header(event["headers"], name, value)
+
+    def get_response_header(self, event, response, name):
+        if name.lower() == "set-cookie":
+            return ", ".join(response["cookies"]) if response.get("cookies") else None
+        return find_headers(response.get("headers"), {name.lower()}).get(name.lower())
+
+    def set_response_header(self, event, response, name, value):
+        if name.lower() == "set-cookie":
+            if value is None:
+                response.pop("cookies", None)
+            else:
+                response["cookies"] = [value]
+        else:
+            if response.get("headers") is None:
+                response["headers"] = {}
+            replace_header(response["headers"], name, value)
+
+    def get_response(self, event, status_code, status, response_headers, body, base64_encoded):
+        # Repeated headers are joined with commas, except Set-Cookie, which
+        # has its own list.
+        headers = {}
+        cookies = []
+        for name, value in response_headers:
+            if name.lower() == "set-cookie":
+                cookies.append(value)
+            elif name in headers:
+                headers[name] += ", " + value
+            else:
+                headers[name] = value
+
+        response = {
+            "statusCode": status_code,
+            "headers": headers,
+            "body": body
+        }
+        if cookies:
+            response["cookies"] = cookies
+        if base64_encoded:
+            response["isBase64Encoded"] = True
+
+        return response
+
+class ALBFormat(EventFormat):
+    """
+    Application Load Balancer Lambda targets.
+
+    <https://docs.aws.amazon.com/elasticloadbalancing/latest/application/lambda-functions.html>
+    """
+
+    def matches(self, event):
+        return "elb" in (event.get("requestContext") or ())
+
+    def update_environ(self, environ, event):
+        # Multi-value headers are a target group setting, and the response
+        # must match.
+        multi_value_headers = event.get("multiValueHeaders")
+        if multi_value_headers:
+            set_multi_value_headers(environ, multi_value_headers)
+        else:
+            set_headers(environ, event.get("headers"))
+
+        environ["REQUEST_METHOD"] = event["httpMethod"]
+
+        path = event["path"]
+        environ["PATH_INFO"] = urllib.unquote(path) if "%" in path else path
+
+        # Unlike API Gateway, ALBs pass query parameters through still
+        # encoded.
+        multi_value_query = event.get("multiValueQueryStringParameters")
+        if multi_value_query:
+            environ["QUERY_STRING"] = "&".join([
+                key + "=" + value
+                for key, values in multi_value_query.iteritems()
+                for value in values
+            ])
+        else:
+            query = event.get("queryStringParameters")
+            environ["QUERY_STRING"] = "&".join([
+                key + "=" + value
+                for key, value in query.iteritems()
+            ]) if query else ""
+
+    def get_cache_key(self, event):
+        multi_value_query = event.get("multiValueQueryStringParameters")
+        if multi_value_query:
+            query = tuple(sorted(
+                (key, tuple(values)) for key, values in multi_value_query.iteritems()
+            ))
+        else:
+            query = tuple(sorted((event.get("queryStringParameters") or {}).iteritems()))
+
+        return (event["httpMethod"], event["path"], query)
+
+    def get_headers(self, event, names):
+        multi_value_headers = event.get("multiValueHeaders")
+        if multi_value_headers:
+            return find_multi_value_headers(multi_value_headers, names)
+        else:
+            return find_headers(event.get("headers"), names)
+
+    def set_request_header(self, event, name, value):
+        set_event_header(event, name, value)
+
+    def get_response_header(self, event, response, name):
+        return find_response_header(response, name)
+
+    def set_response_header(self, event, response, name, value):
+        set_response_header(event, response, name, value)
+
+    def get_response(self, event, status_code, status, response_headers, body, base64_encoded):
+        response = {
+            "statusCode": status_code,
+            "statusDescription": status,
+            "body": body,
+            "isBase64Encoded": base64_encoded
+        }
+
+        if "multiValueHeaders" in event:
+            response["multiValueHeaders"] = get_multi_value_headers(response_headers)
+        else:
+            response["headers"] = dict(response_headers)
+
+        return response
+
+# Checked in order - `RESTAPIFormat` matches anything with an `httpMethod`,
+# so goes after `ALBFormat`.
+DEFAULT_EVENT_FORMATS = (
+    HTTPAPIFormat(),
+    ALBFormat(),
+    RESTAPIFormat()
+)
+
+def get_event_format(event, event_formats=DEFAULT_EVENT_FORMATS):
+    """
+    Returns the first of `event_formats` that matches `event`.
+    """
+
+    for event_format in event_formats:
+        if event_format.matches(event):
+            return event_format
+
+    raise Exception("Unrecognised event format")
+
+def set_headers(environ, headers):
+    """
+    Sets `HTTP_*` environ variables from a dict of headers.
+    """
+
+    if headers:
+        for key, value in headers.iteritems():
+            environ["HTTP_" + key.upper().replace("-", "_")] = value
+
+def set_multi_value_headers(environ, multi_value_headers):
+    """
+    Sets `HTTP_*` environ variables from a dict of header => list of values.
+    """
+
+    for key, values in multi_value_headers.iteritems():
+        name = "HTTP_" + key.upper().replace("-", "_")
+        # Combine repeated headers as RFC 7230 section 3.2.2 says, except
+        # Cookie, which has its own separator.
+        environ[name] = ("; " if name == "HTTP_COOKIE" else ",").join(values)
+
+def find_headers(headers, names):
+    """
+    Returns a dict of lowercase header name => value, for the headers in
+    `names` (a set of lowercase names).
+    """
+
+    found = {}
+    if headers:
+        for key, value in headers.iteritems():
+            key = key.lower()
+            if key in names:
+                found[key] = value
+    return found
+
+def find_multi_value_headers(multi_value_headers, names):
+    """
+    As `find_headers`, for a dict of header => list of values. Values are
+    combined as in `set_multi_value_headers`.
+    """
+
+    found = {}
+    for key, values in multi_value_headers.iteritems():
+        key = key.lower()
+        if key in names:
+            found[key] = ("; " if key == "cookie" else ",").join(values)
+    return found
+
+def get_multi_value_headers(response_headers):
+    """
+    Converts WSGI response headers to a dict of header => list of values.
+    """
+
+    multi_value_headers = {}
+    for name, value in response_headers:
+        if name in multi_value_headers:
+            multi_value_headers[name].append(value)
+        else:
+            multi_value_headers[name] = [value]
+    return multi_value_headers
+
+def replace_header(headers, name, value):
+    """
+    Removes `name` from a dict of headers, whatever its case, then sets it
+    to `value` unless that's None.
+    """
+
+    lower_name = name.lower()
+    for key in [key for key in headers if key.lower() == lower_name]:
+        del headers[key]
+    if value is not None:
+        headers[name] = value
+
+def set_event_header(event, name, value):
+    """
+    Sets a request header in a REST API or ALB event. Both `headers` and
+    `multiValueHeaders` are updated, as either may be read - see
+    `RESTAPIFormat.update_environ`.
+    """
+
+    if event.get("multiValueHeaders") is not None:
+        replace_header(event["multiValueHeaders"], name, None if value is None else [value])
+
+    if event.get("headers") is None:
+        event["headers"] = {}
+    replace_header(event["headers"], name, value)
+
+def find_response_header(response, name):
+    """
+    Returns a header from a REST API or ALB response, or None.
+    """
+
+    lower_name = name.lower()
+    multi_value_headers = response.get("multiValueHeaders")
+    if multi_value_headers:
+        for key, values in multi_value_headers.iteritems():
+            if key.lower() == lower_name:
+                return ", ".join(values)
+
+    return find_headers(response.get("headers"), {lower_name}).get(lower_name)
+
+def set_response_header(event, response, name, value):
+    """
+    Sets a header in a REST API or ALB response. Responses use
+    `multiValueHeaders` if the event has them (see
+    `RESTAPIFormat.get_response`), and API Gateway prefers them to `headers`
+    for any header in both, so it's removed from `headers` too.
+    """
+
+    multi_value_headers = response.get("multiValueHeaders")
+    if multi_value_headers is None and "headers" not in response and "multiValueHeaders" in event:
+        multi_value_headers = response["multiValueHeaders"] = {}
+
+    if multi_value_headers is not None:
+        replace_header(multi_value_headers, name, None if value is None else [value])
+        if response.get("headers"):
+            replace_header(response["headers"], name, None)
+    else:
+        if response.get("headers") is None:
+            response["headers"] = {}
+        replace_header(response["headers"], name, value)
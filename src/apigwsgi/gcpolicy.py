@@ -0,0 +1,118 @@
+"""
+Scheduling garbage collection between requests, rather than during them.
+"""
+
+import gc
+import threading
+import time
+
+# Generation thresholds set by `GCPolicy.prepare` where `gc.freeze` isn't
+# available. Python's defaults are (700, 10, 10). Raising the older
+# generations' thresholds means long-lived objects from initialisation are
+# traversed less often.
+DEFAULT_THRESHOLDS = (700, 20, 100)
+
+class GCPolicy(object):
+    """
+    Keeps the cyclic garbage collector out of requests.
+
+    Once the handler is initialised, `prepare` collects, then moves the
+    surviving objects - modules, the app, its configuration - out of the
+    collector's reach with `gc.freeze` (Python 3.7+), or otherwise sets
+    `thresholds`.
+
+    Automatic collection is disabled while a request is in flight. Once
+    its response is built, the oldest generation that's due (by
+    `gc.get_count`, against `gc.get_threshold`) is collected - usually
+    generation 0, which is quick - and automatic collection enabled again.
+
+    `collections` counts collections per generation, `collected` the objects
+    they found and `pause` the seconds they took.
+    """
+
+    def __init__(self, freeze=True, thresholds=DEFAULT_THRESHOLDS):
+        self.freeze = freeze
+        self.thresholds = thresholds
+
+        self.lock = threading.RLock()
+        self.in_flight = 0
+        self.was_enabled = True
+
+        self.collections = [0, 0, 0]
+        self.collected = 0
+        self.pause = 0.0
+
+    def prepare(self):
+        """
+        Collects everything, then freezes what's left or sets `thresholds`.
+        """
+
+        gc.collect()
+        if self.freeze and hasattr(gc, "freeze"):
+            gc.freeze()
+        elif self.thresholds:
+            gc.set_threshold(*self.thresholds)
+
+    def begin(self):
+        """
+        Disables automatic collection for a request.
+        """
+
+        with self.lock:
+            if self.in_flight == 0:
+                self.was_enabled = gc.isenabled()
+                gc.disable()
+            self.in_flight += 1
+
+    def end(self):
+        """
+        Ends a request, collecting if it's the last in flight and a
+        collection is due.
+        """
+
+        with self.lock:
+            if self.in_flight == 1:
+                self.collect()
+                if self.was_enabled:
+                    gc.enable()
+            self.in_flight -= 1
+
+    def collect(self, timings=None):
+        """
+        Collects the oldest generation that's due, if any, unless other
+        requests are in flight. Records the collection in `timings`, if
+        given.
+        """
+
+        with self.lock:
+            generation = get_due_generation()
+            if generation is None or self.in_flight > 1:
+                if timings is not None:
+                    timings.gc = 0.0
+                return
+
+            started = time.time()
+            collected = gc.collect(generation)
+            pause = time.time() - started
+
+            self.collections[generation] += 1
+            self.collected += collected
+            self.pause += pause
+
+        if timings is not None:
+            timings.gc = pause
+            timings.gc_generation = generation
+            timings.gc_collected = collected
+
+def get_due_generation():
+    """
+    Returns the oldest generation whose count is over its threshold, or
+    None if none is.
+    """
+
+    counts = gc.get_count()
+    thresholds = gc.get_threshold()
+    for generation in (2, 1, 0):
+        if thresholds[generation] and counts[generation] > thresholds[generation]:
+            return generation
+    return None
@@ -0,0 +1,81 @@
+"""
+Event-level hooks, run around the handler instead of WSGI middleware.
+
+Where headers live in events and responses depends on the event format -
+REST APIs, for instance, send `multiValueHeaders`, which take precedence
+over `headers`. Hooks should read and change them through
+`get_request_header`, `set_request_header`, `get_response_header` and
+`set_response_header`.
+"""
+
+from apigwsgi.formats import DEFAULT_EVENT_FORMATS, get_event_format
+
+def compile_hooks(handle, pre_hooks=(), post_hooks=()):
+    """
+    Returns a function of `(event, context)` that runs `pre_hooks`, then
+    `handle`, then `post_hooks`. Without hooks, returns `handle` itself.
+
+    Pre-hooks are called with `(event, context)`, and may change the event.
+    One that returns a response dict short-circuits the rest of the
+    pre-hooks and `handle`.
+
+    Post-hooks are called with `(event, context, response)`, where
+    `response` is the Lambda response dict, and may change it or return a
+    new one. They see every response, including short-circuited ones.
+    """
+
+    pre_hooks = tuple(pre_hooks)
+    post_hooks = tuple(post_hooks)
+
+    if not pre_hooks and not post_hooks:
+        return handle
+
+    def handle_with_hooks(event, context):
+        for hook in pre_hooks:
+            response = hook(event, context)
+            if response is not None:
+                break
+        else:
+            response = handle(event, context)
+
+        for hook in post_hooks:
+            result = hook(event, context, response)
+            if result is not None:
+                response = result
+
+        return response
+
+    return handle_with_hooks
+
+def get_request_header(event, name, event_formats=DEFAULT_EVENT_FORMATS):
+    """
+    Returns the value of request header `name` in `event`, or None. Repeated
+    headers are combined as in the environ's `HTTP_*` variables.
+    """
+
+    name = name.lower()
+    return get_event_format(event, event_formats).get_headers(event, {name}).get(name)
+
+def set_request_header(event, name, value, event_formats=DEFAULT_EVENT_FORMATS):
+    """
+    Sets request header `name` in `event` to `value`, wherever the event's
+    format keeps headers. Removes it if `value` is None.
+    """
+
+    get_event_format(event, event_formats).set_request_header(event, name, value)
+
+def get_response_header(event, response, name, event_formats=DEFAULT_EVENT_FORMATS):
+    """
+    Returns the value of header `name` in `response`, the Lambda response for
+    `event`, or None.
+    """
+
+    return get_event_format(event, event_formats).get_response_header(event, response, name)
+
+def set_response_header(event, response, name, value, event_formats=DEFAULT_EVENT_FORMATS):
+    """
+    As `set_request_header`, for `response`, the Lambda response for
+    `event`.
+    """
+
+    get_event_format(event, event_formats).set_response_header(event, response, name, value)
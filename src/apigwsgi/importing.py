@@ -0,0 +1,104 @@
+"""
+Lazily imported apps, and timing imports.
+"""
+
+import __builtin__
+import sys
+import time
+
+def import_string(name):
+    """
+    Returns the object named by a `"package.module:attribute"` string. The
+    attribute may be dotted, e.g. `"myapp:app.wsgi_app"`.
+    """
+
+    module_name, _, attributes = name.partition(":")
+    if not module_name or not attributes:
+        raise Exception("Import string must look like 'package.module:attribute', not {!r}".format(name))
+
+    __import__(module_name)
+    obj = sys.modules[module_name]
+    for attribute in attributes.split("."):
+        obj = getattr(obj, attribute)
+
+    return obj
+
+class ImportTimer(object):
+    """
+    Context manager that times every module imported within it:
+
+        with ImportTimer() as timer:
+            from myapp import app
+        timer.report(sys.stderr)
+
+    `timings` maps module name => `[total seconds, self seconds]`, where
+    self time excludes the modules it imported in turn. Only imports that
+    load a new module are counted.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.total = 0.0
+
+        # Seconds spent in nested imports, per import in progress.
+        self.stack = []
+
+        self.original_import = None
+
+    def __enter__(self):
+        self.original_import = __builtin__.__import__
+        __builtin__.__import__ = self.timed_import
+        self.started = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.total += time.time() - self.started
+        __builtin__.__import__ = self.original_import
+
+    def timed_import(self, name, globals=None, locals=None, fromlist=None, level=-1):
+        module_count = len(sys.modules)
+        self.stack.append(0.0)
+        started = time.time()
+        try:
+            return self.original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.time() - started
+            nested = self.stack.pop()
+            if self.stack:
+                self.stack[-1] += elapsed
+
+            if len(sys.modules) > module_count:
+                timing = self.timings.setdefault(get_module_name(name, globals), [0.0, 0.0])
+                timing[0] += elapsed
+                timing[1] += elapsed - nested
+
+    def report(self, stream, limit=20):
+        """
+        Writes the `limit` slowest imports, by self time, to `stream`.
+        """
+
+        stream.write("apigwsgi: imported {} modules in {:.1f}ms\n".format(len(self.timings), self.total * 1000))
+
+        slowest = sorted(self.timings.iteritems(), key=lambda item: item[1][1], reverse=True)
+        for name, (total, self_time) in slowest[:limit]:
+            stream.write("apigwsgi:   {:8.1f}ms self {:8.1f}ms total  {}\n".format(self_time * 1000, total * 1000, name))
+
+def get_module_name(name, globals):
+    """
+    Returns the full name of the module imported as `name` - Python 2
+    imports are relative to the importing package first.
+    """
+
+    if name in sys.modules or not globals:
+        return name
+
+    package = globals.get("__package__")
+    if not package:
+        package = globals.get("__name__", "")
+        if "__path__" not in globals:
+            package = package.rpartition(".")[0]
+
+    if package and package + "." + name in sys.modules:
+        return package + "." + name
+
+    return name
@@ -0,0 +1,156 @@
+"""
+Profiling sampled requests in production.
+"""
+
+import collections
+import cProfile
+import glob
+import hashlib
+import hmac
+import itertools
+import os
+import pstats
+import re
+import time
+import uuid
+
+class Profiler(object):
+    """
+    Decides which requests to profile with `cProfile`, and keeps the
+    results.
+
+    Profiles every `sample_rate`th request, and requests whose PATH_INFO
+    matches the regex `path_pattern`. Each profile is saved to `directory`
+    as `<time>-<request ID>-<number>.prof`, keeping the `max_files` most recent; load
+    them with `pstats` or a viewer such as snakeviz.
+
+    If `debug_secret` is set, requests can also ask to be profiled by sending
+    a `debug_header` signed with it (see `sign`), and get a summary of the
+    profile back in the `summary_header` response header. Signatures are
+    valid for `max_age` seconds.
+    """
+
+    def __init__(self, sample_rate=None, path_pattern=None, directory="/tmp/apigwsgi-profiles",
+                 max_files=20, debug_secret=None, debug_header="X-Apigwsgi-Profile",
+                 summary_header="X-Apigwsgi-Profile-Summary", max_age=300):
+        self.sample_rate = sample_rate
+        self.path_pattern = re.compile(path_pattern) if path_pattern else None
+        self.directory = directory
+        self.max_files = max_files
+        self.debug_secret = debug_secret
+        self.debug_environ_key = "HTTP_" + debug_header.upper().replace("-", "_")
+        self.summary_header = summary_header
+        self.max_age = max_age
+
+        self.count = 0
+
+        # Numbers the saved profiles. Events in a batch share a request ID,
+        # so it isn't enough to tell their profiles apart.
+        self.sequence = itertools.count(1)
+
+        # Saved profiles, oldest first. Loaded from `directory` when the
+        # first profile is saved, so a new handler picks up where the last
+        # one left off.
+        self.files = None
+
+    def should_profile(self, environ):
+        """
+        Returns whether to profile the request in `environ`.
+        """
+
+        if self.sample_rate:
+            self.count += 1
+            if self.count >= self.sample_rate:
+                self.count = 0
+                return True
+
+        if self.path_pattern is not None and self.path_pattern.search(environ["PATH_INFO"]):
+            return True
+
+        return self.is_debug_request(environ)
+
+    def is_debug_request(self, environ):
+        """
+        Returns whether the request has a valid debug header.
+        """
+
+        if self.debug_secret is None:
+            return False
+
+        value = environ.get(self.debug_environ_key)
+        if not value:
+            return False
+
+        timestamp = value.partition(":")[0]
+        if not timestamp.isdigit() or abs(time.time() - int(timestamp)) > self.max_age:
+            return False
+
+        expected = sign(self.debug_secret, timestamp, environ["PATH_INFO"])
+        return hmac.compare_digest(expected, value)
+
+    def run(self, func, *args):
+        """
+        Returns `(func(*args), profile)`.
+        """
+
+        profile = cProfile.Profile()
+        result = profile.runcall(func, *args)
+        return result, profile
+
+    def save(self, profile, request_id=None):
+        """
+        Writes `profile` to `directory`, removing the oldest saved profiles
+        past `max_files`. Returns the filename.
+        """
+
+        if self.files is None:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            self.files = collections.deque(sorted(
+                glob.glob(os.path.join(self.directory, "*.prof")),
+                key=os.path.getmtime
+            ))
+
+        filename = os.path.join(self.directory, "{}-{}-{}.prof".format(
+            int(time.time() * 1000), request_id or uuid.uuid4().hex, next(self.sequence)
+        ))
+        profile.dump_stats(filename)
+        self.files.append(filename)
+
+        while len(self.files) > self.max_files:
+            try:
+                os.remove(self.files.popleft())
+            except OSError:
+                pass
+
+        return filename
+
+    def summarize(self, profile, limit=5):
+        """
+        Returns a one-line summary of `profile`, fit for a response header:
+        the total time, then the `limit` functions with the most cumulative
+        time.
+        """
+
+        stats = pstats.Stats(profile)
+        rows = sorted(
+            (
+                (cumulative, "{}:{}({})".format(os.path.basename(filename), line, function))
+                for (filename, line, function), (_, _, _, cumulative, _) in stats.stats.iteritems()
+            ),
+            reverse=True
+        )
+
+        return "total={:.1f}ms; {}".format(
+            stats.total_tt * 1000,
+            ", ".join("{} {:.1f}ms".format(name, cumulative * 1000) for cumulative, name in rows[:limit])
+        )
+
+def sign(secret, timestamp, path):
+    """
+    Returns the debug header value asking for the request to `path` to be
+    profiled. `timestamp` is the current Unix time.
+    """
+
+    signature = hmac.new(secret, "{}:{}".format(timestamp, path), hashlib.sha256).hexdigest()
+    return "{}:{}".format(timestamp, signature)
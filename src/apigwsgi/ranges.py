@@ -0,0 +1,92 @@
+"""
+Range requests (RFC 7233).
+"""
+
+import os
+
+from apigwsgi.conditional import parse_http_date
+
+class RangeNotSatisfiable(Exception):
+    """
+    Raised when a Range header doesn't overlap the representation.
+    """
+
+def parse_range(range_header, size):
+    """
+    Returns the `(start, stop)` slice of a `size` byte representation that
+    a Range header asks for. Returns None if the header should be ignored -
+    it's malformed, not in bytes, or asks for several ranges, which would
+    need a multipart response. Raises `RangeNotSatisfiable`.
+    """
+
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+
+    first, separator, last = ranges.partition("-")
+    first, last = first.strip(), last.strip()
+    if not separator:
+        return None
+
+    # "bytes=-500" is the last 500 bytes.
+    if not first:
+        if not last.isdigit():
+            return None
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size
+
+    if not first.isdigit() or (last and not last.isdigit()):
+        return None
+
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+
+    stop = min(int(last) + 1, size) if last else size
+    return start, stop
+
+def if_range_matches(if_range, etag, last_modified):
+    """
+    Returns whether an If-Range header matches the representation, so the
+    Range header applies.
+    """
+
+    # ETags must match using strong comparison.
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return etag is not None and not etag.startswith("W/") and if_range == etag
+
+    if last_modified is None:
+        return False
+
+    if_range_date = parse_http_date(if_range)
+    return if_range_date is not None and if_range_date == parse_http_date(last_modified)
+
+def get_content_range(start, stop, size):
+    return "bytes {}-{}/{}".format(start, stop - 1, size)
+
+def get_filelike(result):
+    """
+    Returns the file behind a `wsgi.file_wrapper`-style app result, if it
+    has one that can seek, otherwise None. Understands wsgiref's
+    (`filelike`) and Werkzeug's (`file`) wrappers.
+    """
+
+    filelike = getattr(result, "filelike", None) or getattr(result, "file", None)
+    if filelike is None or not hasattr(filelike, "seek") or not hasattr(filelike, "read"):
+        return None
+    return filelike
+
+def get_file_size(filelike):
+    """
+    Returns the size of an open file, or None if it can't be found without
+    reading it.
+    """
+
+    try:
+        return os.fstat(filelike.fileno()).st_size
+    except (AttributeError, IOError, OSError, ValueError):
+        return None
@@ -0,0 +1,188 @@
+"""
+Request bodies: the `wsgi.input` stream.
+"""
+
+import base64
+import cStringIO
+
+# Base64 bodies that decode to more than this are decoded as they're read,
+# rather than in one go.
+DEFAULT_DECODE_THRESHOLD = 1024 * 1024
+
+# Base64 characters decoded at a time when streaming. A multiple of 4, so
+# each block decodes on its own.
+DECODE_BLOCK_SIZE = 64 * 1024
+
+class RequestBody(object):
+    """
+    `wsgi.input` for an event's body, optionally base64 encoded.
+
+    Nothing happens until the app first reads from it. Then plain bodies are
+    read in place, small base64 bodies are decoded in one go, and those that
+    decode to more than `decode_threshold` bytes are decoded block by block
+    as they're read - see `Base64Stream`.
+
+    `size` is the decoded size, worked out without decoding.
+    """
+
+    __slots__ = ("body", "base64_encoded", "decode_threshold", "size", "stream")
+
+    def __init__(self, body, base64_encoded=False, decode_threshold=DEFAULT_DECODE_THRESHOLD):
+        self.body = body
+        self.base64_encoded = base64_encoded
+        self.decode_threshold = decode_threshold
+        self.stream = None
+
+        if base64_encoded and body:
+            self.size = get_decoded_size(body)
+        else:
+            self.size = len(body)
+
+    def get_stream(self):
+        stream = self.stream
+        if stream is not None:
+            return stream
+
+        body = self.body
+        if not self.base64_encoded:
+            # cStringIO reads the string in place, without copying it.
+            stream = cStringIO.StringIO(body)
+        elif self.decode_threshold is None or self.size <= self.decode_threshold:
+            stream = cStringIO.StringIO(base64.b64decode(body))
+        else:
+            stream = Base64Stream(body)
+
+        # The stream holds what it still needs of the body.
+        self.body = None
+        self.stream = stream
+        return stream
+
+    def read(self, size=-1):
+        return self.get_stream().read(size)
+
+    def readline(self, size=-1):
+        return self.get_stream().readline(size)
+
+    def readlines(self, hint=-1):
+        return self.get_stream().readlines(hint)
+
+    def __iter__(self):
+        return iter(self.get_stream())
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+
+class Base64Stream(object):
+    """
+    Reads a base64 string, decoding `DECODE_BLOCK_SIZE` characters at a time
+    as `read` and `readline` need them. Only the block being read is held
+    decoded, unless the app reads everything at once.
+    """
+
+    def __init__(self, body):
+        self.body = strip_whitespace(body)
+        # Position in `body` of the next block to decode.
+        self.offset = 0
+
+        # Decoded bytes, of which those from `position` haven't been read.
+        self.buffer = ""
+        self.position = 0
+
+    def fill(self):
+        """
+        Decodes the next block onto the unread part of `buffer`. Returns
+        False if there's nothing left to decode.
+        """
+
+        if self.offset >= len(self.body):
+            return False
+
+        block = base64.b64decode(self.body[self.offset:self.offset + DECODE_BLOCK_SIZE])
+        self.offset += DECODE_BLOCK_SIZE
+        self.buffer = self.buffer[self.position:] + block
+        self.position = 0
+        return True
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            data = self.buffer[self.position:] + base64.b64decode(self.body[self.offset:])
+            self.offset = len(self.body)
+            self.buffer = ""
+            self.position = 0
+            return data
+
+        while len(self.buffer) - self.position < size and self.fill():
+            pass
+
+        data = self.buffer[self.position:self.position + size]
+        self.position += len(data)
+        return data
+
+    def readline(self, size=-1):
+        limited = size is not None and size >= 0
+
+        while True:
+            newline = self.buffer.find("\n", self.position)
+            if newline >= 0:
+                end = newline + 1
+                break
+            if (limited and len(self.buffer) - self.position >= size) or not self.fill():
+                end = len(self.buffer)
+                break
+
+        if limited:
+            end = min(end, self.position + size)
+
+        data = self.buffer[self.position:end]
+        self.position = end
+        return data
+
+    def readlines(self, hint=-1):
+        lines = []
+        total = 0
+        for line in self:
+            lines.append(line)
+            total += len(line)
+            if 0 < hint <= total:
+                break
+        return lines
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration()
+        return line
+
+    def close(self):
+        self.body = ""
+        self.offset = 0
+        self.buffer = ""
+        self.position = 0
+
+def strip_whitespace(body):
+    """
+    Removes line breaks and spaces, which `b64decode` skips, from a base64
+    string.
+    """
+
+    if "\n" in body or "\r" in body or " " in body:
+        return body.translate(None, "\r\n ")
+    return body
+
+def get_decoded_size(body):
+    """
+    Returns the size a base64 string decodes to, without decoding it.
+    """
+
+    body = strip_whitespace(body)
+    if body.endswith("=="):
+        padding = 2
+    elif body.endswith("="):
+        padding = 1
+    else:
+        padding = 0
+    return len(body) * 3 // 4 - padding
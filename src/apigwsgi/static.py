@@ -0,0 +1,239 @@
+"""
+Serving static files without calling the app.
+"""
+
+import email.utils
+import hashlib
+import mimetypes
+import mmap
+import os
+import threading
+
+from apigwsgi.compression import COMPRESSORS, DEFAULT_UNCOMPRESSIBLE_CONTENT_TYPES, negotiate_encoding
+from apigwsgi.conditional import make_etag
+from apigwsgi.utils import ContentTypes, Memo
+
+# Precompressed variant file extension => Content-Encoding, in preference
+# order.
+VARIANT_EXTENSIONS = (
+    (".br", "br"),
+    (".gz", "gzip")
+)
+
+class StaticFile(object):
+    """
+    A file in a `StaticFiles` index, with a precompressed variant per
+    encoding in `variants`. Variants compressed when indexing have their
+    contents in `data`, and no `filename`.
+    """
+
+    __slots__ = ("filename", "content_type", "size", "etag", "last_modified", "variants", "map", "data")
+
+    def __init__(self, filename, content_type, size, etag, last_modified):
+        self.filename = filename
+        self.content_type = content_type
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+
+        # Encoding => StaticFile.
+        self.variants = {}
+
+        # Memory map of the file, made on first read.
+        self.map = None
+
+        self.data = None
+
+class StaticFiles(object):
+    """
+    Index of the files under `directory`, served at URL path `prefix`.
+
+    Everything that can be worked out before a request is - content type,
+    size, ETag, Last-Modified and precompressed variants (`style.css.gz` and
+    `style.css.br` alongside `style.css`). Files are read through `mmap`.
+
+    If `compress` is set, files of at least `compression_min_size` bytes
+    without a bundled variant are compressed in memory, at
+    `compression_level`, for each encoding available (gzip, and brotli if
+    it's installed). Files in `uncompressible_content_types`, and those
+    compression doesn't shrink, are left alone.
+
+    `cache_control` is sent with every file if set, e.g.
+    `"public, max-age=86400"`.
+    """
+
+    def __init__(self, directory, prefix="/static", cache_control=None, compress=True,
+                 compression_level=9, compression_min_size=1024,
+                 uncompressible_content_types=DEFAULT_UNCOMPRESSIBLE_CONTENT_TYPES):
+        self.directory = os.path.abspath(directory)
+        self.prefix = prefix.rstrip("/")
+        self.cache_control = cache_control
+
+        self.compress = compress
+        self.compression_level = compression_level
+        self.compression_min_size = compression_min_size
+        self.uncompressible_content_types = ContentTypes(uncompressible_content_types)
+
+        # URL path => StaticFile.
+        self.files = {}
+        self.index()
+
+        # (Accept-Encoding, available encodings) => negotiated encoding.
+        self.negotiated_encodings = Memo(negotiate_variant, 64)
+
+        self.map_lock = threading.Lock()
+
+    def index(self):
+        for root, _, filenames in os.walk(self.directory):
+            filenames = set(filenames)
+            for filename in filenames:
+                # Variants are indexed with the file they're a variant of.
+                if any(
+                    filename.endswith(extension) and filename[:-len(extension)] in filenames
+                    for extension, _ in VARIANT_EXTENSIONS
+                ):
+                    continue
+
+                path = os.path.join(root, filename)
+                static_file = self.index_file(path)
+
+                for extension, encoding in VARIANT_EXTENSIONS:
+                    if filename + extension in filenames:
+                        variant = self.index_file(path + extension, encoding)
+                        variant.content_type = static_file.content_type
+                        static_file.variants[encoding] = variant
+
+                if self.compress:
+                    self.compress_file(static_file)
+
+                url_path = os.path.relpath(path, self.directory).replace(os.sep, "/")
+                self.files[self.prefix + "/" + url_path] = static_file
+
+    def index_file(self, filename, encoding=None):
+        with open(filename, "rb") as fileobj:
+            digest = hashlib.md5(fileobj.read()).hexdigest()
+
+        stat = os.stat(filename)
+        content_type, _ = mimetypes.guess_type(filename)
+        if content_type is not None and content_type.startswith("text/"):
+            content_type += "; charset=utf-8"
+
+        return StaticFile(
+            filename=filename,
+            content_type=content_type or "application/octet-stream",
+            size=stat.st_size,
+            etag=make_etag(digest, encoding),
+            last_modified=email.utils.formatdate(stat.st_mtime, usegmt=True)
+        )
+
+    def compress_file(self, static_file):
+        """
+        Adds a variant of `static_file`, compressed in memory, for each
+        available encoding it doesn't have a bundled variant for.
+        """
+
+        if (
+            static_file.size < self.compression_min_size or
+            static_file.content_type in self.uncompressible_content_types
+        ):
+            return
+
+        with open(static_file.filename, "rb") as fileobj:
+            data = fileobj.read()
+        digest = hashlib.md5(data).hexdigest()
+
+        for _, encoding in VARIANT_EXTENSIONS:
+            if encoding in static_file.variants or encoding not in COMPRESSORS:
+                continue
+
+            compressor = COMPRESSORS[encoding](self.compression_level)
+            compressed = compressor.compress(data) + compressor.flush()
+            if len(compressed) >= static_file.size:
+                continue
+
+            # Tagged as the handler would tag a response it compressed.
+            variant = StaticFile(
+                filename=None,
+                content_type=static_file.content_type,
+                size=len(compressed),
+                etag=make_etag(digest, encoding),
+                last_modified=static_file.last_modified
+            )
+            variant.data = compressed
+            static_file.variants[encoding] = variant
+
+    def find(self, path, accept_encoding=None):
+        """
+        Returns `(static_file, encoding)` for URL `path`, choosing the best
+        variant for `accept_encoding`, or None if there's no such file.
+        `encoding` is None for the file itself.
+        """
+
+        static_file = self.files.get(path)
+        if static_file is None:
+            return None
+
+        if not static_file.variants or not accept_encoding:
+            return static_file, None
+
+        encoding = self.negotiated_encodings[accept_encoding, tuple(sorted(static_file.variants))]
+        if encoding is None:
+            return static_file, None
+
+        return static_file.variants[encoding], encoding
+
+    def get_headers(self, static_file, original, encoding):
+        """
+        Returns the response headers for `static_file`, the variant of
+        `original` in `encoding`.
+        """
+
+        headers = [
+            ("Content-Type", static_file.content_type),
+            ("Content-Length", str(static_file.size)),
+            ("ETag", static_file.etag),
+            ("Last-Modified", static_file.last_modified),
+            ("Accept-Ranges", "bytes")
+        ]
+        if self.cache_control:
+            headers.append(("Cache-Control", self.cache_control))
+        if original.variants:
+            headers.append(("Vary", "Accept-Encoding"))
+        if encoding:
+            headers.append(("Content-Encoding", encoding))
+
+        return headers
+
+    def read(self, static_file, start=0, stop=None):
+        """
+        Returns the contents of `static_file`, or the `[start:stop]` slice of
+        them. The file is memory mapped the first time it's read, and the
+        mapping kept for later reads.
+        """
+
+        if static_file.data is not None:
+            return static_file.data[start:stop]
+
+        if static_file.size == 0:
+            return ""
+
+        static_file_map = static_file.map
+        if static_file_map is None:
+            with self.map_lock:
+                if static_file.map is None:
+                    with open(static_file.filename, "rb") as fileobj:
+                        static_file.map = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+                static_file_map = static_file.map
+
+        return static_file_map[start:stop]
+
+def negotiate_variant(key):
+    """
+    Returns the best encoding for `key`, an `(Accept-Encoding, encodings)`
+    pair, in `VARIANT_EXTENSIONS` order, or None.
+    """
+
+    accept_encoding, encodings = key
+    return negotiate_encoding(accept_encoding, [
+        encoding for _, encoding in VARIANT_EXTENSIONS if encoding in encodings
+    ])
@@ -0,0 +1,105 @@
+"""
+Per-request timings of each phase of handling an event.
+"""
+
+import json
+import time
+
+PHASES = ("parse", "app", "body", "serialize")
+
+class Timings(object):
+    """
+    How long a request spent in each phase, in seconds:
+
+    * `parse`: detecting the event format and building the environ, or
+      finding the response in the cache or static files.
+    * `app`: calling the app, up to it returning its iterable. Apps that
+      call `start_response` from a generator spend that time in `body`.
+    * `body`: iterating over the body, compressing and hashing it.
+    * `serialize`: building the Lambda response.
+
+    `cached` says whether the response came from the cache or static files,
+    skipping the app and body phases.
+
+    With a `GCPolicy`, `gc` is how long garbage collection took once the
+    response was built, `gc_generation` the generation collected and
+    `gc_collected` the objects found. Otherwise they're None.
+    """
+
+    __slots__ = PHASES + ("cached", "started", "last", "gc", "gc_generation", "gc_collected")
+
+    def __init__(self):
+        self.started = self.last = time.time()
+        self.cached = False
+        self.gc = self.gc_generation = self.gc_collected = None
+        for phase in PHASES:
+            setattr(self, phase, 0.0)
+
+    def mark(self, phase):
+        """
+        Ends `phase`, which began when the previous one ended.
+        """
+
+        now = time.time()
+        setattr(self, phase, now - self.last)
+        self.last = now
+
+    @property
+    def total(self):
+        return self.last - self.started
+
+    def as_dict(self):
+        """
+        Returns phase => milliseconds, plus `total`, and `gc` if garbage
+        collection was scheduled.
+        """
+
+        timings = {phase: getattr(self, phase) * 1000 for phase in PHASES}
+        timings["total"] = self.total * 1000
+        if self.gc is not None:
+            timings["gc"] = self.gc * 1000
+        return timings
+
+    def server_timing(self, phases=PHASES):
+        """
+        Returns a Server-Timing header value for `phases`.
+        """
+
+        return ", ".join(
+            "{};dur={:.3f}".format(phase, getattr(self, phase) * 1000)
+            for phase in phases
+        )
+
+    def emf(self, namespace, dimensions=None):
+        """
+        Returns a CloudWatch Embedded Metric Format log line, publishing each
+        phase and the total in milliseconds. `dimensions` is a dict of
+        dimension name => value.
+
+        <https://docs.aws.amazon.com/AmazonCloudWatch/latest/monitoring/CloudWatch_Embedded_Metric_Format_Specification.html>
+        """
+
+        dimensions = dimensions or {}
+        metrics = self.as_dict()
+
+        line = {
+            "_aws": {
+                "Timestamp": int(self.started * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": namespace,
+                    "Dimensions": [sorted(dimensions)],
+                    "Metrics": [
+                        {"Name": name, "Unit": "Milliseconds"}
+                        for name in sorted(metrics)
+                    ]
+                }]
+            },
+            "cached": self.cached
+        }
+        if self.gc is not None:
+            line["gc_generation"] = self.gc_generation
+            line["gc_collected"] = self.gc_collected
+        line.update(dimensions)
+        line.update(metrics)
+
+        return json.dumps(line, sort_keys=True)
@@ -0,0 +1,117 @@
+"""
+HTTP helpers shared across the package.
+"""
+
+import urllib
+
+class Memo(dict):
+    """
+    Remembers the results of `function`, a function of one hashable
+    argument: `memo[key]` is `function(key)`, worked out the first time
+    it's asked for.
+
+    Header values, statuses and query parameters repeat a lot between
+    requests, so this saves parsing them each time. The memo is emptied once
+    it holds `max_size` results, which is cheaper than working out which to
+    keep. Exceptions aren't remembered.
+    """
+
+    def __init__(self, function, max_size):
+        dict.__init__(self)
+        self.function = function
+        self.max_size = max_size
+
+    def __missing__(self, key):
+        value = self.function(key)
+        if len(self) >= self.max_size:
+            self.clear()
+        self[key] = value
+        return value
+
+class ContentTypes(object):
+    """
+    A set of content types, where entries ending "/*" match any subtype.
+    Parameters such as "; charset=utf-8" are ignored when matching.
+    """
+
+    def __init__(self, content_types):
+        # Split into exact matches and "type/*" prefixes up front, so
+        # matching needs no parsing per entry.
+        self.exact = frozenset(
+            content_type.lower() for content_type in content_types
+            if not content_type.endswith("/*")
+        )
+        self.prefixes = tuple(
+            content_type[:-1].lower() for content_type in content_types
+            if content_type.endswith("/*")
+        )
+
+        # Content-Type header => match result.
+        self.matches = Memo(self.match, 256)
+
+    def __contains__(self, content_type):
+        return self.matches[content_type]
+
+    def match(self, content_type):
+        """
+        Returns whether `content_type` is in the set, without the memo.
+        """
+
+        media_type = content_type.split(";", 1)[0].strip().lower()
+        return media_type in self.exact or media_type.startswith(self.prefixes)
+
+class EnvironHeaders(object):
+    """
+    Read-only view of the request headers in a WSGI environ, looked up by
+    lowercase header name.
+    """
+
+    def __init__(self, environ):
+        self.environ = environ
+
+    def get(self, name, default=None):
+        return self.environ.get("HTTP_" + name.upper().replace("-", "_"), default)
+
+def get_header(headers, name, default=None):
+    """
+    Returns the first value of header `name` from a list of
+    `(name, value)` tuples. `name` must be lowercase.
+    """
+
+    for header_name, value in headers:
+        if header_name.lower() == name:
+            return value
+
+    return default
+
+def remove_header(headers, name):
+    """
+    Removes all headers called `name` from a list of `(name, value)` tuples,
+    in place. `name` must be lowercase.
+    """
+
+    headers[:] = [
+        (header_name, value) for header_name, value in headers
+        if header_name.lower() != name
+    ]
+
+def add_vary(headers, field):
+    """
+    Adds `field` to the Vary header in a list of `(name, value)` tuples,
+    creating the header if needed.
+    """
+
+    for index, (header_name, value) in enumerate(headers):
+        if header_name.lower() == "vary":
+            fields = [item.strip().lower() for item in value.split(",")]
+            if field.lower() not in fields and "*" not in fields:
+                headers[index] = (header_name, "{}, {}".format(value, field))
+            return
+
+    headers.append(("Vary", field))
+
+# String => `urllib.quote_plus(string)`.
+QUOTED = Memo(urllib.quote_plus, 4096)
+
+# Memoized `urllib.quote_plus`.
+quote_plus = QUOTED.__getitem__
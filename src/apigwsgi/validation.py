@@ -0,0 +1,116 @@
+"""
+Checking what the app passes to `start_response`, at one of three levels:
+
+* "strict": everything PEP 3333 asks of the app - status line, header
+  names and values, and that the body is bytestrings. For staging.
+* "fast": the status line is parsed once per distinct status string, and
+  headers aren't checked. The default.
+* "off": the status code is taken from the first three characters. For
+  trusted, well-tested apps.
+"""
+
+import re
+
+from apigwsgi.utils import Memo
+
+VALIDATION_LEVELS = ("strict", "fast", "off")
+
+STATUS_RE = re.compile(r"^(\d+) .+$")
+
+# "The string must not contain control characters, and must not be
+#  terminated with a carriage return, linefeed, or combination thereof."
+STRICT_STATUS_RE = re.compile(r"(\d{3}) [^\x00-\x1f\x7f]+\Z")
+
+# RFC 7230 token.
+HEADER_NAME_RE = re.compile(r"[!#$%&'*+\-.^_`|~0-9A-Za-z]+\Z")
+
+# Control characters, other than tab.
+CONTROL_CHARACTER_RE = re.compile(r"[\x00-\x08\x0a-\x1f\x7f]")
+
+# "Applications and middleware are forbidden from using HTTP/1.1
+#  "hop-by-hop" features or headers [...]"
+HOP_BY_HOP_HEADERS = frozenset([
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailers",
+    "transfer-encoding",
+    "upgrade"
+])
+
+def parse_status(status):
+    """
+    Returns the status code from a status line, raising an exception if
+    it's malformed.
+    """
+
+    match = STATUS_RE.search(status)
+    if not match:
+        raise Exception("Application sent malformed status line {!r}".format(status))
+    return int(match.group(1))
+
+# Status string => status code.
+STATUS_CODES = Memo(parse_status, 256)
+
+# As `parse_status`, remembering the results.
+parse_status_cached = STATUS_CODES.__getitem__
+
+def parse_status_strict(status):
+    """
+    As `parse_status`, also requiring a three digit code and no control
+    characters.
+    """
+
+    if type(status) is not str:
+        raise Exception("Application sent status line of type {}, not str".format(type(status).__name__))
+
+    match = STRICT_STATUS_RE.match(status)
+    if not match:
+        raise Exception("Application sent malformed status line {!r}".format(status))
+    return int(match.group(1))
+
+def validate_headers(response_headers):
+    """
+    Raises an exception if `response_headers` isn't a list of
+    `(header_name, header_value)` string tuples, a name isn't a valid
+    token or is hop-by-hop, or a value contains control characters.
+    """
+
+    if type(response_headers) is not list:
+        raise Exception("Application sent headers of type {}, not list".format(type(response_headers).__name__))
+
+    for header in response_headers:
+        if type(header) is not tuple or len(header) != 2:
+            raise Exception("Application sent header {!r}, not a (name, value) tuple".format(header))
+
+        name, value = header
+        if type(name) is not str or not HEADER_NAME_RE.match(name):
+            raise Exception("Application sent invalid header name {!r}".format(name))
+        if name.lower() in HOP_BY_HOP_HEADERS:
+            raise Exception("Application sent hop-by-hop header {!r}".format(name))
+        if type(value) is not str or CONTROL_CHARACTER_RE.search(value):
+            raise Exception("Application sent invalid value {!r} for header {!r}".format(value, name))
+
+def validate_exc_info(exc_info):
+    # "The exc_info argument, if supplied, must be a Python sys.exc_info()
+    #  tuple."
+    if exc_info and (type(exc_info) is not tuple or len(exc_info) != 3):
+        raise Exception("exc_info must be a sys.exc_info() tuple, not {!r}".format(exc_info))
+
+def validate_bytestring(bytestring):
+    # "When called by the server, the application object must return an
+    #  iterable yielding zero or more bytestrings."
+    if type(bytestring) is not str:
+        raise Exception("Application sent body chunk of type {}, not str".format(type(bytestring).__name__))
+
+def validate_chunks(chunks):
+    """
+    Yields the body `chunks`, raising an exception for any that aren't
+    bytestrings.
+    """
+
+    for bytestring in chunks:
+        validate_bytestring(bytestring)
+        yield bytestring
@@ -0,0 +1,58 @@
+"""
+Warmup pings and init-time warmup requests.
+
+A warmup event is one sent only to keep a Lambda container warm. The
+handler recognises them with predicates - functions taking an event and
+returning whether it's a warmup - and answers them without calling the app.
+"""
+
+import urlparse
+
+# What the handler returns for warmup events. Scheduled events ignore it.
+WARMUP_RESPONSE = {"warmup": True}
+
+def is_scheduled_event(event):
+    """
+    CloudWatch Events / EventBridge scheduled rules.
+    """
+
+    return event.get("source") == "aws.events" and event.get("detail-type") == "Scheduled Event"
+
+def is_warmup_payload(event):
+    """
+    A custom `{"warmup": true}` payload, as sent by e.g.
+    serverless-plugin-warmup.
+    """
+
+    return event.get("warmup") is True or event.get("source") == "serverless-plugin-warmup"
+
+DEFAULT_WARMUP_EVENTS = (
+    is_scheduled_event,
+    is_warmup_payload
+)
+
+def make_warmup_event(request):
+    """
+    Returns a REST API event for a warmup request - either a path, which is
+    requested with GET, or a `(method, path)` tuple.
+    """
+
+    if isinstance(request, basestring):
+        method, path = "GET", request
+    else:
+        method, path = request
+
+    # REST API events carry the query string decoded.
+    path, _, query = path.partition("?")
+    query_params = dict(urlparse.parse_qsl(query))
+
+    return {
+        "httpMethod": method,
+        "path": path,
+        "queryStringParameters": query_params or None,
+        "headers": {
+            "Host": "localhost",
+            "User-Agent": "apigwsgi-warmup"
+        },
+        "body": None
+    }
@@ -0,0 +1,83 @@
+"""
+Fixtures shared by the tests.
+"""
+
+import base64
+
+REQUEST_ID = "c6af9ac6-7b61-11e6-9a41-93e8deadbeef"
+
+class DummyContext(object):
+    """
+    Stands in for the Lambda context object.
+    """
+
+    def __init__(self, aws_request_id=REQUEST_ID):
+        self.aws_request_id = aws_request_id
+
+def make_event(path="/", method="GET", headers=None, query=None, body=None, base64_encoded=False):
+    """
+    Returns a REST API event as API Gateway sends it, with `headers` (a dict
+    of name => value, or list of `(name, value)` tuples for repeated
+    headers) and `query` (a dict of key => value) in both their single and
+    multi-value forms. `body` is base64 encoded if `base64_encoded` is set.
+    """
+
+    header_items = [("Host", "localhost")]
+    if isinstance(headers, dict):
+        header_items.extend(headers.items())
+    elif headers:
+        header_items.extend(headers)
+
+    multi_value_headers = {}
+    for name, value in header_items:
+        multi_value_headers.setdefault(name, []).append(value)
+
+    if base64_encoded and body is not None:
+        body = base64.b64encode(body)
+
+    return {
+        "resource": "/{proxy+}",
+        "path": path,
+        "httpMethod": method,
+        "headers": {name: values[-1] for name, values in multi_value_headers.iteritems()},
+        "multiValueHeaders": multi_value_headers,
+        "queryStringParameters": dict(query) if query else None,
+        "multiValueQueryStringParameters": {
+            key: [value] for key, value in query.iteritems()
+        } if query else None,
+        "requestContext": {
+            "httpMethod": method,
+            "path": path,
+            "requestId": REQUEST_ID,
+            "stage": "prod"
+        },
+        "body": body,
+        "isBase64Encoded": base64_encoded
+    }
+
+def make_app(chunks=("OK",), headers=(("Content-Type", "text/plain"),), status="200 OK"):
+    """
+    Returns a WSGI app that responds with `status`, `headers` and `chunks`,
+    counting its calls in `app.calls`. `chunks` may be a function of the
+    environ.
+    """
+
+    def app(environ, start_response):
+        app.calls += 1
+        start_response(status, list(headers))
+        return list(chunks(environ) if callable(chunks) else chunks)
+    app.calls = 0
+    return app
+
+def get_headers(response):
+    """
+    Returns a Lambda response's headers as a dict of name => value, joining
+    repeated headers with commas.
+    """
+
+    if "multiValueHeaders" in response:
+        return {
+            name: ", ".join(values)
+            for name, values in response["multiValueHeaders"].iteritems()
+        }
+    return dict(response.get("headers") or {})
@@ -0,0 +1,9 @@
+"""
+App imported by `test_importing`. Not imported until a handler needs it.
+"""
+
+import json
+
+def app(environ, start_response):
+    start_response("200 Ok", [("Content-Type", "application/json")])
+    return [json.dumps({"path": environ["PATH_INFO"]})]
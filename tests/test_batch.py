@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+import unittest
+
+from apigwsgi import Handler
+from tests.helpers import DummyContext, get_headers, make_event
+
+def app(environ, start_response):
+    path = environ["PATH_INFO"]
+    if path == "/fail":
+        raise ValueError("Failed")
+
+    app.threads.add(threading.current_thread().ident)
+    app.multithread = environ["wsgi.multithread"]
+    time.sleep(0.01)
+
+    start_response("200 Ok", [("Content-Type", "text/plain")])
+    return [path]
+
+class BatchTestCase(unittest.TestCase):
+    def setUp(self):
+        app.threads = set()
+        self.devnull = open(os.devnull, "w")
+
+    def tearDown(self):
+        self.devnull.close()
+
+    def make_handler(self, **kwargs):
+        handler = Handler(app, **kwargs)
+        handler.environ_template["wsgi.errors"] = self.devnull
+        return handler
+
+    def test_sequential(self):
+        """
+        Test batches are handled in order, in the calling thread, by default.
+        """
+
+        handler = self.make_handler()
+        results = handler.batch([make_event("/1"), make_event("/2")], DummyContext())
+
+        self.assertEqual([result["body"] for result in results], ["/1", "/2"])
+        self.assertEqual(app.threads, set([threading.current_thread().ident]))
+        self.assertFalse(app.multithread)
+
+    def test_concurrent(self):
+        """
+        Test batches are handled by a thread pool if configured, with
+        responses in the order of the events.
+        """
+
+        handler = self.make_handler(batch_workers=4)
+        paths = ["/{}".format(index) for index in xrange(12)]
+        results = handler.batch([make_event(path) for path in paths], DummyContext())
+
+        self.assertEqual([result["body"] for result in results], paths)
+        self.assertGreater(len(app.threads), 1)
+        self.assertNotIn(threading.current_thread().ident, app.threads)
+        self.assertTrue(app.multithread)
+
+    def test_errors(self):
+        """
+        Test events that fail get a 500 without affecting the others.
+        """
+
+        for batch_workers in [1, 4]:
+            handler = self.make_handler(batch_workers=batch_workers)
+            results = handler.batch([
+                make_event("/1"),
+                make_event("/fail"),
+                {"unrecognised": "event"},
+                make_event("/2")
+            ], DummyContext())
+
+            self.assertEqual([result["statusCode"] for result in results], [200, 500, 500, 200])
+            self.assertEqual(get_headers(results[1]), {"Content-Type": "text/plain"})
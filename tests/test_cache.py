@@ -0,0 +1,159 @@
+import unittest
+
+from apigwsgi import Handler, ResponseCache
+from apigwsgi.body import Response
+from tests.helpers import DummyContext, get_headers, make_app, make_event
+
+def make_path_app(headers):
+    return make_app(lambda environ: ["Hello world ", environ["PATH_INFO"]], headers)
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def make_response(self, body="x", cache_control="max-age=60", headers=()):
+        return Response(200, "200 Ok", [("Cache-Control", cache_control)] + list(headers), body)
+
+    def test_lifetime(self):
+        """
+        Test Cache-Control decides whether and how long responses are cached.
+        """
+
+        cache = ResponseCache()
+        self.assertEqual(cache.get_lifetime(self.make_response(cache_control="max-age=60"), {}), 60)
+        self.assertEqual(cache.get_lifetime(self.make_response(cache_control="max-age=60, s-maxage=10"), {}), 10)
+        self.assertIsNone(cache.get_lifetime(self.make_response(cache_control="no-store, max-age=60"), {}))
+        self.assertIsNone(cache.get_lifetime(self.make_response(cache_control="private, max-age=60"), {}))
+        self.assertIsNone(cache.get_lifetime(self.make_response(cache_control="public"), {}))
+        self.assertIsNone(cache.get_lifetime(self.make_response(headers=[("Set-Cookie", "a=1")]), {}))
+        self.assertIsNone(cache.get_lifetime(self.make_response(headers=[("Vary", "*")]), {}))
+        self.assertIsNone(cache.get_lifetime(self.make_response(), {"authorization": "Bearer x"}))
+        self.assertEqual(cache.get_lifetime(self.make_response(cache_control="public, max-age=60"), {"authorization": "Bearer x"}), 60)
+
+    def test_evicts_by_entries(self):
+        """
+        Test the least recently used entry is evicted past `max_entries`.
+        """
+
+        cache = ResponseCache(max_entries=2)
+        cache.put("a", {}, self.make_response())
+        cache.put("b", {}, self.make_response())
+        cache.get("a", {})
+        cache.put("c", {}, self.make_response())
+
+        self.assertIsNotNone(cache.get("a", {}))
+        self.assertIsNone(cache.get("b", {}))
+        self.assertIsNotNone(cache.get("c", {}))
+        self.assertEqual(cache.evictions, 1)
+
+    def test_evicts_by_bytes(self):
+        """
+        Test entries are evicted past `max_bytes`, and oversized responses
+        aren't stored.
+        """
+
+        cache = ResponseCache(max_bytes=10)
+        cache.put("a", {}, self.make_response("x" * 6))
+        cache.put("b", {}, self.make_response("x" * 6))
+        cache.put("c", {}, self.make_response("x" * 11))
+
+        self.assertIsNone(cache.get("a", {}))
+        self.assertIsNotNone(cache.get("b", {}))
+        self.assertIsNone(cache.get("c", {}))
+        self.assertEqual(cache.size, 6)
+
+    def test_expiry(self):
+        """
+        Test expired entries aren't returned.
+        """
+
+        cache = ResponseCache()
+        cache.put("a", {}, self.make_response())
+        cache.entries.values()[0].expires = 0
+        self.assertIsNone(cache.get("a", {}))
+        self.assertEqual(cache.size, 0)
+
+    def test_vary(self):
+        """
+        Test responses are keyed by the request headers in their Vary.
+        """
+
+        cache = ResponseCache()
+        response = self.make_response(headers=[("Vary", "Accept-Language")])
+        cache.put("a", {"accept-language": "en"}, response)
+
+        self.assertEqual(cache.get_vary("a"), ("accept-language",))
+        self.assertIs(cache.get("a", {"accept-language": "en"}), response)
+        self.assertIsNone(cache.get("a", {"accept-language": "fr"}))
+
+class HandlerTestCase(unittest.TestCase):
+    def test_hit_skips_app(self):
+        """
+        Test cached responses are returned without calling the app.
+        """
+
+        app = make_path_app([("Content-Type", "text/plain"), ("Cache-Control", "max-age=60")])
+        handler = Handler(app, cache=ResponseCache())
+
+        first = handler(make_event(), DummyContext())
+        second = handler(make_event(), DummyContext())
+        other = handler(make_event("/other"), DummyContext())
+
+        self.assertEqual(first, second)
+        self.assertEqual(other["body"], "Hello world /other")
+        self.assertEqual(app.calls, 2)
+        self.assertEqual((handler.cache.hits, handler.cache.misses), (1, 2))
+
+    def test_uncacheable_responses(self):
+        """
+        Test responses without a max-age, and non-GET requests, aren't cached.
+        """
+
+        app = make_path_app([("Content-Type", "text/plain")])
+        handler = Handler(app, cache=ResponseCache())
+        handler(make_event(), DummyContext())
+        handler(make_event(), DummyContext())
+        self.assertEqual(app.calls, 2)
+
+        app = make_path_app([("Content-Type", "text/plain"), ("Cache-Control", "max-age=60")])
+        handler = Handler(app, cache=ResponseCache())
+        handler(make_event(method="POST"), DummyContext())
+        handler(make_event(method="POST"), DummyContext())
+        self.assertEqual(app.calls, 2)
+
+    def test_request_no_cache(self):
+        """
+        Test requests with `Cache-Control: no-cache` bypass the cache.
+        """
+
+        app = make_path_app([("Content-Type", "text/plain"), ("Cache-Control", "max-age=60")])
+        handler = Handler(app, cache=ResponseCache())
+        handler(make_event(), DummyContext())
+        handler(make_event(headers={"Cache-Control": "no-cache"}), DummyContext())
+        self.assertEqual(app.calls, 2)
+
+    def test_vary(self):
+        """
+        Test the request headers in Vary are part of the key.
+        """
+
+        app = make_path_app([("Content-Type", "text/plain"), ("Cache-Control", "max-age=60"), ("Vary", "Accept-Language")])
+        handler = Handler(app, cache=ResponseCache())
+        handler(make_event(headers={"Accept-Language": "en"}), DummyContext())
+        handler(make_event(headers={"accept-language": "en"}), DummyContext())
+        handler(make_event(headers={"Accept-Language": "fr"}), DummyContext())
+        self.assertEqual(app.calls, 2)
+
+    def test_head_and_conditional_hits(self):
+        """
+        Test HEAD and conditional requests are answered from the cache.
+        """
+
+        app = make_path_app([("Content-Type", "text/plain"), ("Cache-Control", "max-age=60")])
+        handler = Handler(app, cache=ResponseCache(), etags=True)
+        etag = get_headers(handler(make_event(), DummyContext()))["ETag"]
+
+        head = handler(make_event(method="HEAD"), DummyContext())
+        self.assertEqual(head["body"], "")
+        self.assertEqual(get_headers(head)["ETag"], etag)
+
+        conditional = handler(make_event(headers={"If-None-Match": etag}), DummyContext())
+        self.assertEqual(conditional["statusCode"], 304)
+        self.assertEqual(app.calls, 1)
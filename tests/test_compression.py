@@ -0,0 +1,152 @@
+import base64
+import unittest
+import zlib
+
+from apigwsgi import Handler
+from apigwsgi.compression import ResponseCompressor, negotiate_encoding
+from tests.helpers import DummyContext, get_headers, make_app, make_event
+
+def make_gzip_event(accept_encoding="gzip, deflate", method="GET"):
+    return make_event(method=method, headers={"Accept-Encoding": accept_encoding})
+
+class NegotiationTestCase(unittest.TestCase):
+    def test_preference_order(self):
+        """
+        Test the first acceptable encoding in preference order is chosen.
+        """
+
+        self.assertEqual(negotiate_encoding("deflate, gzip", ["gzip", "deflate"]), "gzip")
+        self.assertEqual(negotiate_encoding("deflate", ["gzip", "deflate"]), "deflate")
+        self.assertEqual(negotiate_encoding("identity", ["gzip", "deflate"]), None)
+
+    def test_quality_values(self):
+        """
+        Test q-values, including q=0 and wildcards.
+        """
+
+        self.assertEqual(negotiate_encoding("gzip;q=0.5, deflate", ["gzip", "deflate"]), "deflate")
+        self.assertEqual(negotiate_encoding("gzip;q=0, *", ["gzip", "deflate"]), "deflate")
+        self.assertEqual(negotiate_encoding("*;q=0", ["gzip", "deflate"]), None)
+
+class ResponseCompressorTestCase(unittest.TestCase):
+    def test_small_bodies_are_not_compressed(self):
+        """
+        Test bodies under `min_size` are returned as-is.
+        """
+
+        compressor = ResponseCompressor("gzip", 6, 100)
+        output = compressor.compress("a" * 10) + compressor.compress("b" * 10) + compressor.flush()
+        self.assertEqual(output, "a" * 10 + "b" * 10)
+        self.assertFalse(compressor.compressed)
+
+    def test_compression_starts_at_min_size(self):
+        """
+        Test compression starts once `min_size` bytes have been written.
+        """
+
+        compressor = ResponseCompressor("deflate", 6, 100)
+        output = "".join(compressor.compress("x" * 60) for _ in xrange(5)) + compressor.flush()
+        self.assertTrue(compressor.compressed)
+        self.assertEqual(zlib.decompress(output), "x" * 300)
+
+class HandlerTestCase(unittest.TestCase):
+    def test_gzip_response(self):
+        """
+        Test responses are gzipped, base64 encoded and labelled.
+        """
+
+        app = make_app(["Hello world " * 200] * 3, [
+            ("Content-Type", "application/json"),
+            ("Content-Length", "7200")
+        ])
+        result = Handler(app, compression=True)(make_gzip_event(), DummyContext())
+
+        self.assertEqual(get_headers(result), {
+            "Content-Type": "application/json",
+            "Content-Encoding": "gzip",
+            "Vary": "Accept-Encoding"
+        })
+        self.assertTrue(result["isBase64Encoded"])
+        body = zlib.decompress(base64.b64decode(result["body"]), 16 + zlib.MAX_WBITS)
+        self.assertEqual(body, "Hello world " * 600)
+
+    def test_head(self):
+        """
+        Test HEAD responses get the same headers as GET, without the body.
+        """
+
+        app = make_app(["Hello world " * 200], [("Content-Type", "text/plain")])
+        handler = Handler(app, compression=True, etags=True)
+        get = handler(make_gzip_event(), DummyContext())
+        head = handler(make_gzip_event(method="HEAD"), DummyContext())
+
+        self.assertEqual(get_headers(head), get_headers(get))
+        self.assertEqual(get_headers(head)["Content-Encoding"], "gzip")
+        self.assertEqual(get_headers(head)["Vary"], "Accept-Encoding")
+        self.assertTrue(get_headers(head)["ETag"].endswith('-gzip"'))
+        self.assertEqual(head["body"], "")
+
+    def test_compression_is_off_by_default(self):
+        """
+        Test responses aren't compressed unless `compression` is set.
+        """
+
+        app = make_app(["x" * 2000], [("Content-Type", "text/plain")])
+        result = Handler(app)(make_gzip_event(), DummyContext())
+        self.assertEqual(result["body"], "x" * 2000)
+
+    def test_small_responses_are_not_compressed(self):
+        """
+        Test responses under `compression_min_size` are sent as-is.
+        """
+
+        app = make_app(["x" * 100], [("Content-Type", "text/plain")])
+        result = Handler(app, compression=True, compression_min_size=200)(make_gzip_event(), DummyContext())
+        self.assertEqual(result, {
+            "statusCode": 200,
+            "multiValueHeaders": {
+                "Content-Type": ["text/plain"],
+                "Vary": ["Accept-Encoding"]
+            },
+            "body": "x" * 100
+        })
+
+    def test_uncompressible_content_types_are_skipped(self):
+        """
+        Test already-compressed content types are sent as-is.
+        """
+
+        app = make_app(["x" * 2000], [("Content-Type", "image/png")])
+        result = Handler(app, compression=True)(make_gzip_event(), DummyContext())
+        self.assertNotIn("Content-Encoding", get_headers(result))
+        self.assertEqual(base64.b64decode(result["body"]), "x" * 2000)
+
+    def test_encoded_responses_are_skipped(self):
+        """
+        Test responses that already have a Content-Encoding are sent as-is.
+        """
+
+        app = make_app(["x" * 2000], [("Content-Type", "text/plain"), ("Content-Encoding", "identity")])
+        result = Handler(app, compression=True)(make_gzip_event(), DummyContext())
+        self.assertEqual(get_headers(result)["Content-Encoding"], "identity")
+        self.assertEqual(result["body"], "x" * 2000)
+
+    def test_unacceptable_encodings_are_skipped(self):
+        """
+        Test responses are sent as-is if the client doesn't accept any of our
+        encodings.
+        """
+
+        app = make_app(["x" * 2000], [("Content-Type", "text/plain")])
+        result = Handler(app, compression=True)(make_gzip_event("identity"), DummyContext())
+        self.assertNotIn("Content-Encoding", get_headers(result))
+        self.assertEqual(result["body"], "x" * 2000)
+
+    def test_vary_is_merged(self):
+        """
+        Test Accept-Encoding is added to an existing Vary header.
+        """
+
+        app = make_app(["x" * 100], [("Content-Type", "text/plain"), ("Vary", "Cookie")])
+        result = Handler(app, compression=True)(make_gzip_event(), DummyContext())
+        self.assertEqual(get_headers(result)["Vary"], "Cookie, Accept-Encoding")
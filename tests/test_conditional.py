@@ -0,0 +1,153 @@
+import hashlib
+import unittest
+
+from apigwsgi import Handler
+from apigwsgi.conditional import is_not_modified
+from tests.helpers import DummyContext, get_headers, make_app, make_event
+
+def make_hello_app(headers, status="200 Ok"):
+    return make_app(["Hello ", "world"], headers, status)
+
+ETAG = '"{}"'.format(hashlib.md5("Hello world").hexdigest())
+
+class IsNotModifiedTestCase(unittest.TestCase):
+    def test_if_none_match(self):
+        """
+        Test If-None-Match uses weak comparison, and handles lists and `*`.
+        """
+
+        self.assertTrue(is_not_modified('"a"', None, ['"a"'], None))
+        self.assertTrue(is_not_modified('W/"a"', None, ['"a"'], None))
+        self.assertTrue(is_not_modified('"b", "a"', None, ['"a"'], None))
+        self.assertTrue(is_not_modified('*', None, ['"a"'], None))
+        self.assertFalse(is_not_modified('"b"', None, ['"a"'], None))
+
+    def test_if_modified_since(self):
+        """
+        Test If-Modified-Since is compared with Last-Modified, and ignored if
+        If-None-Match is sent.
+        """
+
+        last_modified = "Wed, 21 Oct 2015 07:28:00 GMT"
+        self.assertTrue(is_not_modified(None, "Wed, 21 Oct 2015 07:28:00 GMT", [], last_modified))
+        self.assertTrue(is_not_modified(None, "Thu, 22 Oct 2015 07:28:00 GMT", [], last_modified))
+        self.assertFalse(is_not_modified(None, "Tue, 20 Oct 2015 07:28:00 GMT", [], last_modified))
+        self.assertFalse(is_not_modified(None, "garbage", [], last_modified))
+        self.assertFalse(is_not_modified('"b"', "Thu, 22 Oct 2015 07:28:00 GMT", ['"a"'], last_modified))
+
+class HandlerTestCase(unittest.TestCase):
+    def test_etag_added(self):
+        """
+        Test an ETag is generated for 200 GET responses.
+        """
+
+        app = make_hello_app([("Content-Type", "text/plain")])
+        result = Handler(app, etags=True)(make_event(), DummyContext())
+        self.assertEqual(result, {
+            "statusCode": 200,
+            "multiValueHeaders": {
+                "Content-Type": ["text/plain"],
+                "ETag": [ETAG]
+            },
+            "body": "Hello world"
+        })
+
+    def test_etag_not_added(self):
+        """
+        Test ETags aren't generated when disabled, for other methods and
+        statuses, or if the app set one.
+        """
+
+        app = make_hello_app([("Content-Type", "text/plain")])
+        self.assertNotIn("ETag", get_headers(Handler(app)(make_event(), DummyContext())))
+        self.assertNotIn("ETag", get_headers(Handler(app, etags=True)(make_event(method="POST"), DummyContext())))
+
+        app = make_hello_app([("Content-Type", "text/plain")], status="404 Not Found")
+        self.assertNotIn("ETag", get_headers(Handler(app, etags=True)(make_event(), DummyContext())))
+
+        app = make_hello_app([("Content-Type", "text/plain"), ("ETag", '"mine"')])
+        self.assertEqual(get_headers(Handler(app, etags=True)(make_event(), DummyContext()))["ETag"], '"mine"')
+
+    def test_not_modified(self):
+        """
+        Test a matching If-None-Match gets a bodyless 304.
+        """
+
+        app = make_hello_app([("Content-Type", "text/plain"), ("Cache-Control", "max-age=60")])
+        event = make_event(headers={"If-None-Match": ETAG})
+        result = Handler(app, etags=True)(event, DummyContext())
+        self.assertEqual(result, {
+            "statusCode": 304,
+            "multiValueHeaders": {
+                "Cache-Control": ["max-age=60"],
+                "ETag": [ETAG]
+            },
+            "body": ""
+        })
+
+    def test_not_modified_since(self):
+        """
+        Test If-Modified-Since is compared against Last-Modified.
+        """
+
+        last_modified = "Wed, 21 Oct 2015 07:28:00 GMT"
+        app = make_hello_app([("Content-Type", "text/plain"), ("Last-Modified", last_modified)])
+        event = make_event(headers={"If-Modified-Since": last_modified})
+        result = Handler(app, etags=True)(event, DummyContext())
+        self.assertEqual(result["statusCode"], 304)
+
+    def test_compressed_etag(self):
+        """
+        Test compressed responses get their own ETag, and either ETag
+        revalidates them.
+        """
+
+        app = make_hello_app([("Content-Type", "text/plain")])
+        handler = Handler(app, etags=True, compression=True, compression_min_size=0)
+        event = make_event(headers={"Accept-Encoding": "gzip"})
+
+        result = handler(event, DummyContext())
+        compressed_etag = ETAG[:-1] + '-gzip"'
+        self.assertEqual(get_headers(result)["ETag"], compressed_etag)
+
+        for etag in [ETAG, compressed_etag]:
+            event = make_event(headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+            self.assertEqual(handler(event, DummyContext())["statusCode"], 304)
+
+    def test_head_body_stripped(self):
+        """
+        Test HEAD responses have their body removed, but keep their ETag.
+        """
+
+        app = make_hello_app([("Content-Type", "text/plain"), ("Content-Length", "11")])
+        result = Handler(app, etags=True)(make_event(method="HEAD"), DummyContext())
+        self.assertEqual(result, {
+            "statusCode": 200,
+            "multiValueHeaders": {
+                "Content-Type": ["text/plain"],
+                "Content-Length": ["11"],
+                "ETag": [ETAG]
+            },
+            "body": ""
+        })
+
+    def test_head_without_body(self):
+        """
+        Test HEAD responses the app sent without a body don't get the empty
+        body's ETag, which wouldn't match the GET response's.
+        """
+
+        def app(environ, start_response):
+            start_response("200 OK", [("Content-Type", "text/plain")])
+            return [] if environ["REQUEST_METHOD"] == "HEAD" else ["Hello ", "world"]
+
+        for options in [{}, {"compression": True, "compression_min_size": 0}]:
+            handler = Handler(app, etags=True, **options)
+            self.assertEqual(get_headers(handler(make_event(), DummyContext()))["ETag"], ETAG)
+
+            result = handler(make_event(method="HEAD"), DummyContext())
+            self.assertNotIn("ETag", get_headers(result))
+
+            result = handler(make_event(method="HEAD", headers={"If-None-Match": ETAG}), DummyContext())
+            self.assertEqual(result["statusCode"], 200)
+            self.assertNotIn("ETag", get_headers(result))
@@ -0,0 +1,162 @@
+import httplib
+import json
+import os
+import tempfile
+import threading
+import unittest
+import urllib2
+import wsgiref.util
+
+from apigwsgi import Handler
+from apigwsgi.devserver import DevServer, ReplayResults, RequestHandler, read_events, replay
+from tests.helpers import make_event
+
+class QuietRequestHandler(RequestHandler):
+    def log_message(self, *args):
+        pass
+
+def app(environ, start_response):
+    body = json.dumps({
+        "method": environ["REQUEST_METHOD"],
+        "path": environ["PATH_INFO"],
+        "query": environ["QUERY_STRING"],
+        "cookie": environ.get("HTTP_COOKIE"),
+        "body": environ["wsgi.input"].read()
+    }, sort_keys=True)
+    start_response("201 Created", [
+        ("Content-Type", "application/json"),
+        ("Set-Cookie", "a=1"),
+        ("Set-Cookie", "b=2")
+    ])
+    return [body]
+
+def redirect_app(environ, start_response):
+    location = wsgiref.util.request_uri(environ, include_query=False) + "/new"
+    start_response("302 Found", [("Location", str(location))])
+    return [str("{} {}".format(environ["wsgi.url_scheme"], environ["SERVER_PORT"]))]
+
+class DevServerTestCase(unittest.TestCase):
+    def request(self, event_format, *args):
+        server = DevServer(("127.0.0.1", 0), Handler(app), event_format)
+        server.RequestHandlerClass = QuietRequestHandler
+        thread = threading.Thread(target=server.handle_request)
+        thread.start()
+        try:
+            request = urllib2.Request("http://127.0.0.1:{}/items/1?x=1&x=2".format(server.server_address[1]), *args)
+            request.add_header("Cookie", "session=abc")
+            return urllib2.urlopen(request)
+        finally:
+            thread.join()
+            server.server_close()
+
+    def test_serve(self):
+        """
+        Test requests are sent through the handler, for each event format.
+        """
+
+        for event_format in ["rest", "http"]:
+            response = self.request(event_format, "Hello")
+
+            self.assertEqual(response.getcode(), 201)
+            self.assertEqual(response.info().getheaders("Set-Cookie"), ["a=1", "b=2"])
+            self.assertEqual(json.loads(response.read()), {
+                "method": "POST",
+                "path": "/items/1",
+                "query": "x=1&x=2",
+                "cookie": "session=abc",
+                "body": "Hello"
+            }, event_format)
+
+    def test_redirect(self):
+        """
+        Test the app sees the server's scheme and port, and can build
+        absolute URLs from them.
+        """
+
+        for event_format in ["rest", "http"]:
+            server = DevServer(("127.0.0.1", 0), Handler(redirect_app), event_format)
+            server.RequestHandlerClass = QuietRequestHandler
+            port = server.server_address[1]
+            thread = threading.Thread(target=server.handle_request)
+            thread.start()
+            try:
+                connection = httplib.HTTPConnection("127.0.0.1", port)
+                connection.request("GET", "/old", headers={"X-Forwarded-Proto": "https"})
+                response = connection.getresponse()
+                body = response.read()
+                connection.close()
+            finally:
+                thread.join()
+                server.server_close()
+
+            self.assertEqual(response.status, 302)
+            self.assertEqual(response.getheader("Location"), "http://127.0.0.1:{}/old/new".format(port), event_format)
+            self.assertEqual(body, "http {}".format(port))
+
+class ReplayTestCase(unittest.TestCase):
+    def test_replay(self):
+        """
+        Test recorded events are replayed, and latencies reported.
+        """
+
+        event = {
+            "httpMethod": "GET",
+            "path": "/",
+            "queryStringParameters": None,
+            "headers": {
+                "Host": "localhost"
+            },
+            "body": None
+        }
+
+        fd, filename = tempfile.mkstemp(suffix=".jsonl")
+        try:
+            with os.fdopen(fd, "w") as fileobj:
+                fileobj.write(json.dumps(event) + "\n\n" + json.dumps(event) + "\n")
+            events = read_events(filename)
+        finally:
+            os.remove(filename)
+
+        results = replay(Handler(app), events, concurrency=2, repeat=3)
+        self.assertEqual(len(results.latencies), 6)
+        self.assertEqual(dict(results.statuses), {201: 6})
+
+        with open(os.devnull, "w") as devnull:
+            results.report(devnull)
+
+    def test_replay_processes(self):
+        """
+        Test concurrent replays call the app in separate processes, one
+        event at a time each.
+        """
+
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+
+        def recording_app(environ, start_response):
+            with open(filename, "a") as fileobj:
+                fileobj.write("{} {}\n".format(os.getpid(), environ["wsgi.multithread"]))
+            return app(environ, start_response)
+
+        try:
+            results = replay(Handler(recording_app), [make_event()], concurrency=2, repeat=6)
+            with open(filename) as fileobj:
+                calls = [line.split() for line in fileobj]
+        finally:
+            os.remove(filename)
+
+        self.assertEqual(dict(results.statuses), {201: 6})
+        self.assertEqual(len(calls), 6)
+        self.assertNotIn(str(os.getpid()), [pid for pid, _ in calls])
+        self.assertEqual(set(multithread for _, multithread in calls), {"False"})
+
+    def test_percentile(self):
+        """
+        Test percentiles use the nearest rank.
+        """
+
+        results = ReplayResults([0.001 * index for index in xrange(1, 101)], [200] * 100, 1.0)
+        self.assertAlmostEqual(results.percentile(50), 0.05)
+        self.assertAlmostEqual(results.percentile(99), 0.099)
+        self.assertAlmostEqual(results.percentile(100), 0.1)
+        self.assertAlmostEqual(ReplayResults([0.5], [200], 1.0).percentile(99), 0.5)
@@ -0,0 +1,83 @@
+import sys
+import unittest
+
+from apigwsgi import Dispatcher, Handler
+from tests.helpers import DummyContext, make_app, make_event
+
+def make_named_app(name):
+    return make_app(lambda environ: ["{} {!r} {!r}".format(name, environ["SCRIPT_NAME"], environ["PATH_INFO"])])
+
+class DispatcherTestCase(unittest.TestCase):
+    def setUp(self):
+        sys.modules.pop("tests.lazy_app", None)
+
+    def test_dispatch(self):
+        """
+        Test requests go to the app at the longest matching prefix, with
+        SCRIPT_NAME and PATH_INFO split between them.
+        """
+
+        handler = Handler(Dispatcher({
+            "/": make_named_app("root"),
+            "/api": make_named_app("api"),
+            "/api/admin/": make_named_app("admin")
+        }))
+
+        for path, body in [
+            ("/", "root '' '/'"),
+            ("/about", "root '' '/about'"),
+            ("/api", "api '/api' ''"),
+            ("/api/", "api '/api' '/'"),
+            ("/api/users/1", "api '/api' '/users/1'"),
+            ("/apis", "root '' '/apis'"),
+            ("/api/admin/users", "admin '/api/admin' '/users'")
+        ]:
+            result = handler(make_event(path), DummyContext())
+            self.assertEqual(result["body"], body, path)
+
+    def test_not_found(self):
+        """
+        Test unmatched requests get a 404, or the default app.
+        """
+
+        mounts = {"/api": make_named_app("api")}
+
+        result = Handler(Dispatcher(mounts))(make_event("/other"), DummyContext())
+        self.assertEqual(result["statusCode"], 404)
+
+        result = Handler(Dispatcher(mounts, default=make_named_app("default")))(make_event("/other"), DummyContext())
+        self.assertEqual(result["body"], "default '' '/other'")
+
+    def test_lazy_mounts(self):
+        """
+        Test apps given as import strings are imported when first requested.
+        """
+
+        handler = Handler(Dispatcher({
+            "/lazy": "tests.lazy_app:app",
+            "/eager": make_named_app("eager")
+        }))
+
+        handler(make_event("/eager"), DummyContext())
+        self.assertNotIn("tests.lazy_app", sys.modules)
+
+        result = handler(make_event("/lazy/x"), DummyContext())
+        self.assertEqual(result["body"], '{"path": "/x"}')
+        self.assertIn("tests.lazy_app", sys.modules)
+
+    def test_script_name(self):
+        """
+        Test the handler's script name prefixes SCRIPT_NAME, and is removed
+        from PATH_INFO.
+        """
+
+        handler = Handler(Dispatcher({"/api": make_named_app("api")}), script_name="/v1/")
+
+        result = handler(make_event("/v1/api/users"), DummyContext())
+        self.assertEqual(result["body"], "api '/v1/api' '/users'")
+
+        result = handler(make_event("/api/users"), DummyContext())
+        self.assertEqual(result["body"], "api '/v1/api' '/users'")
+
+        result = handler(make_event("/v1api"), DummyContext())
+        self.assertEqual(result["statusCode"], 404)
@@ -0,0 +1,144 @@
+import base64
+import cStringIO
+import gzip
+import os
+import tempfile
+import unittest
+
+from apigwsgi import FileWrapper, Handler
+from apigwsgi.files import read_file
+from tests.helpers import DummyContext, get_headers, make_event
+
+DATA = "".join(chr(index % 256) for index in xrange(10000))
+
+def make_file(data=DATA):
+    fileobj = tempfile.TemporaryFile()
+    fileobj.write(data)
+    fileobj.seek(0)
+    return fileobj
+
+def make_file_app(fileobj, content_type="application/octet-stream"):
+    def app(environ, start_response):
+        start_response("200 Ok", [("Content-Type", content_type)])
+        return environ["wsgi.file_wrapper"](fileobj)
+    return app
+
+class FileWrapperTestCase(unittest.TestCase):
+    def test_read_file(self):
+        """
+        Test files are read from their position, or a given range.
+        """
+
+        fileobj = make_file()
+        fileobj.seek(100)
+        self.assertEqual(read_file(fileobj), DATA[100:])
+        self.assertEqual(read_file(fileobj, 10, 20), DATA[10:20])
+        self.assertEqual(read_file(fileobj, 9990, 20000), DATA[9990:])
+
+        self.assertEqual(read_file(make_file("")), "")
+
+        # Not a real file.
+        stringio = cStringIO.StringIO(DATA)
+        stringio.seek(100)
+        self.assertEqual(read_file(stringio), DATA[100:])
+        self.assertEqual(read_file(stringio, 10, 20), DATA[10:20])
+        stringio.seek(100)
+        self.assertEqual(read_file(stringio, limit=50), DATA[100:150])
+
+        fileobj.seek(100)
+        self.assertEqual(read_file(fileobj, limit=50), DATA[100:150])
+        self.assertEqual(read_file(fileobj, limit=50000), DATA[150:])
+
+    def test_file_response(self):
+        """
+        Test file wrappers are sent whole, and closed.
+        """
+
+        fileobj = make_file()
+        result = Handler(make_file_app(fileobj))(make_event("/report.bin"), DummyContext())
+
+        self.assertEqual(result["statusCode"], 200)
+        self.assertTrue(result["isBase64Encoded"])
+        self.assertEqual(base64.b64decode(result["body"]), DATA)
+        self.assertTrue(fileobj.closed)
+
+    def test_too_large(self):
+        """
+        Test files over `max_body_size` are turned away without being
+        read, or with at most a byte over it read if their size isn't known.
+        """
+
+        reads = []
+        class TrackedFile(object):
+            def __init__(self, fileobj, real=True):
+                self.fileobj = fileobj
+                if real:
+                    self.fileno = fileobj.fileno
+
+            def seek(self, offset):
+                self.fileobj.seek(offset)
+
+            def tell(self):
+                return self.fileobj.tell()
+
+            def read(self, size=-1):
+                data = self.fileobj.read(size)
+                reads.append(len(data))
+                return data
+
+        for fileobj, expected_reads in [
+            (TrackedFile(make_file()), []),
+            (TrackedFile(cStringIO.StringIO(DATA), real=False), [1001])
+        ]:
+            del reads[:]
+            with open(os.devnull, "w") as errors:
+                handler = Handler(make_file_app(fileobj, "text/plain"), max_body_size=1000)
+                handler.environ_template["wsgi.errors"] = errors
+                result = handler(make_event("/report.bin"), DummyContext())
+
+            self.assertEqual(result["statusCode"], 502)
+            self.assertEqual(reads, expected_reads)
+
+    def test_text_file(self):
+        """
+        Test non-binary files aren't base64 encoded, and get ETags.
+        """
+
+        text = "Hello world\n" * 100
+        handler = Handler(make_file_app(make_file(text), "text/plain"), etags=True)
+        result = handler(make_event("/report.bin"), DummyContext())
+
+        self.assertEqual(result["body"], text)
+        self.assertNotIn("isBase64Encoded", result)
+        self.assertIn("ETag", get_headers(result))
+
+    def test_compressed_file(self):
+        """
+        Test files are compressed like any other response.
+        """
+
+        text = "Hello world\n" * 1000
+        handler = Handler(make_file_app(make_file(text), "text/plain"), compression=True)
+        result = handler(make_event("/report.bin", headers={"Accept-Encoding": "gzip"}), DummyContext())
+
+        self.assertEqual(get_headers(result)["Content-Encoding"], "gzip")
+        body = base64.b64decode(result["body"])
+        self.assertEqual(gzip.GzipFile(fileobj=cStringIO.StringIO(body)).read(), text)
+
+    def test_file_range(self):
+        """
+        Test Range requests read just the range of the file.
+        """
+
+        handler = Handler(make_file_app(make_file()), ranges=True)
+        result = handler(make_event("/report.bin", headers={"Range": "bytes=5000-5099"}), DummyContext())
+
+        self.assertEqual(result["statusCode"], 206)
+        self.assertEqual(base64.b64decode(result["body"]), DATA[5000:5100])
+
+    def test_iteration(self):
+        """
+        Test file wrappers can still be iterated over, by middleware.
+        """
+
+        self.assertEqual("".join(FileWrapper(make_file(), block_size=1000)), DATA)
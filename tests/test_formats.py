@@ -0,0 +1,200 @@
+import unittest
+
+from apigwsgi import ALBFormat, Handler, HTTPAPIFormat, RESTAPIFormat
+from tests.helpers import DummyContext
+
+def app(environ, start_response):
+    app.environ = environ
+    start_response("201 Created", [
+        ("Content-Type", "text/plain"),
+        ("Set-Cookie", "a=1"),
+        ("Set-Cookie", "b=2")
+    ])
+    return ["Hello world"]
+
+class HTTPAPIFormatTestCase(unittest.TestCase):
+    def setUp(self):
+        self.event = {
+            "version": "2.0",
+            "routeKey": "$default",
+            "rawPath": "/my%20path",
+            "rawQueryString": "x=1&x=2&y=%20",
+            "cookies": ["c=3", "d=4"],
+            "headers": {
+                "host": "example.com",
+                "accept": "text/plain,text/html",
+                "x-forwarded-proto": "https"
+            },
+            "requestContext": {
+                "http": {
+                    "method": "PUT",
+                    "path": "/my path"
+                }
+            },
+            "body": "Hi",
+            "isBase64Encoded": False
+        }
+
+    def test_detected(self):
+        """
+        Test payload format 2.0 events are detected.
+        """
+
+        self.assertIsInstance(Handler(app).get_event_format(self.event), HTTPAPIFormat)
+
+    def test_environ(self):
+        """
+        Test the environ is built from the raw path and query string.
+        """
+
+        Handler(app)(self.event, DummyContext())
+        environ = app.environ
+        self.assertEqual(environ["REQUEST_METHOD"], "PUT")
+        self.assertEqual(environ["PATH_INFO"], "/my path")
+        self.assertEqual(environ["QUERY_STRING"], "x=1&x=2&y=%20")
+        self.assertEqual(environ["HTTP_HOST"], "example.com")
+        self.assertEqual(environ["HTTP_ACCEPT"], "text/plain,text/html")
+        self.assertEqual(environ["HTTP_COOKIE"], "c=3; d=4")
+        self.assertEqual(environ["wsgi.input"].read(), "Hi")
+
+    def test_response(self):
+        """
+        Test Set-Cookie headers are returned in `cookies`.
+        """
+
+        result = Handler(app)(self.event, DummyContext())
+        self.assertEqual(result, {
+            "statusCode": 201,
+            "headers": {
+                "Content-Type": "text/plain"
+            },
+            "cookies": ["a=1", "b=2"],
+            "body": "Hello world"
+        })
+
+class ALBFormatTestCase(unittest.TestCase):
+    def setUp(self):
+        self.event = {
+            "requestContext": {
+                "elb": {
+                    "targetGroupArn": "arn:aws:elasticloadbalancing:us-east-1:123456789012:targetgroup/lambda/abc"
+                }
+            },
+            "httpMethod": "GET",
+            "path": "/",
+            "queryStringParameters": {
+                "q": "a%20b"
+            },
+            "headers": {
+                "host": "example.com",
+                "x-forwarded-proto": "http",
+                "x-forwarded-port": "80"
+            },
+            "body": "",
+            "isBase64Encoded": False
+        }
+
+    def test_detected(self):
+        """
+        Test ALB events are detected.
+        """
+
+        self.assertIsInstance(Handler(app).get_event_format(self.event), ALBFormat)
+
+        # A null request context isn't an ALB's.
+        event = dict(self.event, requestContext=None)
+        self.assertFalse(ALBFormat().matches(event))
+
+    def test_environ(self):
+        """
+        Test query parameters are passed through without re-encoding.
+        """
+
+        Handler(app)(self.event, DummyContext())
+        self.assertEqual(app.environ["QUERY_STRING"], "q=a%20b")
+        self.assertEqual(app.environ["wsgi.url_scheme"], "http")
+        self.assertEqual(app.environ["SERVER_PORT"], "80")
+
+    def test_health_check(self):
+        """
+        Test health checks, which have no Host header, are answered.
+        """
+
+        event = {
+            "requestContext": {
+                "elb": {
+                    "targetGroupArn": "arn:aws:elasticloadbalancing:us-east-1:123456789012:targetgroup/lambda/abc"
+                }
+            },
+            "httpMethod": "GET",
+            "path": "/",
+            "queryStringParameters": {},
+            "headers": {
+                "user-agent": "ELB-HealthChecker/2.0"
+            },
+            "body": "",
+            "isBase64Encoded": False
+        }
+        result = Handler(app)(event, DummyContext())
+
+        self.assertEqual(result["statusCode"], 201)
+        self.assertEqual(app.environ["SERVER_NAME"], "localhost")
+        self.assertNotIn("HTTP_HOST", app.environ)
+
+    def test_response(self):
+        """
+        Test responses include `statusDescription`.
+        """
+
+        result = Handler(app)(self.event, DummyContext())
+        self.assertEqual(result, {
+            "statusCode": 201,
+            "statusDescription": "201 Created",
+            "headers": {
+                "Content-Type": "text/plain",
+                "Set-Cookie": "b=2"
+            },
+            "body": "Hello world",
+            "isBase64Encoded": False
+        })
+
+    def test_multi_value_response(self):
+        """
+        Test multi-value target groups get multi-value headers back.
+        """
+
+        self.event["multiValueHeaders"] = {
+            key: [value] for key, value in self.event.pop("headers").iteritems()
+        }
+        self.event["multiValueQueryStringParameters"] = {"q": ["a", "b"]}
+        del self.event["queryStringParameters"]
+
+        result = Handler(app)(self.event, DummyContext())
+        self.assertEqual(app.environ["QUERY_STRING"], "q=a&q=b")
+        self.assertEqual(result["multiValueHeaders"], {
+            "Content-Type": ["text/plain"],
+            "Set-Cookie": ["a=1", "b=2"]
+        })
+
+class EventFormatsTestCase(unittest.TestCase):
+    def test_rest_api_detected(self):
+        """
+        Test REST API events are detected.
+        """
+
+        event = {
+            "httpMethod": "GET",
+            "path": "/",
+            "queryStringParameters": None,
+            "headers": {"Host": "localhost"},
+            "body": None
+        }
+        self.assertIsInstance(Handler(app).get_event_format(event), RESTAPIFormat)
+
+    def test_unrecognised_event(self):
+        """
+        Test unrecognised events result in error.
+        """
+
+        with self.assertRaisesRegexp(Exception, "Unrecognised event format"):
+            Handler(app)({"source": "aws.events"}, DummyContext())
@@ -0,0 +1,112 @@
+import gc
+import unittest
+
+from apigwsgi import GCPolicy, Handler
+from tests.helpers import DummyContext, make_event
+
+EVENT = make_event()
+
+def app(environ, start_response):
+    # Container objects, which the collector counts.
+    environ["test.garbage"] = [[index] for index in xrange(1000)]
+    environ["test.gc_enabled"] = gc.isenabled()
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return ["OK"]
+
+def failing_app(environ, start_response):
+    raise ValueError()
+
+class GCPolicyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.thresholds = gc.get_threshold()
+        self.enabled = gc.isenabled()
+        gc.enable()
+
+    def tearDown(self):
+        gc.set_threshold(*self.thresholds)
+        if self.enabled:
+            gc.enable()
+        else:
+            gc.disable()
+
+    def test_disabled_during_requests(self):
+        """
+        Test automatic collection is disabled while a request is in flight,
+        and enabled again afterwards, even if the app fails.
+        """
+
+        environs = []
+        def recording_app(environ, start_response):
+            environs.append(environ)
+            return app(environ, start_response)
+
+        Handler(recording_app, gc_policy=GCPolicy())(EVENT, DummyContext())
+        self.assertFalse(environs[0]["test.gc_enabled"])
+        self.assertTrue(gc.isenabled())
+
+        with self.assertRaises(ValueError):
+            Handler(failing_app, gc_policy=GCPolicy())(EVENT, DummyContext())
+        self.assertTrue(gc.isenabled())
+
+        # Collection the app disabled stays disabled.
+        gc.disable()
+        Handler(app, gc_policy=GCPolicy())(EVENT, DummyContext())
+        self.assertFalse(gc.isenabled())
+
+    def test_nested(self):
+        """
+        Test collection is only enabled once the last request in flight
+        ends.
+        """
+
+        gc_policy = GCPolicy()
+        gc_policy.begin()
+        gc_policy.begin()
+        gc_policy.end()
+        self.assertFalse(gc.isenabled())
+        gc_policy.end()
+        self.assertTrue(gc.isenabled())
+
+    def test_prepare(self):
+        """
+        Test thresholds are set if objects can't be frozen.
+        """
+
+        gc_policy = GCPolicy(freeze=False, thresholds=(1000, 15, 25))
+        Handler(app, gc_policy=gc_policy)
+        self.assertEqual(gc.get_threshold(), (1000, 15, 25))
+
+    def test_collect(self):
+        """
+        Test a collection runs after the response once one is due.
+        """
+
+        gc_policy = GCPolicy(freeze=False, thresholds=(100, 10, 10))
+        handler = Handler(app, gc_policy=gc_policy)
+        handler(EVENT, DummyContext())
+
+        self.assertEqual(gc_policy.collections, [1, 0, 0])
+        self.assertGreaterEqual(gc_policy.pause, 0)
+        self.assertLess(gc.get_count()[0], 100)
+
+        # Nothing's due.
+        gc_policy.collect()
+        self.assertEqual(gc_policy.collections, [1, 0, 0])
+
+    def test_timings(self):
+        """
+        Test collections are included in timings.
+        """
+
+        calls = []
+        handler = Handler(
+            app, gc_policy=GCPolicy(freeze=False, thresholds=(100, 10, 10)),
+            timing_callback=lambda timings, event: calls.append(timings)
+        )
+        handler(EVENT, DummyContext())
+
+        timings = calls[0]
+        self.assertGreaterEqual(timings.gc, 0)
+        self.assertEqual(timings.gc_generation, 0)
+        self.assertIsNotNone(timings.gc_collected)
+        self.assertIn("gc", timings.as_dict())
@@ -1,10 +1,9 @@
+import os
 import sys
 import unittest
 
-from apigwsgi import Handler
-
-class DummyContext(object):
-    pass
+from apigwsgi import FileWrapper, Handler
+from tests.helpers import DummyContext
 
 class Strings(list):
     def __init__(self, items, set_close_count=None):
@@ -77,7 +76,8 @@ class TestCase(unittest.TestCase):
             "wsgi.errors": sys.stderr,
             "wsgi.multithread": False,
             "wsgi.multiprocess": True,
-            "wsgi.run_once": False
+            "wsgi.run_once": False,
+            "wsgi.file_wrapper": FileWrapper
         })
         self.assertEqual(wsgi_input.read(), "Hi")
         self.assertEqual(app.close_count, 1)
@@ -271,5 +271,277 @@ class TestCase(unittest.TestCase):
 
         # TODO: Test exc_info is logged somewhere
 
+    def test_environ_isnt_shared_between_requests(self):
+        """
+        Test changes an app makes to its environ don't leak into later
+        requests.
+        """
+
+        def app(environ, start_response):
+            app.environs.append(environ.copy())
+            environ["SCRIPT_NAME"] = "/changed"
+            environ["wsgi.version"] = None
+            start_response("200 Ok", [("Content-Type", "text/plain")])
+            return ["Hello world"]
+
+        event = {
+            "httpMethod": "GET",
+            "path": "/",
+            "queryStringParameters": None,
+            "headers": {
+                "Host": "localhost",
+            },
+            "body": None
+        }
+        context = DummyContext()
+
+        app.environs = []
+        handler = Handler(app)
+        handler(event, context)
+        handler(event, context)
+
+        self.assertEqual(app.environs[1]["SCRIPT_NAME"], "")
+        self.assertEqual(app.environs[1]["wsgi.version"], (1, 0))
+
+    def test_binary_response_is_base64_encoded(self):
+        """
+        Test responses with a binary content type are base64 encoded.
+        """
+
+        def app(environ, start_response):
+            start_response("200 Ok", [("Content-Type", "image/png; charset=binary")])
+            return ["\x89PNG", "\x00\xff"]
+
+        event = {
+            "httpMethod": "GET",
+            "path": "/",
+            "queryStringParameters": None,
+            "headers": {
+                "Host": "localhost",
+            },
+            "body": None
+        }
+        context = DummyContext()
+
+        result = Handler(app)(event, context)
+        self.assertEqual(result, {
+            "statusCode": 200,
+            "headers": {
+                "Content-Type": "image/png; charset=binary"
+            },
+            "body": "iVBORwD/",
+            "isBase64Encoded": True
+        })
+
+    def test_binary_content_types_are_configurable(self):
+        """
+        Test `binary_content_types` controls which responses are base64
+        encoded.
+        """
+
+        def app(environ, start_response):
+            start_response("200 Ok", [("Content-Type", app.content_type)])
+            return ["Hi"]
+
+        event = {
+            "httpMethod": "GET",
+            "path": "/",
+            "queryStringParameters": None,
+            "headers": {
+                "Host": "localhost",
+            },
+            "body": None
+        }
+        context = DummyContext()
+
+        handler = Handler(app, binary_content_types=["application/x-custom", "text/*"])
+
+        app.content_type = "application/x-custom"
+        self.assertEqual(handler(event, context)["body"], "SGk=")
+
+        app.content_type = "text/csv"
+        self.assertEqual(handler(event, context)["body"], "SGk=")
+
+        app.content_type = "image/png"
+        self.assertEqual(handler(event, context)["body"], "Hi")
+
+    def test_base64_encoded_request_body_is_decoded(self):
+        """
+        Test request bodies flagged with `isBase64Encoded` are decoded.
+        """
+
+        def app(environ, start_response):
+            app.environ = environ
+            app.body = environ["wsgi.input"].read()
+            start_response("200 Ok", [("Content-Type", "text/plain")])
+            return ["Hello world"]
+
+        event = {
+            "httpMethod": "POST",
+            "path": "/",
+            "queryStringParameters": None,
+            "headers": {
+                "Host": "localhost",
+                "Content-Type": "application/octet-stream"
+            },
+            "body": "AAH/",
+            "isBase64Encoded": True
+        }
+        context = DummyContext()
+
+        Handler(app)(event, context)
+        self.assertEqual(app.body, "\x00\x01\xff")
+        self.assertEqual(app.environ["CONTENT_LENGTH"], "3")
+
+    def test_response_too_large(self):
+        """
+        Test iteration stops once the body exceeds `max_body_size`, and a 502
+        is returned.
+        """
+
+        def app(environ, start_response):
+            start_response("200 Ok", [("Content-Type", "text/plain")])
+            for _ in xrange(10):
+                app.yielded += 1
+                yield "x" * 100
+            app.finished = True
+
+        event = {
+            "httpMethod": "GET",
+            "path": "/",
+            "queryStringParameters": None,
+            "headers": {
+                "Host": "localhost",
+            },
+            "body": None
+        }
+        context = DummyContext()
+
+        app.yielded = 0
+        app.finished = False
+        with open(os.devnull, "w") as errors:
+            handler = Handler(app, max_body_size=250)
+            handler.environ_template["wsgi.errors"] = errors
+            result = handler(event, context)
+
+        self.assertEqual(result, {
+            "statusCode": 502,
+            "headers": {
+                "Content-Type": "text/plain"
+            },
+            "body": "Response body too large"
+        })
+        self.assertEqual(app.yielded, 3)
+        self.assertFalse(app.finished)
+
+    def test_response_too_large_via_write(self):
+        """
+        Test `max_body_size` applies to the `write` callable, and to the
+        base64 encoded size of binary responses.
+        """
+
+        def app(environ, start_response):
+            write = start_response("200 Ok", [("Content-Type", app.content_type)])
+            write("x" * 200)
+            return []
+
+        event = {
+            "httpMethod": "GET",
+            "path": "/",
+            "queryStringParameters": None,
+            "headers": {
+                "Host": "localhost",
+            },
+            "body": None
+        }
+        context = DummyContext()
+
+        with open(os.devnull, "w") as errors:
+            handler = Handler(app, max_body_size=250)
+            handler.environ_template["wsgi.errors"] = errors
+
+            app.content_type = "text/plain"
+            self.assertEqual(handler(event, context)["statusCode"], 200)
+
+            app.content_type = "application/octet-stream"
+            self.assertEqual(handler(event, context)["statusCode"], 502)
+
+    def test_multi_value_request(self):
+        """
+        Test repeated query parameters and headers are passed to the app.
+        """
+
+        def app(environ, start_response):
+            app.environ = environ
+            start_response("200 Ok", [("Content-Type", "text/plain")])
+            return ["Hello world"]
+
+        event = {
+            "httpMethod": "GET",
+            "path": "/",
+            "queryStringParameters": {
+                "filter": "b"
+            },
+            "multiValueQueryStringParameters": {
+                "filter": ["a", "b"]
+            },
+            "headers": {
+                "Host": "localhost",
+                "Accept": "text/html",
+                "Cookie": "b=2"
+            },
+            "multiValueHeaders": {
+                "Host": ["localhost"],
+                "Accept": ["text/plain", "text/html"],
+                "Cookie": ["a=1", "b=2"]
+            },
+            "body": None
+        }
+        context = DummyContext()
+
+        Handler(app)(event, context)
+        self.assertEqual(app.environ["QUERY_STRING"], "filter=a&filter=b")
+        self.assertEqual(app.environ["HTTP_ACCEPT"], "text/plain,text/html")
+        self.assertEqual(app.environ["HTTP_COOKIE"], "a=1; b=2")
+
+    def test_multi_value_response(self):
+        """
+        Test repeated response headers are kept if the event has multi-value
+        headers.
+        """
+
+        def app(environ, start_response):
+            start_response("200 Ok", [
+                ("Content-Type", "text/plain"),
+                ("Set-Cookie", "a=1"),
+                ("Set-Cookie", "b=2")
+            ])
+            return ["Hello world"]
+
+        event = {
+            "httpMethod": "GET",
+            "path": "/",
+            "queryStringParameters": None,
+            "multiValueQueryStringParameters": None,
+            "headers": {
+                "Host": "localhost"
+            },
+            "multiValueHeaders": {
+                "Host": ["localhost"]
+            },
+            "body": None
+        }
+        context = DummyContext()
+
+        result = Handler(app)(event, context)
+        self.assertEqual(result, {
+            "statusCode": 200,
+            "multiValueHeaders": {
+                "Content-Type": ["text/plain"],
+                "Set-Cookie": ["a=1", "b=2"]
+            },
+            "body": "Hello world"
+        })
+
     def test_TODO_exc_info(self):
         pass
@@ -0,0 +1,207 @@
+import unittest
+
+from apigwsgi import (
+    Handler, ResponseCache, get_request_header, get_response_header, set_request_header,
+    set_response_header
+)
+from tests.helpers import DummyContext, get_headers, make_event
+
+def app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return ["{} {}".format(environ.get("HTTP_AUTHORIZATION"), environ.get("HTTP_X_REQUEST_ID"))]
+
+def make_authorized_event():
+    return make_event(headers={"authorization": "token abc"})
+
+def make_http_api_event():
+    return {
+        "version": "2.0",
+        "routeKey": "$default",
+        "rawPath": "/",
+        "rawQueryString": "",
+        "cookies": ["a=1"],
+        "headers": {
+            "host": "localhost",
+            "authorization": "token abc"
+        },
+        "requestContext": {
+            "http": {
+                "method": "GET",
+                "path": "/"
+            }
+        },
+        "body": None,
+        "isBase64Encoded": False
+    }
+
+def normalise_authorization(event, context):
+    authorization = get_request_header(event, "Authorization")
+    if authorization is not None:
+        set_request_header(event, "Authorization", authorization.replace("token ", "Bearer "))
+
+def add_request_id(event, context):
+    set_request_header(event, "X-Request-Id", context.aws_request_id)
+
+def require_authorization(event, context):
+    if get_request_header(event, "Authorization") is None:
+        return {"statusCode": 401, "headers": {}, "body": "Unauthorized"}
+
+def add_header(event, context, response):
+    set_response_header(event, response, "X-Frame-Options", "DENY")
+
+class HooksTestCase(unittest.TestCase):
+    def test_no_hooks(self):
+        """
+        Test the handler calls `handle` directly without hooks.
+        """
+
+        handler = Handler(app)
+        self.assertEqual(handler.handle_event, handler.handle)
+
+    def test_pre_hooks(self):
+        """
+        Test pre-hooks see and change the event before the environ is
+        built, in order.
+        """
+
+        handler = Handler(app, pre_hooks=[normalise_authorization, add_request_id])
+        response = handler(make_authorized_event(), DummyContext())
+        self.assertEqual(response["body"], "Bearer abc c6af9ac6-7b61-11e6-9a41-93e8deadbeef")
+
+    def test_short_circuit(self):
+        """
+        Test a pre-hook that returns a response skips the rest of the
+        pre-hooks and the app, but not the post-hooks.
+        """
+
+        calls = []
+        def app_called(environ, start_response):
+            calls.append(environ)
+            return app(environ, start_response)
+
+        event = make_event()
+        handler = Handler(
+            app_called, pre_hooks=[require_authorization, add_request_id],
+            post_hooks=[add_header]
+        )
+        response = handler(event, DummyContext())
+
+        self.assertEqual(response["statusCode"], 401)
+        self.assertEqual(get_headers(response), {"X-Frame-Options": "DENY"})
+        self.assertIsNone(get_request_header(event, "X-Request-Id"))
+        self.assertEqual(calls, [])
+
+    def test_post_hooks(self):
+        """
+        Test post-hooks see the response, and can change or replace it.
+        """
+
+        def replace(event, context, response):
+            return dict(response, body=response["body"].upper())
+
+        handler = Handler(app, post_hooks=[add_header, replace])
+        response = handler(make_authorized_event(), DummyContext())
+
+        self.assertEqual(response["statusCode"], 200)
+        self.assertEqual(response["multiValueHeaders"]["X-Frame-Options"], ["DENY"])
+        self.assertNotIn("headers", response)
+        self.assertEqual(response["body"], "TOKEN ABC NONE")
+
+    def test_cached(self):
+        """
+        Test hooks run for cached responses, and pre-hooks before the cache
+        is checked.
+        """
+
+        calls = []
+        def cacheable_app(environ, start_response):
+            calls.append(environ)
+            start_response("200 OK", [("Content-Type", "text/plain"), ("Cache-Control", "public, max-age=60")])
+            return [environ["HTTP_AUTHORIZATION"]]
+
+        handler = Handler(
+            cacheable_app, cache=ResponseCache(),
+            pre_hooks=[normalise_authorization], post_hooks=[add_header]
+        )
+        handler(make_authorized_event(), DummyContext())
+        response = handler(make_authorized_event(), DummyContext())
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(response["body"], "Bearer abc")
+        self.assertEqual(get_headers(response)["X-Frame-Options"], "DENY")
+
+class HeaderHelpersTestCase(unittest.TestCase):
+    def test_rest_request(self):
+        """
+        Test request headers are set in both `headers` and
+        `multiValueHeaders`, replacing existing values whatever their case.
+        """
+
+        event = make_event(headers=[("authorization", "token abc"), ("Accept", "text/plain"), ("Accept", "text/html")])
+        self.assertEqual(get_request_header(event, "ACCEPT"), "text/plain,text/html")
+
+        set_request_header(event, "Authorization", "Bearer abc")
+        self.assertEqual(event["headers"]["Authorization"], "Bearer abc")
+        self.assertEqual(event["multiValueHeaders"]["Authorization"], ["Bearer abc"])
+        self.assertNotIn("authorization", event["headers"])
+        self.assertNotIn("authorization", event["multiValueHeaders"])
+
+        set_request_header(event, "accept", None)
+        self.assertIsNone(get_request_header(event, "Accept"))
+        self.assertNotIn("Accept", event["headers"])
+
+        # Without any headers.
+        event = make_event()
+        event["headers"] = event["multiValueHeaders"] = None
+        set_request_header(event, "X-Request-Id", "1")
+        self.assertEqual(get_request_header(event, "x-request-id"), "1")
+
+    def test_rest_response(self):
+        """
+        Test response headers are set in `multiValueHeaders` if the event
+        has them, and in `headers` otherwise.
+        """
+
+        event = make_event()
+        response = Handler(app)(event, DummyContext())
+        set_response_header(event, response, "X-Frame-Options", "DENY")
+        set_response_header(event, response, "content-type", "text/html")
+        self.assertEqual(response["multiValueHeaders"]["X-Frame-Options"], ["DENY"])
+        self.assertEqual(response["multiValueHeaders"]["content-type"], ["text/html"])
+        self.assertNotIn("Content-Type", response["multiValueHeaders"])
+        self.assertEqual(get_response_header(event, response, "Content-Type"), "text/html")
+
+        # A response returned by a pre-hook, with `headers` only.
+        response = {"statusCode": 401, "headers": {}, "body": "Unauthorized"}
+        set_response_header(event, response, "X-Frame-Options", "DENY")
+        self.assertEqual(response["headers"], {"X-Frame-Options": "DENY"})
+
+        del event["multiValueHeaders"]
+        response = Handler(app)(event, DummyContext())
+        set_response_header(event, response, "X-Frame-Options", "DENY")
+        self.assertEqual(response["headers"]["X-Frame-Options"], "DENY")
+        self.assertNotIn("multiValueHeaders", response)
+
+    def test_http_api(self):
+        """
+        Test headers in HTTP API events and responses, where names are
+        lowercase and cookies separate.
+        """
+
+        event = make_http_api_event()
+        normalise_authorization(event, DummyContext())
+        add_request_id(event, DummyContext())
+        self.assertEqual(event["headers"]["authorization"], "Bearer abc")
+        self.assertEqual(event["headers"]["x-request-id"], "c6af9ac6-7b61-11e6-9a41-93e8deadbeef")
+        self.assertEqual(get_request_header(event, "Cookie"), "a=1")
+
+        set_request_header(event, "Cookie", "b=2; c=3")
+        self.assertEqual(event["cookies"], ["b=2", "c=3"])
+
+        response = Handler(app)(event, DummyContext())
+        self.assertEqual(response["body"], "Bearer abc c6af9ac6-7b61-11e6-9a41-93e8deadbeef")
+
+        set_response_header(event, response, "Set-Cookie", "d=4")
+        add_header(event, DummyContext(), response)
+        self.assertEqual(response["cookies"], ["d=4"])
+        self.assertEqual(get_response_header(event, response, "x-frame-options"), "DENY")
@@ -0,0 +1,65 @@
+import os
+import sys
+import unittest
+
+from apigwsgi import Handler
+from apigwsgi.importing import ImportTimer, import_string
+from tests.helpers import DummyContext, make_event
+
+EVENT = make_event("/hello")
+
+class ImportingTestCase(unittest.TestCase):
+    def setUp(self):
+        sys.modules.pop("tests.lazy_app", None)
+
+    def test_import_string(self):
+        """
+        Test import strings resolve to the object they name.
+        """
+
+        self.assertIs(import_string("os.path:join"), os.path.join)
+        self.assertIs(import_string("os:path.join"), os.path.join)
+        with self.assertRaises(Exception):
+            import_string("os.path.join")
+
+    def test_lazy_app(self):
+        """
+        Test apps given as import strings aren't imported until a request
+        needs them.
+        """
+
+        handler = Handler("tests.lazy_app:app")
+        self.assertNotIn("tests.lazy_app", sys.modules)
+
+        # Warmup pings don't need the app.
+        handler({"warmup": True}, DummyContext())
+        self.assertNotIn("tests.lazy_app", sys.modules)
+
+        result = handler(EVENT, DummyContext())
+        self.assertEqual(result["body"], '{"path": "/hello"}')
+        self.assertIn("tests.lazy_app", sys.modules)
+
+    def test_load_wsgi_app(self):
+        """
+        Test apps given as import strings can be imported up front.
+        """
+
+        handler = Handler("tests.lazy_app:app")
+        app = handler.load_wsgi_app()
+        self.assertIs(app, sys.modules["tests.lazy_app"].app)
+        self.assertIs(handler.wsgi_app, app)
+
+    def test_import_timing(self):
+        """
+        Test import timing reports the modules the app imports.
+        """
+
+        with ImportTimer() as timer:
+            import_string("tests.lazy_app:app")
+
+        self.assertIn("tests.lazy_app", timer.timings)
+        total, self_time = timer.timings["tests.lazy_app"]
+        self.assertLessEqual(self_time, total)
+
+        with open(os.devnull, "w") as devnull:
+            timer.report(devnull)
@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from apigwsgi import Handler, ResponseCache
+from apigwsgi.profiling import Profiler, sign
+from tests.helpers import DummyContext, get_headers, make_app, make_event
+
+app = make_app(["Hello world"])
+
+class ProfilingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_sample_rate(self):
+        """
+        Test every Nth request is profiled, and saved under its request ID.
+        """
+
+        handler = Handler(app, profiler=Profiler(sample_rate=3, directory=self.directory))
+        for _ in xrange(7):
+            handler(make_event(), DummyContext())
+
+        filenames = os.listdir(self.directory)
+        self.assertEqual(len(filenames), 2)
+        for filename in filenames:
+            self.assertIn("-c6af9ac6-7b61-11e6-9a41-93e8deadbeef-", filename)
+
+    def test_shared_request_id(self):
+        """
+        Test profiles of events sharing a request ID, as in a batch, don't
+        overwrite each other or get removed early.
+        """
+
+        handler = Handler(app, profiler=Profiler(sample_rate=1, directory=self.directory, max_files=4))
+        handler.batch([make_event() for _ in xrange(3)], DummyContext())
+        self.assertEqual(len(os.listdir(self.directory)), 3)
+
+        handler.batch([make_event() for _ in xrange(3)], DummyContext())
+        self.assertEqual(len(os.listdir(self.directory)), 4)
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted(
+            os.path.basename(filename) for filename in handler.profiler.files
+        ))
+
+    def test_path_pattern(self):
+        """
+        Test requests matching the path pattern are profiled.
+        """
+
+        handler = Handler(app, profiler=Profiler(path_pattern=r"^/slow", directory=self.directory))
+        handler(make_event("/fast"), DummyContext())
+        handler(make_event("/slow/thing"), DummyContext())
+
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+    def test_max_files(self):
+        """
+        Test only the most recent profiles are kept.
+        """
+
+        handler = Handler(app, profiler=Profiler(sample_rate=1, directory=self.directory, max_files=3))
+        filenames = []
+        for _ in xrange(5):
+            handler(make_event(), DummyContext())
+            filenames.append(max(os.listdir(self.directory)))
+            time.sleep(0.002)
+
+        self.assertEqual(sorted(os.listdir(self.directory)), filenames[2:])
+
+    def test_debug_header(self):
+        """
+        Test signed debug headers get a profile summary back.
+        """
+
+        profiler = Profiler(debug_secret="s3cret", directory=self.directory)
+        handler = Handler(app, profiler=profiler)
+
+        value = sign("s3cret", str(int(time.time())), "/")
+        result = handler(make_event(headers={"X-Apigwsgi-Profile": value}), DummyContext())
+        self.assertTrue(get_headers(result)["X-Apigwsgi-Profile-Summary"].startswith("total="))
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+        # Wrong secret, wrong path, expired.
+        for value in [
+            sign("guess", str(int(time.time())), "/"),
+            sign("s3cret", str(int(time.time())), "/other"),
+            sign("s3cret", str(int(time.time()) - 3600), "/")
+        ]:
+            result = handler(make_event(headers={"X-Apigwsgi-Profile": value}), DummyContext())
+            self.assertNotIn("X-Apigwsgi-Profile-Summary", get_headers(result))
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+    def test_debug_cached(self):
+        """
+        Test profile summaries aren't cached with the response, so other
+        requests don't see them.
+        """
+
+        cacheable_app = make_app(["Hello world"], [("Content-Type", "text/plain"), ("Cache-Control", "public, max-age=60")])
+        profiler = Profiler(debug_secret="s3cret", directory=self.directory)
+        handler = Handler(cacheable_app, profiler=profiler, cache=ResponseCache())
+
+        value = sign("s3cret", str(int(time.time())), "/")
+        result = handler(make_event(headers={"X-Apigwsgi-Profile": value}), DummyContext())
+        self.assertIn("X-Apigwsgi-Profile-Summary", get_headers(result))
+
+        result = handler(make_event(), DummyContext())
+        self.assertEqual(cacheable_app.calls, 1)
+        self.assertEqual(result["body"], "Hello world")
+        self.assertNotIn("X-Apigwsgi-Profile-Summary", get_headers(result))
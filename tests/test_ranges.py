@@ -0,0 +1,146 @@
+import os
+import tempfile
+import unittest
+import wsgiref.util
+
+from apigwsgi import Handler
+from apigwsgi.ranges import RangeNotSatisfiable, if_range_matches, parse_range
+from tests.helpers import DummyContext, get_headers, make_app, make_event
+
+BODY = "".join(chr(ord("a") + index % 26) for index in xrange(1000))
+
+def make_body_app(headers=()):
+    return make_app([BODY[:500], BODY[500:]], [("Content-Type", "text/plain")] + list(headers))
+
+class ParseRangeTestCase(unittest.TestCase):
+    def test_parse_range(self):
+        """
+        Test Range headers are parsed into slices.
+        """
+
+        self.assertEqual(parse_range("bytes=0-99", 1000), (0, 100))
+        self.assertEqual(parse_range("bytes=900-", 1000), (900, 1000))
+        self.assertEqual(parse_range("bytes=900-5000", 1000), (900, 1000))
+        self.assertEqual(parse_range("bytes=-100", 1000), (900, 1000))
+        self.assertEqual(parse_range("bytes=-5000", 1000), (0, 1000))
+
+        # Ignored.
+        for range_header in ["items=0-1", "bytes=0-1,5-6", "bytes=5-1", "bytes=x-", "bytes=5"]:
+            self.assertIsNone(parse_range(range_header, 1000), range_header)
+
+        for range_header in ["bytes=1000-", "bytes=-0"]:
+            with self.assertRaises(RangeNotSatisfiable):
+                parse_range(range_header, 1000)
+
+    def test_if_range(self):
+        """
+        Test If-Range matches ETags strongly, and dates exactly.
+        """
+
+        date = "Wed, 21 Oct 2015 07:28:00 GMT"
+        self.assertTrue(if_range_matches('"abc"', '"abc"', None))
+        self.assertFalse(if_range_matches('"abc"', '"def"', date))
+        self.assertFalse(if_range_matches('W/"abc"', 'W/"abc"', None))
+        self.assertTrue(if_range_matches(date, '"abc"', date))
+        self.assertFalse(if_range_matches(date, '"abc"', None))
+        self.assertFalse(if_range_matches("Thu, 22 Oct 2015 07:28:00 GMT", None, date))
+
+class RangeRequestTestCase(unittest.TestCase):
+    def test_range(self):
+        """
+        Test responses advertising Accept-Ranges honour Range requests.
+        """
+
+        handler = Handler(make_body_app([("Accept-Ranges", "bytes")]))
+        result = handler(make_event("/export", headers={"Range": "bytes=450-549"}), DummyContext())
+
+        self.assertEqual(result["statusCode"], 206)
+        self.assertEqual(result["body"], BODY[450:550])
+        self.assertEqual(get_headers(result)["Content-Range"], "bytes 450-549/1000")
+        self.assertEqual(get_headers(result)["Content-Length"], "100")
+
+    def test_opt_in(self):
+        """
+        Test ranges are only honoured for responses that advertise them, or
+        if configured.
+        """
+
+        result = Handler(make_body_app())(make_event("/export", headers={"Range": "bytes=0-9"}), DummyContext())
+        self.assertEqual(result["statusCode"], 200)
+        self.assertEqual(result["body"], BODY)
+
+        result = Handler(make_body_app(), ranges=True)(make_event("/export", headers={"Range": "bytes=0-9"}), DummyContext())
+        self.assertEqual(result["statusCode"], 206)
+        self.assertEqual(result["body"], BODY[:10])
+
+        result = Handler(make_body_app([("Accept-Ranges", "none")]), ranges=True)(
+            make_event("/export", headers={"Range": "bytes=0-9"}), DummyContext()
+        )
+        self.assertEqual(result["statusCode"], 200)
+
+    def test_not_satisfiable(self):
+        """
+        Test ranges past the end of the body get a 416.
+        """
+
+        result = Handler(make_body_app(), ranges=True)(make_event("/export", headers={"Range": "bytes=1000-"}), DummyContext())
+        self.assertEqual(result["statusCode"], 416)
+        self.assertEqual(get_headers(result)["Content-Range"], "bytes */1000")
+
+    def test_if_range(self):
+        """
+        Test stale If-Range headers get the whole body.
+        """
+
+        handler = Handler(make_body_app(), ranges=True, etags=True)
+        etag = get_headers(handler(make_event("/export"), DummyContext()))["ETag"]
+
+        result = handler(make_event("/export", headers={"Range": "bytes=0-9", "If-Range": etag}), DummyContext())
+        self.assertEqual(result["statusCode"], 206)
+        self.assertEqual(get_headers(result)["ETag"], etag)
+
+        result = handler(make_event("/export", headers={"Range": "bytes=0-9", "If-Range": '"stale"'}), DummyContext())
+        self.assertEqual(result["statusCode"], 200)
+        self.assertEqual(result["body"], BODY)
+
+    def test_range_of_large_body(self):
+        """
+        Test only the range needs to fit under the maximum body size.
+        """
+
+        handler = Handler(make_body_app(), ranges=True, max_body_size=100)
+        result = handler(make_event("/export", headers={"Range": "bytes=900-"}), DummyContext())
+        self.assertEqual(result["statusCode"], 206)
+        self.assertEqual(result["body"], BODY[900:])
+
+        with open(os.devnull, "w") as devnull:
+            handler.environ_template["wsgi.errors"] = devnull
+
+            result = handler(make_event("/export", headers={"Range": "bytes=0-200"}), DummyContext())
+            self.assertEqual(result["statusCode"], 502)
+
+            result = handler(make_event("/export"), DummyContext())
+            self.assertEqual(result["statusCode"], 502)
+
+    def test_file_wrapper(self):
+        """
+        Test ranges of file wrappers are read by seeking, not iterating.
+        """
+
+        fileobj = tempfile.TemporaryFile()
+        fileobj.write(BODY)
+        fileobj.seek(0)
+
+        class FileWrapper(wsgiref.util.FileWrapper):
+            def __iter__(self):
+                raise AssertionError("Iterated over the whole file")
+
+        def app(environ, start_response):
+            start_response("200 Ok", [("Content-Type", "text/plain"), ("Accept-Ranges", "bytes")])
+            return FileWrapper(fileobj)
+
+        result = Handler(app)(make_event("/export", headers={"Range": "bytes=-10"}), DummyContext())
+        self.assertEqual(result["statusCode"], 206)
+        self.assertEqual(result["body"], BODY[-10:])
+        self.assertEqual(get_headers(result)["Content-Range"], "bytes 990-999/1000")
+        self.assertTrue(fileobj.closed)
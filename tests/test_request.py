@@ -0,0 +1,111 @@
+import base64
+import unittest
+
+from apigwsgi import Handler
+from apigwsgi.request import DECODE_BLOCK_SIZE, Base64Stream, RequestBody, get_decoded_size
+from tests.helpers import DummyContext
+
+DATA = "".join(chr(index % 256) for index in xrange(5000))
+
+class RequestBodyTestCase(unittest.TestCase):
+    def test_decoded_size(self):
+        """
+        Test the decoded size of base64 is worked out without decoding.
+        """
+
+        for length in xrange(10):
+            encoded = base64.b64encode(DATA[:length])
+            self.assertEqual(get_decoded_size(encoded), length)
+            self.assertEqual(get_decoded_size(base64.encodestring(DATA[:length])), length)
+
+    def test_lazy(self):
+        """
+        Test nothing is decoded until the body is read.
+        """
+
+        body = RequestBody(base64.b64encode(DATA), base64_encoded=True)
+        self.assertEqual(body.size, len(DATA))
+        self.assertIsNone(body.stream)
+
+        self.assertEqual(body.read(10), DATA[:10])
+        self.assertEqual(body.read(), DATA[10:])
+
+    def test_plain(self):
+        """
+        Test plain bodies are read in place.
+        """
+
+        body = RequestBody("line 1\nline 2\n")
+        self.assertEqual(body.size, 14)
+        self.assertEqual(body.readline(), "line 1\n")
+        self.assertEqual(list(body), ["line 2\n"])
+
+    def test_streamed(self):
+        """
+        Test large base64 bodies are decoded a block at a time as they're
+        read.
+        """
+
+        data = DATA * 100
+        body = RequestBody(base64.encodestring(data), base64_encoded=True, decode_threshold=1000)
+        self.assertEqual(body.size, len(data))
+
+        self.assertEqual(body.read(100), data[:100])
+        self.assertIsInstance(body.stream, Base64Stream)
+        self.assertEqual(body.stream.offset, DECODE_BLOCK_SIZE)
+        self.assertEqual(body.read(), data[100:])
+        self.assertEqual(body.read(), "")
+
+        body = RequestBody(base64.b64encode(DATA), base64_encoded=True, decode_threshold=len(DATA))
+        self.assertEqual(body.read(), DATA)
+        self.assertNotIsInstance(body.stream, Base64Stream)
+
+    def test_streamed_reads(self):
+        """
+        Test reads of every size, and lines, across block boundaries.
+        """
+
+        data = DATA * 100
+        stream = Base64Stream(base64.b64encode(data))
+        offset = 0
+        for size in xrange(0, 100000, 777):
+            self.assertEqual(stream.read(size), data[offset:offset + size])
+            offset += size
+            if offset >= len(data):
+                break
+        self.assertEqual(stream.read(10), "")
+
+        lines = "".join("line {}\n".format(index) for index in xrange(20000)) + "last"
+        stream = Base64Stream(base64.b64encode(lines))
+        self.assertEqual(stream.readline(), "line 0\n")
+        self.assertEqual(stream.readline(3), "lin")
+        self.assertEqual(stream.readline(), "e 1\n")
+        self.assertEqual(stream.readlines(10), ["line 2\n", "line 3\n"])
+        self.assertEqual("".join(stream), lines[lines.index("line 4\n"):])
+        self.assertEqual(stream.readline(), "")
+
+    def test_handler(self):
+        """
+        Test the handler's `wsgi.input` and CONTENT_LENGTH.
+        """
+
+        def app(environ, start_response):
+            app.content_length = environ["CONTENT_LENGTH"]
+            app.body = environ["wsgi.input"].read()
+            start_response("200 Ok", [("Content-Type", "text/plain")])
+            return []
+
+        event = {
+            "httpMethod": "POST",
+            "path": "/upload",
+            "queryStringParameters": None,
+            "headers": {
+                "Host": "localhost"
+            },
+            "body": base64.b64encode(DATA),
+            "isBase64Encoded": True
+        }
+        Handler(app, decode_threshold=100)(event, DummyContext())
+
+        self.assertEqual(app.content_length, str(len(DATA)))
+        self.assertEqual(app.body, DATA)
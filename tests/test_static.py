@@ -0,0 +1,188 @@
+import base64
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+
+from apigwsgi import Handler, StaticFiles
+from tests.helpers import DummyContext, get_headers, make_app, make_event
+
+app = make_app(["From the app"])
+
+class StaticFilesTestCase(unittest.TestCase):
+    def setUp(self):
+        app.calls = 0
+
+        self.directory = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.directory, "css"))
+
+        self.css = "body { color: red; }\n" * 100
+        with open(os.path.join(self.directory, "css", "style.css"), "wb") as fileobj:
+            fileobj.write(self.css)
+        with gzip.open(os.path.join(self.directory, "css", "style.css.gz"), "wb") as fileobj:
+            fileobj.write(self.css)
+
+        self.png = "\x89PNG\r\n\x1a\n\x00\x01"
+        with open(os.path.join(self.directory, "logo.png"), "wb") as fileobj:
+            fileobj.write(self.png)
+
+        self.js = "var x = 1;\n" * 200
+        with open(os.path.join(self.directory, "app.js"), "wb") as fileobj:
+            fileobj.write(self.js)
+
+        open(os.path.join(self.directory, "empty.txt"), "wb").close()
+
+        self.handler = Handler(app, static_files=StaticFiles(self.directory, prefix="/static/"))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_index(self):
+        """
+        Test files and their variants are indexed under the prefix.
+        """
+
+        files = self.handler.static_files.files
+        self.assertEqual(sorted(files), ["/static/app.js", "/static/css/style.css", "/static/empty.txt", "/static/logo.png"])
+        self.assertIn("gzip", files["/static/css/style.css"].variants)
+        self.assertIsNotNone(files["/static/css/style.css"].variants["gzip"].filename)
+
+    def test_file(self):
+        """
+        Test files are served without calling the app.
+        """
+
+        result = self.handler(make_event("/static/css/style.css"), DummyContext())
+
+        self.assertEqual(app.calls, 0)
+        self.assertEqual(result["statusCode"], 200)
+        self.assertEqual(result["body"], self.css)
+        self.assertNotIn("isBase64Encoded", result)
+
+        headers = get_headers(result)
+        self.assertEqual(headers["Content-Type"], "text/css; charset=utf-8")
+        self.assertEqual(headers["Content-Length"], str(len(self.css)))
+        self.assertEqual(headers["Vary"], "Accept-Encoding")
+        self.assertIn("ETag", headers)
+        self.assertIn("Last-Modified", headers)
+        self.assertNotIn("Content-Encoding", headers)
+
+    def test_binary_file(self):
+        """
+        Test binary files are base64 encoded.
+        """
+
+        result = self.handler(make_event("/static/logo.png"), DummyContext())
+        self.assertEqual(get_headers(result)["Content-Type"], "image/png")
+        self.assertTrue(result["isBase64Encoded"])
+        self.assertEqual(base64.b64decode(result["body"]), self.png)
+
+        result = self.handler(make_event("/static/empty.txt"), DummyContext())
+        self.assertEqual(result["body"], "")
+
+    def test_precompressed(self):
+        """
+        Test precompressed variants are sent to clients that accept them.
+        """
+
+        result = self.handler(make_event("/static/css/style.css", headers={
+            "Accept-Encoding": "gzip, deflate"
+        }), DummyContext())
+
+        self.assertEqual(get_headers(result)["Content-Encoding"], "gzip")
+        self.assertTrue(result["isBase64Encoded"])
+        self.assertTrue(get_headers(result)["ETag"].endswith('-gzip"'))
+
+        with open(os.path.join(self.directory, "css", "style.css.gz"), "rb") as fileobj:
+            self.assertEqual(base64.b64decode(result["body"]), fileobj.read())
+
+    def test_conditional(self):
+        """
+        Test conditional requests get a 304.
+        """
+
+        result = self.handler(make_event("/static/css/style.css"), DummyContext())
+        result = self.handler(make_event("/static/css/style.css", headers={
+            "If-None-Match": get_headers(result)["ETag"]
+        }), DummyContext())
+
+        self.assertEqual(result["statusCode"], 304)
+        self.assertEqual(result["body"], "")
+
+    def test_range(self):
+        """
+        Test Range requests get part of the file.
+        """
+
+        result = self.handler(make_event("/static/css/style.css", headers={
+            "Range": "bytes=5-9"
+        }), DummyContext())
+
+        self.assertEqual(result["statusCode"], 206)
+        self.assertEqual(result["body"], self.css[5:10])
+        self.assertEqual(get_headers(result)["Content-Range"], "bytes 5-9/{}".format(len(self.css)))
+
+    def test_head(self):
+        """
+        Test HEAD requests get headers, but no body.
+        """
+
+        result = self.handler(make_event("/static/css/style.css", method="HEAD"), DummyContext())
+        self.assertEqual(result["statusCode"], 200)
+        self.assertEqual(get_headers(result)["Content-Length"], str(len(self.css)))
+        self.assertEqual(result["body"], "")
+
+    def test_fall_through(self):
+        """
+        Test unknown paths and other methods go to the app.
+        """
+
+        for event in [
+            make_event("/static/missing.css"),
+            make_event("/static/css/style.css", method="POST"),
+            make_event("/other")
+        ]:
+            result = self.handler(event, DummyContext())
+            self.assertEqual(result["body"], "From the app")
+
+        self.assertEqual(app.calls, 3)
+
+    def test_compressed_at_init(self):
+        """
+        Test files without bundled variants are compressed when indexed,
+        unless they're small or already compressed.
+        """
+
+        files = self.handler.static_files.files
+        self.assertIn("gzip", files["/static/app.js"].variants)
+        self.assertIsNone(files["/static/app.js"].variants["gzip"].filename)
+        self.assertEqual(files["/static/empty.txt"].variants, {})
+        self.assertEqual(files["/static/logo.png"].variants, {})
+
+        result = self.handler(make_event("/static/app.js", headers={"Accept-Encoding": "gzip"}), DummyContext())
+        headers = get_headers(result)
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(headers["Vary"], "Accept-Encoding")
+        self.assertTrue(headers["ETag"].endswith('-gzip"'))
+        self.assertEqual(zlib.decompress(base64.b64decode(result["body"]), 16 + zlib.MAX_WBITS), self.js)
+
+        result = self.handler(make_event("/static/app.js"), DummyContext())
+        self.assertEqual(result["body"], self.js)
+        self.assertEqual(app.calls, 0)
+
+        handler = Handler(app, static_files=StaticFiles(self.directory, prefix="/static/", compress=False))
+        self.assertEqual(handler.static_files.files["/static/app.js"].variants, {})
+
+    def test_script_name(self):
+        """
+        Test files are found under the handler's script name.
+        """
+
+        handler = Handler(app, script_name="/v1", static_files=StaticFiles(self.directory, prefix="/static/"))
+
+        for path in ["/v1/static/app.js", "/static/app.js"]:
+            result = handler(make_event(path), DummyContext())
+            self.assertEqual(result["body"], self.js)
+        self.assertEqual(app.calls, 0)
@@ -0,0 +1,99 @@
+import json
+import sys
+import unittest
+
+from apigwsgi import Handler, ResponseCache
+from tests.helpers import DummyContext, get_headers, make_event
+
+EVENT = make_event()
+
+def app(environ, start_response):
+    start_response("200 Ok", [("Content-Type", "text/plain"), ("Cache-Control", "max-age=60")])
+    return ["Hello world"]
+
+class CapturedStdout(list):
+    def __enter__(self):
+        self.stdout = sys.stdout
+        sys.stdout = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        sys.stdout = self.stdout
+
+    def write(self, data):
+        self.append(data)
+
+class TimingTestCase(unittest.TestCase):
+    def test_callback(self):
+        """
+        Test the timing callback gets every phase.
+        """
+
+        calls = []
+        handler = Handler(app, timing_callback=lambda timings, event: calls.append((timings, event)))
+        result = handler(EVENT, DummyContext())
+
+        self.assertEqual(result["body"], "Hello world")
+        self.assertEqual(len(calls), 1)
+
+        timings, event = calls[0]
+        self.assertIs(event, EVENT)
+        self.assertFalse(timings.cached)
+        self.assertEqual(
+            sorted(timings.as_dict()),
+            ["app", "body", "parse", "serialize", "total"]
+        )
+        self.assertAlmostEqual(
+            timings.parse + timings.app + timings.body + timings.serialize,
+            timings.total
+        )
+
+    def test_server_timing(self):
+        """
+        Test Server-Timing headers.
+        """
+
+        result = Handler(app, server_timing=True)(EVENT, DummyContext())
+        phases = [
+            item.split(";")[0]
+            for item in get_headers(result)["Server-Timing"].split(", ")
+        ]
+        self.assertEqual(phases, ["parse", "app", "body"])
+
+    def test_server_timing_cached(self):
+        """
+        Test cached responses only time the parse phase, and don't keep the
+        Server-Timing header of the first response.
+        """
+
+        calls = []
+        handler = Handler(
+            app, cache=ResponseCache(), server_timing=True,
+            timing_callback=lambda timings, event: calls.append(timings)
+        )
+        handler(EVENT, DummyContext())
+        result = handler(EVENT, DummyContext())
+
+        self.assertTrue(calls[1].cached)
+        self.assertTrue(get_headers(result)["Server-Timing"].startswith("parse;dur="))
+        self.assertNotIn(",", get_headers(result)["Server-Timing"])
+
+    def test_emf(self):
+        """
+        Test timings are written to stdout in Embedded Metric Format.
+        """
+
+        handler = Handler(app, emf_namespace="MyApp", emf_dimensions={"Service": "api"})
+        with CapturedStdout() as stdout:
+            handler(EVENT, DummyContext())
+
+        line = json.loads("".join(stdout))
+        metrics = line["_aws"]["CloudWatchMetrics"][0]
+        self.assertEqual(metrics["Namespace"], "MyApp")
+        self.assertEqual(metrics["Dimensions"], [["Service"]])
+        self.assertEqual(
+            sorted(metric["Name"] for metric in metrics["Metrics"]),
+            ["app", "body", "parse", "serialize", "total"]
+        )
+        self.assertEqual(line["Service"], "api")
+        self.assertGreaterEqual(line["total"], 0)
@@ -0,0 +1,136 @@
+import sys
+import unittest
+
+from apigwsgi import Handler, WSGIStartResponse
+from apigwsgi import validation
+from tests.helpers import DummyContext, make_event
+
+EVENT = make_event()
+
+def make_app(status="200 OK", headers=None, chunks=("OK",), writes=()):
+    def app(environ, start_response):
+        write = start_response(status, list(headers or [("Content-Type", "text/plain")]))
+        for bytestring in writes:
+            write(bytestring)
+        return list(chunks)
+    return app
+
+class ValidationTestCase(unittest.TestCase):
+    def test_levels(self):
+        """
+        Test unknown validation levels are rejected.
+        """
+
+        for level in ["strict", "fast", "off"]:
+            self.assertEqual(Handler(make_app(), validation=level).validation, level)
+
+        with self.assertRaises(Exception):
+            Handler(make_app(), validation="loose")
+
+    def test_valid_responses(self):
+        """
+        Test valid responses are the same at every level.
+        """
+
+        app = make_app(
+            "404 Not Found",
+            [("Content-Type", "text/plain"), ("X-Thing", "a\tb")],
+            ["Not ", "found"], ["Really "]
+        )
+        responses = [
+            Handler(app, validation=level)(EVENT, DummyContext())
+            for level in ["strict", "fast", "off"]
+        ]
+
+        self.assertEqual(responses[0]["statusCode"], 404)
+        self.assertEqual(responses[0]["body"], "Really Not found")
+        self.assertEqual(responses[0], responses[1])
+        self.assertEqual(responses[0], responses[2])
+
+    def test_strict(self):
+        """
+        Test strict validation rejects what PEP 3333 forbids.
+        """
+
+        invalid_apps = [
+            make_app(status="200"),
+            make_app(status="20 OK"),
+            make_app(status="200 OK\r\n"),
+            make_app(status=u"200 OK"),
+            make_app(headers=[("Content-Type", "text/plain", "extra")]),
+            make_app(headers=[["Content-Type", "text/plain"]]),
+            make_app(headers=[("Content-Type:", "text/plain")]),
+            make_app(headers=[("X-Thing", "a\r\nSet-Cookie: b")]),
+            make_app(headers=[("X-Thing", 1)]),
+            make_app(headers=[("Connection", "close")]),
+            make_app(chunks=[u"OK"]),
+            make_app(writes=[u"OK"])
+        ]
+        for app in invalid_apps:
+            with self.assertRaises(Exception):
+                Handler(app, validation="strict").run_wsgi_app(
+                    Handler(app).get_wsgi_environ(EVENT, DummyContext())
+                )
+
+    def test_strict_headers_tuple(self):
+        """
+        Test strict validation requires headers to be a list.
+        """
+
+        start_response = WSGIStartResponse(write=None, validation="strict")
+        with self.assertRaises(Exception):
+            start_response("200 OK", (("Content-Type", "text/plain"),))
+
+    def test_exc_info(self):
+        """
+        Test the second call rules apply at every level.
+        """
+
+        for level in ["strict", "fast", "off"]:
+            start_response = WSGIStartResponse(write=None, validation=level)
+            start_response("200 OK", [])
+            with self.assertRaises(Exception):
+                start_response("500 Internal Server Error", [])
+
+            try:
+                raise ValueError()
+            except ValueError:
+                start_response("500 Internal Server Error", [], sys.exc_info())
+            self.assertEqual(start_response.status_code, 500)
+
+        start_response = WSGIStartResponse(write=None, validation="strict")
+        with self.assertRaises(Exception):
+            start_response("500 Internal Server Error", [], (ValueError,))
+
+    def test_fast_cache(self):
+        """
+        Test fast validation parses each status once, and still rejects
+        malformed ones.
+        """
+
+        validation.STATUS_CODES.clear()
+        for _ in xrange(2):
+            start_response = WSGIStartResponse(write=None, validation="fast")
+            start_response("201 Created", [])
+            self.assertEqual(start_response.status_code, 201)
+        self.assertEqual(validation.STATUS_CODES, {"201 Created": 201})
+
+        for _ in xrange(2):
+            with self.assertRaises(Exception):
+                WSGIStartResponse(write=None, validation="fast")("Created", [])
+        self.assertNotIn("Created", validation.STATUS_CODES)
+
+        # The cache is bounded.
+        for status_code in xrange(300):
+            validation.parse_status_cached("{} Status".format(status_code))
+        self.assertLessEqual(len(validation.STATUS_CODES), 256)
+
+    def test_off(self):
+        """
+        Test the status code is taken without checking the status line.
+        """
+
+        start_response = WSGIStartResponse(write=None, validation="off")
+        start_response("200OK", [("X-Thing", "a\r\nb")])
+        self.assertEqual(start_response.status_code, 200)
+        self.assertEqual(start_response.status, "200OK")
@@ -0,0 +1,89 @@
+import os
+import unittest
+
+from apigwsgi import Handler
+from tests.helpers import DummyContext
+
+def make_app():
+    def app(environ, start_response):
+        app.requests.append((environ["REQUEST_METHOD"], environ["PATH_INFO"], environ["QUERY_STRING"]))
+        start_response("200 Ok", [("Content-Type", "text/plain")])
+        return ["Hello world"]
+    app.requests = []
+    return app
+
+class WarmupTestCase(unittest.TestCase):
+    def test_scheduled_event(self):
+        """
+        Test scheduled events are answered without calling the app.
+        """
+
+        app = make_app()
+        event = {
+            "version": "0",
+            "id": "89d1a02d-5ec7-412e-82f5-13505f849b41",
+            "detail-type": "Scheduled Event",
+            "source": "aws.events",
+            "account": "123456789012",
+            "time": "2016-12-30T18:44:49Z",
+            "region": "us-east-1",
+            "resources": ["arn:aws:events:us-east-1:123456789012:rule/SampleRule"],
+            "detail": {}
+        }
+
+        result = Handler(app)(event, DummyContext())
+        self.assertEqual(result, {"warmup": True})
+        self.assertEqual(app.requests, [])
+
+    def test_warmup_payload(self):
+        """
+        Test `{"warmup": true}` payloads are answered without calling the app.
+        """
+
+        app = make_app()
+        result = Handler(app)({"warmup": True}, DummyContext())
+        self.assertEqual(result, {"warmup": True})
+        self.assertEqual(app.requests, [])
+
+    def test_custom_warmup_events(self):
+        """
+        Test warmup events can be configured.
+        """
+
+        app = make_app()
+        handler = Handler(app, warmup_events=[lambda event: event.get("ping") == "keepalive"])
+
+        self.assertEqual(handler({"ping": "keepalive"}, DummyContext()), {"warmup": True})
+        with self.assertRaises(Exception):
+            handler({"warmup": True}, DummyContext())
+        self.assertEqual(app.requests, [])
+
+    def test_warmup_requests(self):
+        """
+        Test warmup requests are run through the app when the handler is
+        created.
+        """
+
+        app = make_app()
+        Handler(app, warmup_requests=["/", ("POST", "/search?q=a+b")])
+        self.assertEqual(app.requests, [
+            ("GET", "/", ""),
+            ("POST", "/search", "q=a+b")
+        ])
+
+    def test_warmup_request_errors(self):
+        """
+        Test warmup requests that fail are logged rather than raised.
+        """
+
+        def app(environ, start_response):
+            raise ValueError("Not ready")
+
+        with open(os.devnull, "w") as devnull:
+            class QuietHandler(Handler):
+                def get_environ_template(self):
+                    environ = super(QuietHandler, self).get_environ_template()
+                    environ["wsgi.errors"] = devnull
+                    return environ
+
+            QuietHandler(app, warmup_requests=["/"])